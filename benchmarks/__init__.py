@@ -0,0 +1 @@
+"""Benchmarks e gerador de dados sintéticos (python -m benchmarks.executar)."""
@@ -0,0 +1,239 @@
+"""Benchmarks do núcleo, sem interface gráfica.
+
+    python -m benchmarks.executar --tamanhos 1000,10000,100000 --saida bench.json
+    python -m benchmarks.executar --comparar bench_antigo.json
+
+Para cada tamanho, gera um ledger sintético (benchmarks.gerador) num diretório
+temporário e executa os passos em sequência sobre o mesmo ledger, como uma
+sessão de uso. Os tempos vêm de uma passada sem instrumentação; o pico de
+memória de cada passo (acima do que já estava alocado) vem de uma segunda
+passada com tracemalloc. O relatório é JSON.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from gastos import Ledger, analise
+from gastos.backup import Backups
+from gastos.exportacao import exportar
+from gastos.importacao import importar_csv, importar_json
+from gastos.ordenacao import Ordenacao
+from gastos.recorrentes import aplicar_recorrentes
+from gastos.resumo import resumo_periodo
+
+from . import gerador
+
+TAMANHOS_PADRAO = (1000, 10000, 100000)
+TOLERANCIA_PADRAO = 0.25  # piora relativa acima disso é regressão
+
+def _passos(ctx):
+    """(nome, função) na ordem de execução; `ctx` carrega o ledger e os caminhos entre os passos."""
+    fim = gerador.FIM_PADRAO
+    mes_ini, mes_fim = f"{fim:%Y-%m}-01", fim.isoformat()
+
+    def carregar():
+        ctx["ledger"] = Ledger(ctx["arquivo"], "json")
+        ctx["ledger"].obter()
+
+    def salvar():
+        ctx["ledger"].marcar_alterado()
+        ctx["ledger"].salvar()
+
+    def filtrar_mes_categoria():
+        ctx["ledger"].consultar(mes_ini, mes_fim, "Mercado")
+
+    def ordenar_por_valor():
+        ctx["ordenacao"] = Ordenacao([("valor", True)])
+        ctx["ordenacao"].aplicar(list(enumerate(ctx["ledger"].consultar(), 1)))
+
+    def ordenar_categoria_data():
+        # Shift+clique na data depois da categoria: reaproveita as linhas da ordenação anterior
+        ctx["ordenacao"].clicar("categoria")
+        ctx["ordenacao"].clicar("data", acumular=True)
+        ctx["ordenacao"].aplicar()
+
+    def resumo_mes():
+        resumo_periodo(ctx["ledger"], mes_ini, mes_fim)
+
+    def resumo_intervalo():
+        resumo_periodo(ctx["ledger"], f"{fim.year - 1}-03-15", f"{fim.year}-02-10")
+
+    def tendencias():
+        analise.relatorio_tendencias(ctx["ledger"])
+
+    def busca_primeira():
+        ctx["ledger"].consultar(termo="farm")
+
+    def busca():
+        ctx["ledger"].consultar(termo="cinema")
+
+    def importar(formato):
+        return lambda: importar_csv(ctx["ledger"], ctx["csvs"][formato])
+
+    def desfazer_importacao():
+        ctx["ledger"].desfazer()
+        ctx["ledger"].salvar()
+
+    def exportar_csv():
+        exportar(ctx["ledger"], os.path.join(ctx["pasta"], "export.csv"))
+
+    def exportar_jsonl_gz():
+        exportar(ctx["ledger"], os.path.join(ctx["pasta"], "export.jsonl.gz"))
+
+    def recorrentes():
+        aplicar_recorrentes(ctx["ledger"], hoje=datetime(fim.year, fim.month, fim.day))
+
+    def backup_completo():
+        ctx["backups"] = Backups(ctx["ledger"], os.path.join(ctx["pasta"], "backups"))
+        ctx["backups"].fazer()
+
+    def backup_incremental():
+        g = ctx["ledger"].intervalo(mes_ini, mes_fim)[0]
+        ctx["ledger"].atualizar_gasto(g["id"], valor=g["valor"] + 1)
+        ctx["backups"].fazer()
+
+    def journal_edicao():
+        ledger = Ledger(ctx["arquivo"], "journal")
+        g = ledger.intervalo(mes_ini, mes_fim)[0]
+        ledger.atualizar_gasto(g["id"], valor=g["valor"] + 1)
+        ledger.fechar()
+
+    def particionado_migrar():
+        Ledger(ctx["arquivo"], "particionado").fechar()
+
+    def particionado_mes():
+        ctx["particionado"] = Ledger(ctx["arquivo"], "particionado")
+        ctx["particionado"].consultar(mes_ini, mes_fim)
+
+    def particionado_edicao():
+        ledger = ctx["particionado"]
+        g = ledger.intervalo(mes_ini, mes_fim)[0]
+        ledger.atualizar_gasto(g["id"], valor=g["valor"] + 1)
+        ledger.fechar()
+
+    def mesclar_json():
+        importar_json(ctx["ledger"], ctx["outro"], mesclar=True)
+
+    return [
+        ("carregar_json", carregar),
+        ("salvar_json", salvar),
+        ("filtrar_mes_categoria", filtrar_mes_categoria),
+        ("ordenar_por_valor", ordenar_por_valor),
+        ("ordenar_categoria_data", ordenar_categoria_data),
+        ("resumo_mes", resumo_mes),
+        ("resumo_intervalo", resumo_intervalo),
+        ("tendencias", tendencias),
+        ("busca_primeira", busca_primeira),
+        ("busca", busca),
+        *[(f"importar_csv_{f}", importar(f)) for f in gerador.FORMATOS_CSV],
+        ("desfazer_importacao", desfazer_importacao),
+        ("exportar_csv", exportar_csv),
+        ("exportar_jsonl_gz", exportar_jsonl_gz),
+        ("aplicar_recorrentes", recorrentes),
+        ("backup_completo", backup_completo),
+        ("backup_incremental", backup_incremental),
+        ("journal_edicao", journal_edicao),
+        ("particionado_migrar", particionado_migrar),
+        ("particionado_mes", particionado_mes),
+        ("particionado_edicao", particionado_edicao),
+        ("mesclar_json", mesclar_json),
+    ]
+
+def _executar_cenario(n, medir_memoria):
+    with tempfile.TemporaryDirectory(prefix="gastos_bench_") as pasta:
+        ctx = {"pasta": pasta, "arquivo": os.path.join(pasta, "gastos.json")}
+        gerador.gravar_ledger(gerador.gerar_ledger(n), ctx["arquivo"])
+        ctx["csvs"] = gerador.gerar_csvs(max(1000, n // 10), pasta)
+        ctx["outro"] = os.path.join(pasta, "outro.json")  # outro ledger exportado, para a mesclagem
+        gerador.gravar_ledger(gerador.gerar_ledger(max(1000, n // 10), semente=11), ctx["outro"])
+        resultados = {}
+        if medir_memoria:
+            tracemalloc.start()
+        try:
+            for nome, passo in _passos(ctx):
+                if medir_memoria:
+                    tracemalloc.reset_peak()
+                    base = tracemalloc.get_traced_memory()[0]
+                t0 = time.perf_counter()
+                passo()
+                dt = time.perf_counter() - t0
+                if medir_memoria:
+                    atual, pico = tracemalloc.get_traced_memory()
+                    resultados[nome] = {"pico_mb": round((pico - base) / 2**20, 3), "alocado_mb": round(atual / 2**20, 3)}
+                else:
+                    resultados[nome] = {"segundos": round(dt, 6)}
+            ctx["ledger"].fechar()
+        finally:
+            if medir_memoria:
+                tracemalloc.stop()
+        return resultados
+
+def _versao():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def executar(tamanhos=TAMANHOS_PADRAO, medir_memoria=True, progresso=None):
+    """Roda a suíte e retorna o relatório (dict serializável em JSON)."""
+    relatorio = {
+        "versao": _versao(), "criado": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "plataforma": platform.platform(),
+        "numpy": analise.np is not None, "resultados": [],
+    }
+    for n in tamanhos:
+        tempos = _executar_cenario(n, False)
+        memoria = _executar_cenario(n, True) if medir_memoria else {}
+        for nome, r in tempos.items():
+            linha = {"tamanho": n, "operacao": nome, **r, **memoria.get(nome, {})}
+            relatorio["resultados"].append(linha)
+            if progresso:
+                progresso(linha)
+    return relatorio
+
+def comparar(atual, anterior, tolerancia=TOLERANCIA_PADRAO):
+    """[(tamanho, operacao, segundos antes, agora, razão)] das operações que pioraram além da tolerância."""
+    antes = {(r["tamanho"], r["operacao"]): r["segundos"] for r in anterior["resultados"]}
+    regressoes = []
+    for r in atual["resultados"]:
+        t0 = antes.get((r["tamanho"], r["operacao"]))
+        # abaixo de 1 ms a variação é ruído
+        if t0 and max(t0, r["segundos"]) >= 0.001 and r["segundos"] > t0 * (1 + tolerancia):
+            regressoes.append((r["tamanho"], r["operacao"], t0, r["segundos"], r["segundos"] / t0))
+    return regressoes
+
+def _linha_texto(r):
+    mem = f"  pico {r['pico_mb']:9.2f} MB" if "pico_mb" in r else ""
+    return f"{r['tamanho']:>9}  {r['operacao']:<24} {r['segundos'] * 1000:11.2f} ms{mem}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.executar", description="Benchmarks do controle de gastos (sem interface gráfica).")
+    parser.add_argument("--tamanhos", default=",".join(map(str, TAMANHOS_PADRAO)), help="nº de gastos, separados por vírgula (ex.: 1000,10000,100000,1000000)")
+    parser.add_argument("--saida", help="grava o relatório JSON neste arquivo")
+    parser.add_argument("--comparar", help="relatório anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO, help="piora relativa aceita (padrão: 0.25)")
+    parser.add_argument("--sem-memoria", action="store_true", help="pula a passada com tracemalloc")
+    args = parser.parse_args(argv)
+    tamanhos = [int(t) for t in args.tamanhos.split(",") if t]
+    relatorio = executar(tamanhos, not args.sem_memoria, progresso=lambda r: print(_linha_texto(r), flush=True))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, indent=1, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            regressoes = comparar(relatorio, json.load(f), args.tolerancia)
+        for n, op, t0, t1, razao in regressoes:
+            print(f"REGRESSÃO {n:>9}  {op:<24} {t0 * 1000:.2f} ms -> {t1 * 1000:.2f} ms ({razao:.2f}x)")
+        return 1 if regressoes else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Gerador determinístico de ledgers e CSVs sintéticos para os benchmarks.
+
+Mesma semente, mesmos dados: categorias com pesos e valores típicos, datas
+espalhadas por `anos` anos (fins de semana um pouco mais movimentados),
+recorrentes mensais com ocorrências passadas e geração atrasada em alguns meses.
+"""
+import csv
+import json
+import math
+import os
+import random
+import uuid
+from datetime import date, timedelta
+
+# categoria: (peso, valor mediano em R$, descrições)
+CATEGORIAS = {
+    "Mercado": (25, 120.0, ["Supermercado", "Hortifruti", "Padaria", "Açougue", "Atacadão"]),
+    "Restaurante": (12, 55.0, ["Almoço", "Jantar", "Lanche", "Pizza", "Café"]),
+    "Transporte": (15, 30.0, ["Uber", "Combustível", "Ônibus", "Estacionamento", "Pedágio"]),
+    "Casa": (8, 150.0, ["Material de limpeza", "Manutenção", "Utensílios", "Gás"]),
+    "Lazer": (8, 80.0, ["Cinema", "Show", "Viagem", "Livros", "Jogos"]),
+    "Saúde": (6, 90.0, ["Farmácia", "Consulta", "Exame", "Dentista"]),
+    "Educação": (4, 200.0, ["Curso", "Material escolar", "Mensalidade"]),
+    "Vestuário": (5, 130.0, ["Roupas", "Calçados", "Acessórios"]),
+    "Geral": (17, 45.0, ["Presente", "Doação", "Diversos", "Papelaria"]),
+}
+RECORRENTES = [
+    ("Aluguel", 1800.0, 5, "Casa"), ("Condomínio", 450.0, 10, "Casa"), ("Internet", 119.9, 15, "Casa"),
+    ("Energia", 210.0, 20, "Casa"), ("Academia", 99.9, 1, "Saúde"), ("Streaming", 39.9, 12, "Lazer"),
+    ("Plano de saúde", 620.0, 8, "Saúde"), ("Escola de idiomas", 350.0, 25, "Educação"),
+]
+MESES_ATRASO = 6  # meses que `aplicar_recorrentes` terá de recuperar
+FIM_PADRAO = date(2025, 12, 31)
+
+def _meses_antes(d, meses):
+    total = d.year * 12 + d.month - 1 - meses
+    return date(total // 12, total % 12 + 1, 1)
+
+def gerar_ledger(n, semente=42, anos=10, fim=FIM_PADRAO):
+    """Dados no formato do arquivo de gastos, com `n` gastos (incluindo os recorrentes já lançados)."""
+    rnd = random.Random(semente)
+    nomes = list(CATEGORIAS)
+    pesos = [CATEGORIAS[c][0] for c in nomes]
+    inicio = fim - timedelta(days=365 * anos)
+    dias = (fim - inicio).days
+    gastos = []
+    # ocorrências passadas dos recorrentes, até MESES_ATRASO meses antes do fim
+    corte = _meses_antes(fim, MESES_ATRASO)
+    mes = _meses_antes(fim, 12 * anos)
+    while mes < corte and len(gastos) < n // 10:
+        for desc, valor, dia, cat in RECORRENTES:
+            gastos.append({"id": str(uuid.UUID(int=rnd.getrandbits(128))), "descricao": desc, "valor": valor,
+                           "data": mes.replace(day=min(dia, 28)).isoformat(), "categoria": cat})
+        mes = _meses_antes(mes, -1)
+    while len(gastos) < n:
+        cat = rnd.choices(nomes, pesos)[0]
+        _, mediana, descricoes = CATEGORIAS[cat]
+        d = inicio + timedelta(days=rnd.randrange(dias))
+        if d.weekday() < 5 and rnd.random() < 0.2:
+            d += timedelta(days=5 - d.weekday())  # empurra parte dos gastos para o fim de semana
+            d = min(d, fim)
+        valor = round(mediana * math.exp(rnd.gauss(0, 0.6)), 2)
+        gastos.append({"id": str(uuid.UUID(int=rnd.getrandbits(128))), "descricao": rnd.choice(descricoes), "valor": valor,
+                       "data": d.isoformat(), "categoria": cat})
+    rnd.shuffle(gastos)  # ordem de inserção não coincide com a ordem de data
+    recorrentes = [{"descricao": desc, "valor": valor, "dia": dia, "categoria": cat,
+                    "ultima_geracao": _meses_antes(corte, 1).replace(day=min(dia, 28)).isoformat()}
+                   for desc, valor, dia, cat in RECORRENTES]
+    orcamentos = {c: round(CATEGORIAS[c][1] * 20, 2) for c in nomes}
+    return {"gastos": gastos, "orcamento_inicial": 8000.0, "orcamentos_categoria": orcamentos, "recorrentes": recorrentes}
+
+def gravar_ledger(dados, caminho):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+
+# formatos aceitos por importar_csv: cabeçalho, formato de data, separador decimal
+FORMATOS_CSV = {
+    "iso": (["data", "categoria", "descricao", "valor"], "%Y-%m-%d", "."),
+    "br": (["Data", "Categoria", "Descrição", "Valor"], "%d/%m/%Y", ","),
+    "en": (["date", "category", "description", "amount"], "%m/%d/%Y", "."),
+}
+
+def gravar_csv(gastos, caminho, formato="iso"):
+    cabecalho, fmt_data, decimal = FORMATOS_CSV[formato]
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(cabecalho)
+        for g in gastos:
+            valor = f"{g['valor']:.2f}"
+            if decimal == ",":
+                valor = valor.replace(".", ",")
+            w.writerow([date.fromisoformat(g["data"]).strftime(fmt_data), g["categoria"], g["descricao"], valor])
+
+def gerar_csvs(n, pasta, semente=7):
+    """Um CSV de `n` linhas por formato em `pasta`; retorna {formato: caminho}."""
+    gastos = gerar_ledger(n, semente)["gastos"]
+    caminhos = {}
+    for formato in FORMATOS_CSV:
+        caminhos[formato] = os.path.join(pasta, f"importar_{formato}_{n}.csv")
+        gravar_csv(gastos, caminhos[formato], formato)
+    return caminhos
@@ -1,632 +1,925 @@
-import json
-import os
-import csv
-import uuid
-import tempfile
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, simpledialog
-import tkinter.font as tkfont
-
-ARQUIVO_GASTOS = "gastos_pessoais.json"
-BACKUP_DIR = "backups"
-
-# Undo stack (last deletions)
-_last_deleted = deque(maxlen=10)
-
-# ---------- Helpers ----------
-def parse_date_to_iso(s):
-    """Tenta normalizar várias entradas de data para YYYY-MM-DD ou retorna None."""
-    if not s or not str(s).strip():
-        return None
-    s = s.strip()
-    formatos = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y", "%Y/%m/%d"]
-    for fmt in formatos:
-        try:
-            return datetime.strptime(s, fmt).strftime("%Y-%m-%d")
-        except:
-            continue
-    # tentar interpretar números sem separador (YYYYMMDD)
-    if s.isdigit() and len(s) == 8:
-        try:
-            return datetime.strptime(s, "%Y%m%d").strftime("%Y-%m-%d")
-        except:
-            pass
-    return None
-
-def safe_float(v):
-    try:
-        return float(str(v).replace(",", "."))
-    except:
-        return None
-
-# ---------- Arquivo: carregar / salvar (atômico e resiliência) ----------
-def carregar_gastos():
-    if os.path.exists(ARQUIVO_GASTOS):
-        try:
-            with open(ARQUIVO_GASTOS, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            os.makedirs(BACKUP_DIR, exist_ok=True)
-            bak = os.path.join(BACKUP_DIR, f"corrupt_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            try:
-                os.replace(ARQUIVO_GASTOS, bak)
-            except:
-                pass
-            messagebox.showwarning("Aviso", f"Arquivo de dados corrompido. Foi movido para:\n{bak}")
-    return {"gastos": [], "orcamento_inicial": 0.0, "orcamentos_categoria": {}, "recorrentes": []}
-
-def salvar_gastos(dados):
-    dirpath = os.path.dirname(os.path.abspath(ARQUIVO_GASTOS)) or "."
-    with tempfile.NamedTemporaryFile("w", dir=dirpath, delete=False, encoding="utf-8") as tmp:
-        json.dump(dados, tmp, indent=4, ensure_ascii=False)
-        tmp_path = tmp.name
-    os.replace(tmp_path, ARQUIVO_GASTOS)
-
-def fazer_backup():
-    os.makedirs(BACKUP_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    destino = os.path.join(BACKUP_DIR, f"backup_{timestamp}.json")
-    dados = carregar_gastos()
-    with open(destino, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4, ensure_ascii=False)
-    messagebox.showinfo("Backup", f"Backup salvo em:\n{destino}")
-
-def importar_arquivo(caminho):
-    if not os.path.exists(caminho):
-        messagebox.showerror("Importar", "Arquivo não encontrado.")
-        return
-    with open(caminho, "r", encoding="utf-8") as f:
-        dados = json.load(f)
-    salvar_gastos(dados)
-    messagebox.showinfo("Importar", "Dados importados com sucesso.")
-    app_refresh()
-
-def exportar_csv(path="gastos_export.csv"):
-    dados = carregar_gastos()
-    with open(path, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["data","categoria","descricao","valor"])
-        for g in dados["gastos"]:
-            writer.writerow([g["data"], g.get("categoria","Geral"), g["descricao"], f"{g['valor']:.2f}"])
-    messagebox.showinfo("Exportar CSV", f"Exportado para {path}")
-
-# ---------- CSV import (mapeamento automático) ----------
-def importar_csv(path=None):
-    path = path or filedialog.askopenfilename(title="Importar CSV", filetypes=[("CSV","*.csv"),("All","*.*")])
-    if not path:
-        return
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        headers = next(reader, None)
-        if not headers:
-            messagebox.showerror("Importar CSV", "Arquivo CSV vazio.")
-            return
-        # mapear cabeçalhos
-        hdr_map = {}
-        for i,h in enumerate(headers):
-            key = h.strip().lower()
-            if key in ("data","date","dia"):
-                hdr_map["data"] = i
-            elif key in ("categoria","category"):
-                hdr_map["categoria"] = i
-            elif key in ("descricao","descrição","description","desc"):
-                hdr_map["descricao"] = i
-            elif key in ("valor","value","amount","amount_br"):
-                hdr_map["valor"] = i
-        # heurística: se não houver cabeçalho óbvio, tentar padrões por posição
-        dados = carregar_gastos()
-        adicionados = 0
-        for row in reader:
-            if not row:
-                continue
-            # obter valores com fallback
-            raw_data = row[hdr_map["data"]] if "data" in hdr_map and hdr_map["data"] < len(row) else row[0] if len(row)>0 else ""
-            raw_cat = row[hdr_map["categoria"]] if "categoria" in hdr_map and hdr_map["categoria"] < len(row) else (row[1] if len(row)>1 else "Geral")
-            raw_desc = row[hdr_map["descricao"]] if "descricao" in hdr_map and hdr_map["descricao"] < len(row) else (row[2] if len(row)>2 else "Importado")
-            raw_val = row[hdr_map["valor"]] if "valor" in hdr_map and hdr_map["valor"] < len(row) else (row[-1] if len(row)>0 else "0")
-            data_iso = parse_date_to_iso(raw_data) or datetime.now().strftime("%Y-%m-%d")
-            val = safe_float(raw_val) or 0.0
-            gasto = {"id": str(uuid.uuid4()), "descricao": str(raw_desc).strip(), "valor": round(val,2), "data": data_iso, "categoria": str(raw_cat).strip() or "Geral"}
-            dados["gastos"].append(gasto)
-            adicionados += 1
-        salvar_gastos(dados)
-        messagebox.showinfo("Importar CSV", f"{adicionados} itens importados.")
-        app_refresh()
-
-# ---------- Recorrentes (aplicar) ----------
-def aplicar_recorrentes(show_msg=True):
-    dados = carregar_gastos()
-    recs = dados.get("recorrentes", [])
-    if not recs:
-        if show_msg:
-            messagebox.showinfo("Recorrentes", "Nenhuma despesa recorrente cadastrada.")
-        return
-    aplicados = 0
-    hoje = datetime.now()
-    for rec in recs:
-        try:
-            ultima = datetime.strptime(rec.get("ultima_geracao"), "%Y-%m-%d")
-        except:
-            ultima = hoje
-        # gerar ocorrências mensais desde ultima até mês atual (simples)
-        while True:
-            proxima = (ultima.replace(day=1) + timedelta(days=32))
-            # ajustar dia
-            dia = min(rec.get("dia", ultima.day), 28)
-            proxima = proxima.replace(day=dia)
-            if proxima.date() > hoje.date():
-                break
-            # adicionar gasto somente se ainda não existir ocorrência com mesma marca
-            existe = any(g.get("descricao")==rec["descricao"] and g.get("data")==proxima.strftime("%Y-%m-%d") and abs(g.get("valor",0)-rec["valor"])<0.01 for g in dados["gastos"])
-            if not existe:
-                dados["gastos"].append({
-                    "id": str(uuid.uuid4()),
-                    "descricao": rec["descricao"],
-                    "valor": rec["valor"],
-                    "data": proxima.strftime("%Y-%m-%d"),
-                    "categoria": rec.get("categoria","Geral")
-                })
-                aplicados += 1
-            ultima = proxima
-        rec["ultima_geracao"] = ultima.strftime("%Y-%m-%d")
-    if aplicados:
-        salvar_gastos(dados)
-        app_refresh()
-    if show_msg:
-        messagebox.showinfo("Recorrentes", f"Recorrentes aplicados: {aplicados}")
-
-# ---------- GUI ----------
-root = tk.Tk()
-root.title("Gastos — Gerenciador")
-root.geometry("1000x640")
-root.minsize(900, 600)
-
-style = ttk.Style(root)
-style.theme_use("clam")
-
-# Frames
-frame_left = ttk.Frame(root, padding=10)
-frame_left.pack(side="left", fill="y")
-
-frame_right = ttk.Frame(root, padding=10)
-frame_right.pack(side="right", expand=True, fill="both")
-
-# --- Left: entrada e controles ---
-ttk.Label(frame_left, text="Orçamento Inicial (R$)").pack(anchor="w")
-salario_var = tk.StringVar()
-entry_salario = ttk.Entry(frame_left, textvariable=salario_var, width=18)
-entry_salario.pack(anchor="w", pady=4)
-def_def_sal = ttk.Button(frame_left, text="Definir/Atualizar", width=18)
-def_def_sal.pack(anchor="w", pady=4)
-
-ttk.Separator(frame_left, orient="horizontal").pack(fill="x", pady=8)
-
-ttk.Label(frame_left, text="Registrar Gasto").pack(anchor="w", pady=(2,0))
-entry_desc = ttk.Entry(frame_left, width=28)
-entry_desc.insert(0, "Descrição")
-entry_desc.bind("<FocusIn>", lambda e: entry_desc.delete(0, tk.END) if entry_desc.get()=="Descrição" else None)
-entry_desc.pack(anchor="w", pady=4)
-
-frame_val = ttk.Frame(frame_left)
-frame_val.pack(anchor="w")
-ttk.Label(frame_val, text="Valor R$").grid(row=0, column=0, padx=(0,6))
-entry_valor = ttk.Entry(frame_val, width=12)
-entry_valor.grid(row=0, column=1)
-
-ttk.Label(frame_val, text="Data").grid(row=1, column=0, padx=(0,6), pady=(6,0))
-entry_data = ttk.Entry(frame_val, width=12)
-entry_data.insert(0, datetime.now().strftime("%Y-%m-%d"))
-entry_data.grid(row=1, column=1, pady=(6,0))
-
-ttk.Label(frame_left, text="Categoria").pack(anchor="w", pady=(8,0))
-categoria_var = tk.StringVar()
-combo_categoria = ttk.Combobox(frame_left, textvariable=categoria_var, values=[], width=26)
-combo_categoria.pack(anchor="w", pady=4)
-combo_categoria.set("Geral")
-
-recorrente_var = tk.BooleanVar()
-ttk.Checkbutton(frame_left, text="Marcar como recorrente (mensal)", variable=recorrente_var).pack(anchor="w", pady=4)
-
-ttk.Button(frame_left, text="Registrar Gasto", command=lambda: app_add_gasto()).pack(anchor="w", pady=6)
-
-ttk.Separator(frame_left, orient="horizontal").pack(fill="x", pady=8)
-
-ttk.Label(frame_left, text="Orçamento por Categoria").pack(anchor="w")
-entry_cat_name = ttk.Entry(frame_left, width=20)
-entry_cat_name.pack(anchor="w", pady=4)
-entry_cat_value = ttk.Entry(frame_left, width=20)
-entry_cat_value.pack(anchor="w", pady=(0,6))
-ttk.Button(frame_left, text="Definir Orçamento Categoria", command=lambda: app_definir_orc_categoria()).pack(anchor="w")
-
-ttk.Separator(frame_left, orient="horizontal").pack(fill="x", pady=8)
-ttk.Button(frame_left, text="Aplicar Recorrentes", command=lambda: aplicar_recorrentes(True)).pack(fill="x", pady=4)
-ttk.Button(frame_left, text="Backup (salvar)", command=fazer_backup).pack(fill="x", pady=4)
-ttk.Button(frame_left, text="Importar JSON", command=lambda: app_importar()).pack(fill="x", pady=4)
-ttk.Button(frame_left, text="Importar CSV", command=lambda: importar_csv()).pack(fill="x", pady=4)
-ttk.Button(frame_left, text="Exportar CSV", command=lambda: app_export_csv()).pack(fill="x", pady=4)
-ttk.Button(frame_left, text="Sair", command=root.destroy).pack(fill="x", pady=14)
-
-# --- Right: lista, filtros e resumo ---
-top_right = ttk.Frame(frame_right)
-top_right.pack(fill="x")
-
-ttk.Label(top_right, text="Filtros:").grid(row=0, column=0, sticky="w")
-mes_var = tk.StringVar()
-ano_var = tk.StringVar()
-combo_mes = ttk.Combobox(top_right, textvariable=mes_var, values=[""]+[str(i) for i in range(1,13)], width=6)
-combo_mes.grid(row=0, column=1, padx=6)
-combo_ano = ttk.Combobox(top_right, textvariable=ano_var, values=[""]+[str(y) for y in range(datetime.now().year-5, datetime.now().year+2)], width=8)
-combo_ano.grid(row=0, column=2, padx=6)
-filtro_cat_var = tk.StringVar()
-combo_fil_cat = ttk.Combobox(top_right, textvariable=filtro_cat_var, values=[], width=16)
-combo_fil_cat.grid(row=0, column=3, padx=6)
-
-ttk.Label(top_right, text="Pesquisar").grid(row=0, column=4, padx=(12,2))
-search_var = tk.StringVar()
-entry_search = ttk.Entry(top_right, textvariable=search_var, width=20)
-entry_search.grid(row=0, column=5, padx=2)
-
-ttk.Button(top_right, text="Aplicar Filtro", command=lambda: app_refresh()).grid(row=0, column=6, padx=6)
-ttk.Button(top_right, text="Limpar Filtro", command=lambda: (mes_var.set(""), ano_var.set(""), filtro_cat_var.set(""), search_var.set(""), app_refresh())).grid(row=0, column=7)
-
-# Treeview de gastos
-cols = ("#","data","categoria","descricao","valor")
-tree = ttk.Treeview(frame_right, columns=cols, show="headings", selectmode="browse")
-for c in cols:
-    tree.heading(c, text=c.capitalize(), command=lambda _c=c: sort_treeview(_c, False))
-    tree.column(c, anchor="center")
-tree.pack(expand=True, fill="both", pady=(8,6))
-
-frame_tree_btns = ttk.Frame(frame_right)
-frame_tree_btns.pack(fill="x")
-ttk.Button(frame_tree_btns, text="Excluir Selecionado", command=lambda: app_excluir_selecionado()).pack(side="left", padx=4)
-ttk.Button(frame_tree_btns, text="Ver Resumo", command=lambda: app_mostrar_resumo()).pack(side="left", padx=4)
-ttk.Button(frame_tree_btns, text="Editar Selecionado", command=lambda: app_editar_selecionado()).pack(side="left", padx=4)
-ttk.Button(frame_tree_btns, text="Desfazer (Ctrl+Z)", command=lambda: app_undo()).pack(side="left", padx=4)
-ttk.Button(frame_tree_btns, text="Gráfico (Matplotlib)", command=lambda: mostrar_grafico_matplotlib()).pack(side="left", padx=4)
-
-# Resumo e gráfico simples
-frame_resumo = ttk.LabelFrame(frame_right, text="Resumo")
-frame_resumo.pack(fill="both", pady=8)
-
-label_resumo = ttk.Label(frame_resumo, text="", justify="left")
-label_resumo.pack(anchor="nw", padx=8, pady=6)
-
-canvas_chart = tk.Canvas(frame_resumo, height=140)
-canvas_chart.pack(fill="x", padx=8, pady=(0,8))
-
-# ---------- UI Functions ----------
-def app_load():
-    aplicar_recorrentes(show_msg=False)  # aplicar automaticamente ao abrir (silencioso)
-    dados = carregar_gastos()
-    salario_var.set(f"{dados.get('orcamento_inicial',0):.2f}" if dados.get('orcamento_inicial') else "")
-    cats = set(dados.get("orcamentos_categoria", {}).keys()) | {g.get("categoria","Geral") for g in dados.get("gastos",[])}
-    lista_cats = sorted([c for c in cats if c])
-    combo_categoria['values'] = lista_cats
-    combo_fil_cat['values'] = [""] + lista_cats
-    combo_categoria.set(combo_categoria.get() or "Geral")
-    app_refresh()
-
-def adjust_column_widths():
-    font = tkfont.Font()
-    for col in cols:
-        maxw = font.measure(tree.heading(col)['text'])
-        for iid in tree.get_children():
-            val = tree.set(iid, col) or ""
-            w = font.measure(str(val))
-            if w > maxw:
-                maxw = w
-        tree.column(col, width=max(60, maxw + 16))
-
-def app_refresh():
-    tree.delete(*tree.get_children())
-    dados = carregar_gastos()
-    mes = mes_var.get()
-    ano = ano_var.get()
-    catf = filtro_cat_var.get()
-    term = search_var.get().strip().lower()
-    gastos = dados["gastos"]
-    if mes and ano:
-        inicio = f"{int(ano)}-{int(mes):02d}-01"
-        fim_date = (datetime(int(ano), int(mes), 1) + timedelta(days=31)).replace(day=1) - timedelta(days=1)
-        fim = fim_date.strftime("%Y-%m-%d")
-        gastos = [g for g in gastos if inicio <= g["data"] <= fim]
-    if catf:
-        gastos = [g for g in gastos if g.get("categoria","Geral").lower() == catf.lower()]
-    if term:
-        gastos = [g for g in gastos if term in g.get("descricao","").lower() or term in g.get("categoria","").lower()]
-    gastos_sorted = sorted(gastos, key=lambda x: x["data"], reverse=True)
-    for i,g in enumerate(gastos_sorted,1):
-        tree.insert("", "end", values=(i, g["data"], g.get("categoria","Geral"), g["descricao"], f"R$ {g['valor']:.2f}"))
-    adjust_column_widths()
-    app_mostrar_resumo(update_only=True)
-
-def app_add_gasto():
-    desc = entry_desc.get().strip()
-    if not desc:
-        messagebox.showerror("Erro", "Descrição obrigatória.")
-        return
-    valor = safe_float(entry_valor.get())
-    if valor is None:
-        messagebox.showerror("Erro", "Valor inválido.")
-        return
-    data_raw = entry_data.get().strip()
-    data = parse_date_to_iso(data_raw) or None
-    if not data:
-        messagebox.showerror("Erro", "Data inválida. Use YYYY-MM-DD ou DD/MM/YYYY.")
-        return
-    categoria = categoria_var.get().strip() or "Geral"
-    recorrente = recorrente_var.get()
-    dados = carregar_gastos()
-    gasto = {"id": str(uuid.uuid4()), "descricao": desc, "valor": round(valor,2), "data": data, "categoria": categoria}
-    dados["gastos"].append(gasto)
-    if recorrente:
-        rec = {"descricao": desc, "valor": round(valor,2), "dia": int(data.split("-")[2]), "categoria": categoria, "ultima_geracao": data}
-        dados.setdefault("recorrentes", []).append(rec)
-    salvar_gastos(dados)
-    entry_desc.delete(0, tk.END)
-    entry_valor.delete(0, tk.END)
-    recorrente_var.set(False)
-    app_refresh()
-    checar_alerta_categoria(categoria)
-    messagebox.showinfo("Sucesso", "Gasto registrado.")
-
-def app_excluir_selecionado():
-    sel = tree.selection()
-    if not sel:
-        messagebox.showwarning("Excluir", "Selecione um gasto.")
-        return
-    idx = tree.index(sel[0])
-    dados = carregar_gastos()
-    mes = mes_var.get(); ano = ano_var.get(); catf = filtro_cat_var.get(); term = search_var.get().strip().lower()
-    gastos = dados["gastos"]
-    if mes and ano:
-        inicio = f"{int(ano)}-{int(mes):02d}-01"
-        fim_date = (datetime(int(ano), int(mes), 1) + timedelta(days=31)).replace(day=1) - timedelta(days=1)
-        fim = fim_date.strftime("%Y-%m-%d")
-        gastos = [g for g in gastos if inicio <= g["data"] <= fim]
-    if catf:
-        gastos = [g for g in gastos if g.get("categoria","Geral").lower() == catf.lower()]
-    if term:
-        gastos = [g for g in gastos if term in g.get("descricao","").lower() or term in g.get("categoria","").lower()]
-    gastos_sorted = sorted(gastos, key=lambda x: x["data"], reverse=True)
-    if 0 <= idx < len(gastos_sorted):
-        gasto = gastos_sorted[idx]
-        # remover item correspondente do dados["gastos"] por id preferencialmente
-        for i, g in enumerate(dados["gastos"]):
-            if g.get("id") == gasto.get("id") or (g["descricao"]==gasto["descricao"] and g["data"]==gasto["data"] and abs(g["valor"]-gasto["valor"])<0.01):
-                removed = dados["gastos"].pop(i)
-                salvar_gastos(dados)
-                # push to undo stack
-                _last_deleted.append({"index": i, "item": removed})
-                app_refresh()
-                messagebox.showinfo("Excluir", f"Gasto '{gasto['descricao']}' excluído.")
-                return
-    messagebox.showerror("Erro", "Não foi possível excluir o gasto selecionado.")
-
-def app_undo():
-    if not _last_deleted:
-        messagebox.showinfo("Desfazer", "Nada para desfazer.")
-        return
-    dados = carregar_gastos()
-    last = _last_deleted.pop()
-    idx = last.get("index", len(dados["gastos"]))
-    item = last.get("item")
-    if item:
-        # re-inserir na posição original se possível
-        idx = min(idx, len(dados["gastos"]))
-        dados["gastos"].insert(idx, item)
-        salvar_gastos(dados)
-        app_refresh()
-        messagebox.showinfo("Desfazer", f"Gasto '{item.get('descricao')}' restaurado.")
-
-def app_definir_orc_categoria():
-    nome = entry_cat_name.get().strip()
-    val = safe_float(entry_cat_value.get())
-    if not nome or val is None:
-        messagebox.showerror("Erro", "Categoria ou valor inválido.")
-        return
-    dados = carregar_gastos()
-    dados.setdefault("orcamentos_categoria", {})[nome] = round(val,2)
-    salvar_gastos(dados)
-    app_load()
-    messagebox.showinfo("OK", f"Orçamento para '{nome}' salvo.")
-
-def app_set_salario():
-    val = safe_float(salario_var.get())
-    if val is None:
-        messagebox.showerror("Erro", "Salário inválido.")
-        return
-    dados = carregar_gastos()
-    dados["orcamento_inicial"] = round(val,2)
-    salvar_gastos(dados)
-    app_refresh()
-    messagebox.showinfo("OK", "Orçamento inicial atualizado.")
-
-def app_importar():
-    path = filedialog.askopenfilename(title="Importar JSON", filetypes=[("JSON","*.json"),("All","*.*")])
-    if path:
-        importar_arquivo(path)
-
-def app_export_csv():
-    path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV","*.csv")], initialfile="gastos_export.csv")
-    if path:
-        exportar_csv(path)
-
-def app_mostrar_resumo(update_only=False):
-    dados = carregar_gastos()
-    mes = mes_var.get(); ano = ano_var.get()
-    gastos = dados["gastos"]
-    if mes and ano:
-        inicio = f"{int(ano)}-{int(mes):02d}-01"
-        fim_date = (datetime(int(ano), int(mes), 1) + timedelta(days=31)).replace(day=1) - timedelta(days=1)
-        fim = fim_date.strftime("%Y-%m-%d")
-        gastos = [g for g in gastos if inicio <= g["data"] <= fim]
-    total_gasto = sum(g["valor"] for g in gastos)
-    orc = dados.get("orcamento_inicial",0.0)
-    texto = f"Orçamento Inicial: R$ {orc:.2f}\nTotal Gasto: R$ {total_gasto:.2f}\nSaldo: R$ {orc - total_gasto:.2f}\n"
-    por_cat = defaultdict(float)
-    for g in gastos:
-        por_cat[g.get("categoria","Geral")] += g["valor"]
-    texto += "\nGastos por categoria:\n"
-    for c,v in sorted(por_cat.items(), key=lambda x: x[1], reverse=True):
-        texto += f" - {c}: R$ {v:.2f}\n"
-    label_resumo.config(text=texto)
-    desenhar_grafico(por_cat)
-
-def desenhar_grafico(dados_cat):
-    canvas_chart.delete("all")
-    if not dados_cat:
-        canvas_chart.create_text(10,10, anchor="nw", text="(sem dados)", fill="#444")
-        return
-    largura = canvas_chart.winfo_width() or 800
-    padding = 10
-    total = sum(dados_cat.values())
-    max_bar = largura - 2*padding
-    colors = ["#4e79a7","#f28e2b","#e15759","#76b7b2","#59a14f","#edc949","#af7aa1","#ff9da7"]
-    y = padding
-    i = 0
-    for cat, val in sorted(dados_cat.items(), key=lambda x: x[1], reverse=True):
-        propor = int((val/total) * max_bar) if total>0 else 0
-        color = colors[i % len(colors)]
-        canvas_chart.create_rectangle(padding, y, padding+propor, y+24, fill=color, outline="")
-        canvas_chart.create_text(padding+propor+8, y+12, anchor="w", text=f"{cat} R$ {val:.2f}", fill="#222")
-        y += 30
-        i += 1
-
-def checar_alerta_categoria(categoria):
-    dados = carregar_gastos()
-    orc_cat = dados.get("orcamentos_categoria", {})
-    if categoria in orc_cat:
-        hoje = datetime.now()
-        mes, ano = hoje.month, hoje.year
-        inicio = f"{ano}-{mes:02d}-01"
-        fim_date = (datetime(ano, mes, 1) + timedelta(days=31)).replace(day=1) - timedelta(days=1)
-        fim = fim_date.strftime("%Y-%m-%d")
-        gasto_cat = sum(g["valor"] for g in dados["gastos"] if inicio <= g["data"] <= fim and g.get("categoria","Geral")==categoria)
-        if gasto_cat > orc_cat[categoria]:
-            messagebox.showwarning("Alerta Orçamento", f"Categoria '{categoria}' estourou o orçamento:\n{gasto_cat:.2f} > {orc_cat[categoria]:.2f}")
-
-# ---------- Edit ----------
-def app_editar_selecionado():
-    sel = tree.selection()
-    if not sel:
-        messagebox.showwarning("Editar", "Selecione um gasto.")
-        return
-    idx = tree.index(sel[0])
-    dados = carregar_gastos()
-    mes = mes_var.get(); ano = ano_var.get(); catf = filtro_cat_var.get(); term = search_var.get().strip().lower()
-    gastos = dados["gastos"]
-    if mes and ano:
-        inicio = f"{int(ano)}-{int(mes):02d}-01"
-        fim_date = (datetime(int(ano), int(mes), 1) + timedelta(days=31)).replace(day=1) - timedelta(days=1)
-        fim = fim_date.strftime("%Y-%m-%d")
-        gastos = [g for g in gastos if inicio <= g["data"] <= fim]
-    if catf:
-        gastos = [g for g in gastos if g.get("categoria","Geral").lower() == catf.lower()]
-    if term:
-        gastos = [g for g in gastos if term in g.get("descricao","").lower() or term in g.get("categoria","").lower()]
-    gastos_sorted = sorted(gastos, key=lambda x: x["data"], reverse=True)
-    if not (0 <= idx < len(gastos_sorted)):
-        messagebox.showerror("Erro", "Item não encontrado.")
-        return
-    gasto = gastos_sorted[idx]
-    novo_desc = simpledialog.askstring("Editar", "Descrição:", initialvalue=gasto["descricao"])
-    if novo_desc is None:
-        return
-    novo_val = simpledialog.askstring("Editar", "Valor (R$):", initialvalue=f"{gasto['valor']:.2f}")
-    if novo_val is None:
-        return
-    nv = safe_float(novo_val)
-    if nv is None:
-        messagebox.showerror("Erro", "Valor inválido.")
-        return
-    nova_data_raw = simpledialog.askstring("Editar", "Data (YYYY-MM-DD ou DD/MM/YYYY):", initialvalue=gasto["data"])
-    if nova_data_raw is None:
-        return
-    nova_data = parse_date_to_iso(nova_data_raw)
-    if not nova_data:
-        messagebox.showerror("Erro", "Data inválida.")
-        return
-    # atualizar no dados originais por id
-    for i, g in enumerate(dados["gastos"]):
-        if g.get("id") == gasto.get("id"):
-            dados["gastos"][i]["descricao"] = novo_desc
-            dados["gastos"][i]["valor"] = round(nv,2)
-            dados["gastos"][i]["data"] = nova_data
-            salvar_gastos(dados)
-            app_refresh()
-            messagebox.showinfo("OK", "Gasto atualizado.")
-            return
-    messagebox.showerror("Erro", "Falha ao atualizar.")
-
-# ---------- Ordenação ----------
-def sort_treeview(col, reverse):
-    # obter dados atuais no view e ordenar
-    data = [(tree.set(k, col), k) for k in tree.get_children("")]
-    # se coluna numérica (# ou valor), converter
-    def keyfunc(x):
-        v = x[0]
-        if col == "#" :
-            try: return int(v)
-            except: return 0
-        if col == "valor":
-            try:
-                return float(str(v).replace("R$","").replace(",","").strip())
-            except:
-                return 0.0
-        return v.lower() if isinstance(v, str) else v
-    data.sort(key=keyfunc, reverse=reverse)
-    for index, (val, k) in enumerate(data):
-        tree.move(k, '', index)
-    # alternar próxima chamada
-    tree.heading(col, command=lambda: sort_treeview(col, not reverse))
-
-# ---------- Matplotlib gráfico modal ----------
-def mostrar_grafico_matplotlib():
-    try:
-        import matplotlib.pyplot as plt
-    except Exception:
-        messagebox.showerror("Matplotlib", "Matplotlib não instalado. Instale com: pip install matplotlib")
-        return
-    dados = carregar_gastos()
-    mes = mes_var.get(); ano = ano_var.get()
-    gastos = dados["gastos"]
-    if mes and ano:
-        inicio = f"{int(ano)}-{int(mes):02d}-01"
-        fim_date = (datetime(int(ano), int(mes), 1) + timedelta(days=31)).replace(day=1) - timedelta(days=1)
-        fim = fim_date.strftime("%Y-%m-%d")
-        gastos = [g for g in gastos if inicio <= g["data"] <= fim]
-    por_cat = defaultdict(float)
-    for g in gastos:
-        por_cat[g.get("categoria","Geral")] += g["valor"]
-    if not por_cat:
-        messagebox.showinfo("Gráfico", "Sem dados para mostrar.")
-        return
-    labels = list(por_cat.keys())
-    sizes = list(por_cat.values())
-    fig, ax = plt.subplots()
-    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')
-    title = "Gastos por categoria"
-    if mes and ano:
-        title += f" - {mes}/{ano}"
-    plt.title(title)
-    plt.show()
-
-# ---------- Shortcuts / Binds ----------
-def on_key(event):
-    if (event.state & 0x4) and event.keysym.lower() == 'z':  # Ctrl+Z
-        app_undo()
-
-root.bind_all("<Key>", on_key)
-canvas_chart.bind("<Configure>", lambda e: app_mostrar_resumo(update_only=True))
-
-# Bind buttons
-def_def_sal.config(command=app_set_salario)
-
-# Inicialização
-root.after(200, app_load)
-root.mainloop()
+import uuid
+import queue
+from datetime import datetime
+from collections import Counter
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import tkinter.font as tkfont
+
+from gastos import Ledger, parse_date_to_iso, periodo_mes, safe_float
+from gastos import importacao, recorrentes, resumo, exportacao, backup, analise, perf, persistencia
+from gastos.ordenacao import Ordenacao
+
+ATRASO_PESQUISA = 200  # ms sem digitar antes de refazer a pesquisa
+_pesquisa_agendada = None
+
+ledger = Ledger(avisar=lambda msg: messagebox.showwarning("Aviso", msg))
+backups = backup.Backups(ledger)
+
+# ---------- Treeview virtual ----------
+JANELA_TREE = 200  # linhas materializadas no Treeview de cada vez
+
+def valores_linha(n, g):
+    return (n, g["data"], g.get("categoria","Geral"), g["descricao"], f"R$ {g['valor']:.2f}")
+
+class LargurasColunas:
+    """Largura máxima do texto de cada coluna, sem percorrer itens do Treeview.
+
+    Cada caractere é medido uma vez na fonte e um texto mede a soma dos seus
+    caracteres (com cache por texto). Por coluna guarda-se quantos gastos têm
+    cada largura, então o máximo acompanha inclusões/exclusões no ledger.
+    """
+
+    def __init__(self, tree, colunas):
+        self.tree = tree
+        self.colunas = colunas
+        self._fonte = None
+        self._por_char = {}
+        self._por_texto = {}
+        self._contagem = {c: Counter() for c in colunas[1:]}
+        self._aplicadas = {}
+
+    def medir(self, texto):
+        w = self._por_texto.get(texto)
+        if w is None:
+            if self._fonte is None:
+                self._fonte = tkfont.Font()
+            w = 0
+            for ch in texto:
+                wc = self._por_char.get(ch)
+                if wc is None:
+                    wc = self._por_char[ch] = self._fonte.measure(ch)
+                w += wc
+            self._por_texto[texto] = w
+        return w
+
+    def ao_mudar(self, evento, item):
+        """Observador do ledger."""
+        if evento == "reset":
+            for c in self._contagem.values():
+                c.clear()
+            for g in item:
+                self._contar(g, 1)
+        elif evento == "carga":
+            for g in item:
+                self._contar(g, 1)
+        else:
+            self._contar(item, 1 if evento == "add" else -1)
+
+    def _contar(self, g, sinal):
+        for col, texto in zip(self.colunas[1:], valores_linha(0, g)[1:]):
+            cont = self._contagem[col]
+            w = self.medir(str(texto))
+            cont[w] += sinal
+            if cont[w] <= 0:
+                del cont[w]
+
+    def aplicar(self, total_linhas):
+        for col in self.colunas:
+            maxw = self.medir(self.tree.heading(col, "text"))  # inclui o indicador de ordenação
+            if col == "#":
+                maxw = max(maxw, self.medir(str(total_linhas)))
+            else:
+                maxw = max(maxw, max(self._contagem[col], default=0))
+            largura = max(60, maxw + 16)
+            if self._aplicadas.get(col) != largura:
+                self.tree.column(col, width=largura)
+                self._aplicadas[col] = largura
+
+class ViewVirtual:
+    """Mantém no Treeview só uma janela de linhas em torno da posição de rolagem.
+
+    `linhas` é a lista completa de (número, gasto) da view; a barra de rolagem
+    externa reflete a posição nela, e a janela é recriada ao chegar nas bordas.
+    O iid de cada item é o id do gasto, então a seleção sobrevive à recriação.
+    """
+
+    def __init__(self, tree, scrollbar, janela=JANELA_TREE):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.janela = janela
+        self.linhas = []
+        self.inicio = 0
+        self._ajustando = False
+        self._agendado = False
+        tree.configure(yscrollcommand=self._ao_rolar)
+        scrollbar.configure(command=self._rolar)
+
+    def definir(self, linhas):
+        self.linhas = linhas
+        self.tree.selection_remove(self.tree.selection())
+        self._materializar(0)
+
+    def _inicio_para(self, topo):
+        return max(0, min(topo - self.janela // 4, len(self.linhas) - self.janela))
+
+    def _materializar(self, topo):
+        """Recria os itens de forma que a linha global `topo` fique no alto da área visível."""
+        self._agendado = False
+        tree = self.tree
+        inicio = self._inicio_para(topo)
+        selecionados = set(tree.selection())
+        self._ajustando = True
+        try:
+            tree.delete(*tree.get_children())
+            fatia = self.linhas[inicio:inicio + self.janela]
+            for n, g in fatia:
+                tree.insert("", "end", iid=g["id"], values=valores_linha(n, g))
+            perf.contar("linhas_inseridas", len(fatia))
+            self.inicio = inicio
+            itens = tree.get_children()
+            manter = [i for i in itens if i in selecionados] if selecionados else []
+            if manter:
+                tree.selection_set(manter)
+            if itens:
+                tree.yview_moveto((topo - inicio) / len(itens))
+        finally:
+            self._ajustando = False
+        self._ao_rolar(*tree.yview())
+
+    def _ao_rolar(self, first, last):
+        first, last = float(first), float(last)
+        total = len(self.linhas)
+        n = len(self.tree.get_children())
+        if not total or not n:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set((self.inicio + first * n) / total, (self.inicio + last * n) / total)
+        if self._ajustando or self._agendado:
+            return
+        if (last >= 1.0 and self.inicio + n < total) or (first <= 0.0 and self.inicio > 0):
+            topo = self.inicio + int(first * n)
+            if self._inicio_para(topo) != self.inicio:
+                self._agendado = True
+                self.tree.after_idle(self._materializar, topo)
+
+    def _rolar(self, acao, *args):
+        n = len(self.tree.get_children())
+        if acao == "moveto" and self.linhas:
+            topo = int(float(args[0]) * len(self.linhas))
+            if n and self.inicio <= topo < self.inicio + n:
+                self.tree.yview_moveto((topo - self.inicio) / n)
+            else:
+                self._materializar(topo)
+        else:
+            self.tree.yview(acao, *args)
+
+# ---------- Gráfico de barras (canvas) ----------
+CORES_GRAFICO = ["#4e79a7","#f28e2b","#e15759","#76b7b2","#59a14f","#edc949","#af7aa1","#ff9da7"]
+ATRASO_REDESENHO = 40  # ms; eventos <Configure> dentro do intervalo viram um só redesenho
+
+class GraficoBarras:
+    """Barras horizontais por categoria no canvas do resumo.
+
+    `definir` recebe novos totais (ledger ou filtros mudaram) e reaproveita os
+    itens já criados, criando ou apagando só a diferença. Redimensionar o canvas
+    apenas reposiciona os itens existentes com `coords`, sem recalcular totais,
+    e os eventos são agrupados com after/after_cancel.
+    """
+
+    def __init__(self, canvas, padding=10):
+        self.canvas = canvas
+        self.padding = padding
+        self._dados = None
+        self._barras = []  # (retângulo, texto, proporção) na ordem de desenho
+        self._vazio = None
+        self._largura = None
+        self._agendado = None
+        canvas.bind("<Configure>", self.agendar)
+
+    def agendar(self, _evento=None):
+        if self._agendado is not None:
+            self.canvas.after_cancel(self._agendado)
+        self._agendado = self.canvas.after(ATRASO_REDESENHO, self._redimensionar)
+
+    def definir(self, dados_cat):
+        if dados_cat == self._dados:
+            return
+        self._dados = dict(dados_cat)
+        canvas = self.canvas
+        if not dados_cat:
+            for ret, txt, _ in self._barras:
+                canvas.delete(ret, txt)
+            self._barras = []
+            if self._vazio is None:
+                self._vazio = canvas.create_text(10,10, anchor="nw", text="(sem dados)", fill="#444")
+            return
+        if self._vazio is not None:
+            canvas.delete(self._vazio)
+            self._vazio = None
+        total = sum(dados_cat.values())
+        itens = sorted(dados_cat.items(), key=lambda x: x[1], reverse=True)
+        while len(self._barras) > len(itens):
+            ret, txt, _ = self._barras.pop()
+            canvas.delete(ret, txt)
+        barras = []
+        for i, (cat, val) in enumerate(itens):
+            if i < len(self._barras):
+                ret, txt, _ = self._barras[i]
+                canvas.itemconfigure(txt, text=f"{cat} R$ {val:.2f}")
+            else:
+                ret = canvas.create_rectangle(0, 0, 0, 0, fill=CORES_GRAFICO[i % len(CORES_GRAFICO)], outline="")
+                txt = canvas.create_text(0, 0, anchor="w", text=f"{cat} R$ {val:.2f}", fill="#222")
+            barras.append((ret, txt, val/total if total>0 else 0))
+        self._barras = barras
+        self._posicionar(self._largura_atual())
+
+    def _largura_atual(self):
+        return self.canvas.winfo_width() or 800
+
+    def _redimensionar(self):
+        self._agendado = None
+        largura = self._largura_atual()
+        if largura != self._largura:
+            self._posicionar(largura)
+
+    def _posicionar(self, largura):
+        self._largura = largura
+        padding = self.padding
+        max_bar = largura - 2*padding
+        y = padding
+        for ret, txt, propor in self._barras:
+            w = int(propor * max_bar)
+            self.canvas.coords(ret, padding, y, padding+w, y+24)
+            self.canvas.coords(txt, padding+w+8, y+12)
+            y += 30
+
+# ---------- GUI ----------
+root = tk.Tk()
+root.title("Gastos — Gerenciador")
+root.geometry("1000x640")
+root.minsize(900, 600)
+
+style = ttk.Style(root)
+style.theme_use("clam")
+
+# Frames
+frame_left = ttk.Frame(root, padding=10)
+frame_left.pack(side="left", fill="y")
+
+frame_right = ttk.Frame(root, padding=10)
+frame_right.pack(side="right", expand=True, fill="both")
+
+# --- Left: entrada e controles ---
+ttk.Label(frame_left, text="Orçamento Inicial (R$)").pack(anchor="w")
+salario_var = tk.StringVar()
+entry_salario = ttk.Entry(frame_left, textvariable=salario_var, width=18)
+entry_salario.pack(anchor="w", pady=4)
+def_def_sal = ttk.Button(frame_left, text="Definir/Atualizar", width=18)
+def_def_sal.pack(anchor="w", pady=4)
+
+ttk.Separator(frame_left, orient="horizontal").pack(fill="x", pady=8)
+
+ttk.Label(frame_left, text="Registrar Gasto").pack(anchor="w", pady=(2,0))
+entry_desc = ttk.Entry(frame_left, width=28)
+entry_desc.insert(0, "Descrição")
+entry_desc.bind("<FocusIn>", lambda e: entry_desc.delete(0, tk.END) if entry_desc.get()=="Descrição" else None)
+entry_desc.pack(anchor="w", pady=4)
+
+frame_val = ttk.Frame(frame_left)
+frame_val.pack(anchor="w")
+ttk.Label(frame_val, text="Valor R$").grid(row=0, column=0, padx=(0,6))
+entry_valor = ttk.Entry(frame_val, width=12)
+entry_valor.grid(row=0, column=1)
+
+ttk.Label(frame_val, text="Data").grid(row=1, column=0, padx=(0,6), pady=(6,0))
+entry_data = ttk.Entry(frame_val, width=12)
+entry_data.insert(0, datetime.now().strftime("%Y-%m-%d"))
+entry_data.grid(row=1, column=1, pady=(6,0))
+
+ttk.Label(frame_left, text="Categoria").pack(anchor="w", pady=(8,0))
+categoria_var = tk.StringVar()
+combo_categoria = ttk.Combobox(frame_left, textvariable=categoria_var, values=[], width=26)
+combo_categoria.pack(anchor="w", pady=4)
+combo_categoria.set("Geral")
+
+recorrente_var = tk.BooleanVar()
+ttk.Checkbutton(frame_left, text="Marcar como recorrente (mensal)", variable=recorrente_var).pack(anchor="w", pady=4)
+
+ttk.Button(frame_left, text="Registrar Gasto", command=lambda: app_add_gasto()).pack(anchor="w", pady=6)
+
+ttk.Separator(frame_left, orient="horizontal").pack(fill="x", pady=8)
+
+ttk.Label(frame_left, text="Orçamento por Categoria").pack(anchor="w")
+entry_cat_name = ttk.Entry(frame_left, width=20)
+entry_cat_name.pack(anchor="w", pady=4)
+entry_cat_value = ttk.Entry(frame_left, width=20)
+entry_cat_value.pack(anchor="w", pady=(0,6))
+ttk.Button(frame_left, text="Definir Orçamento Categoria", command=lambda: app_definir_orc_categoria()).pack(anchor="w")
+
+ttk.Separator(frame_left, orient="horizontal").pack(fill="x", pady=8)
+ttk.Button(frame_left, text="Aplicar Recorrentes", command=lambda: app_aplicar_recorrentes(True)).pack(fill="x", pady=4)
+ttk.Button(frame_left, text="Backup (salvar)", command=lambda: app_backup()).pack(fill="x", pady=4)
+ttk.Button(frame_left, text="Restaurar Backup", command=lambda: app_restaurar_backup()).pack(fill="x", pady=4)
+ttk.Button(frame_left, text="Importar JSON", command=lambda: app_importar()).pack(fill="x", pady=4)
+ttk.Button(frame_left, text="Importar CSV", command=lambda: app_importar_csv()).pack(fill="x", pady=4)
+ttk.Button(frame_left, text="Exportar", command=lambda: app_export_csv()).pack(fill="x", pady=4)
+ttk.Button(frame_left, text="Sair", command=lambda: app_sair()).pack(fill="x", pady=14)
+
+# --- Right: lista, filtros e resumo ---
+top_right = ttk.Frame(frame_right)
+top_right.pack(fill="x")
+
+ttk.Label(top_right, text="Filtros:").grid(row=0, column=0, sticky="w")
+mes_var = tk.StringVar()
+ano_var = tk.StringVar()
+combo_mes = ttk.Combobox(top_right, textvariable=mes_var, values=[""]+[str(i) for i in range(1,13)], width=6)
+combo_mes.grid(row=0, column=1, padx=6)
+combo_ano = ttk.Combobox(top_right, textvariable=ano_var, values=[""]+[str(y) for y in range(datetime.now().year-5, datetime.now().year+2)], width=8)
+combo_ano.grid(row=0, column=2, padx=6)
+if getattr(ledger.armazenamento, "particionado", False):
+    # só o ano corrente é lido ao abrir; limpar o filtro carrega os demais
+    mes_var.set(str(datetime.now().month))
+    ano_var.set(str(datetime.now().year))
+filtro_cat_var = tk.StringVar()
+combo_fil_cat = ttk.Combobox(top_right, textvariable=filtro_cat_var, values=[], width=16)
+combo_fil_cat.grid(row=0, column=3, padx=6)
+
+ttk.Label(top_right, text="Pesquisar").grid(row=0, column=4, padx=(12,2))
+search_var = tk.StringVar()
+entry_search = ttk.Entry(top_right, textvariable=search_var, width=20)
+entry_search.grid(row=0, column=5, padx=2)
+
+ttk.Button(top_right, text="Aplicar Filtro", command=lambda: app_refresh()).grid(row=0, column=6, padx=6)
+ttk.Button(top_right, text="Limpar Filtro", command=lambda: (mes_var.set(""), ano_var.set(""), filtro_cat_var.set(""), search_var.set(""), app_refresh())).grid(row=0, column=7)
+
+# Treeview de gastos
+cols = ("#","data","categoria","descricao","valor")
+frame_tree = ttk.Frame(frame_right)
+frame_tree.pack(expand=True, fill="both", pady=(8,6))
+tree = ttk.Treeview(frame_tree, columns=cols, show="headings", selectmode="extended")
+for c in cols:
+    tree.heading(c, text=c.capitalize())
+    tree.column(c, anchor="center")
+ordenacao = Ordenacao()  # vale também para os próximos app_refresh
+scroll_tree = ttk.Scrollbar(frame_tree, orient="vertical")
+scroll_tree.pack(side="right", fill="y")
+tree.pack(side="left", expand=True, fill="both")
+view = ViewVirtual(tree, scroll_tree)
+larguras = LargurasColunas(tree, cols)
+ledger.observadores.append(larguras.ao_mudar)
+
+frame_tree_btns = ttk.Frame(frame_right)
+frame_tree_btns.pack(fill="x")
+ttk.Button(frame_tree_btns, text="Excluir Selecionado", command=lambda: app_excluir_selecionado()).pack(side="left", padx=4)
+ttk.Button(frame_tree_btns, text="Ver Resumo", command=lambda: app_mostrar_resumo()).pack(side="left", padx=4)
+ttk.Button(frame_tree_btns, text="Editar Selecionado", command=lambda: app_editar_selecionado()).pack(side="left", padx=4)
+ttk.Button(frame_tree_btns, text="Desfazer (Ctrl+Z)", command=lambda: app_undo()).pack(side="left", padx=4)
+ttk.Button(frame_tree_btns, text="Refazer (Ctrl+Y)", command=lambda: app_redo()).pack(side="left", padx=4)
+ttk.Button(frame_tree_btns, text="Gráfico (Matplotlib)", command=lambda: mostrar_grafico_matplotlib()).pack(side="left", padx=4)
+ttk.Button(frame_tree_btns, text="Tendências", command=lambda: mostrar_tendencias()).pack(side="left", padx=4)
+
+# Resumo e gráfico simples
+frame_resumo = ttk.LabelFrame(frame_right, text="Resumo")
+frame_resumo.pack(fill="both", pady=8)
+
+label_resumo = ttk.Label(frame_resumo, text="", justify="left")
+label_resumo.pack(anchor="nw", padx=8, pady=6)
+
+canvas_chart = tk.Canvas(frame_resumo, height=140)
+canvas_chart.pack(fill="x", padx=8, pady=(0,8))
+grafico = GraficoBarras(canvas_chart)
+
+# ---------- UI Functions ----------
+def app_load():
+    app_aplicar_recorrentes(show_msg=False)  # aplicar automaticamente ao abrir (silencioso)
+    app_atualizar_campos()
+
+def app_atualizar_campos():
+    dados = ledger.obter()
+    salario_var.set(f"{dados.get('orcamento_inicial',0):.2f}" if dados.get('orcamento_inicial') else "")
+    cats = set(dados.get("orcamentos_categoria", {}).keys()) | ledger.categorias()
+    lista_cats = sorted([c for c in cats if c])
+    combo_categoria['values'] = lista_cats
+    combo_fil_cat['values'] = [""] + lista_cats
+    combo_categoria.set(combo_categoria.get() or "Geral")
+    app_refresh()
+
+def adjust_column_widths():
+    larguras.aplicar(len(view.linhas))
+
+def app_refresh():
+    mes = mes_var.get()
+    ano = ano_var.get()
+    catf = filtro_cat_var.get()
+    term = search_var.get().strip().lower()
+    inicio, fim = periodo_mes(mes, ano)
+    gastos_sorted = ledger.consultar(inicio, fim, catf, term)
+    view.definir(ordenacao.aplicar(list(enumerate(gastos_sorted,1))))
+    adjust_column_widths()
+    app_mostrar_resumo(update_only=True)
+
+def agendar_pesquisa(*_):
+    # pesquisa enquanto digita: só o último caractere dentro do intervalo dispara o refresh
+    global _pesquisa_agendada
+    if _pesquisa_agendada is not None:
+        root.after_cancel(_pesquisa_agendada)
+    _pesquisa_agendada = root.after(ATRASO_PESQUISA, _pesquisar_agora)
+
+def _pesquisar_agora():
+    global _pesquisa_agendada
+    _pesquisa_agendada = None
+    app_refresh()
+
+def app_add_gasto():
+    desc = entry_desc.get().strip()
+    if not desc:
+        messagebox.showerror("Erro", "Descrição obrigatória.")
+        return
+    valor = safe_float(entry_valor.get())
+    if valor is None:
+        messagebox.showerror("Erro", "Valor inválido.")
+        return
+    data_raw = entry_data.get().strip()
+    data = parse_date_to_iso(data_raw) or None
+    if not data:
+        messagebox.showerror("Erro", "Data inválida. Use YYYY-MM-DD ou DD/MM/YYYY.")
+        return
+    categoria = categoria_var.get().strip() or "Geral"
+    recorrente = recorrente_var.get()
+    gasto = {"id": str(uuid.uuid4()), "descricao": desc, "valor": round(valor,2), "data": data, "categoria": categoria}
+    with ledger.transacao("Registrar gasto"):
+        ledger.adicionar_gasto(gasto)
+        if recorrente:
+            rec = {"descricao": desc, "valor": round(valor,2), "dia": int(data.split("-")[2]), "categoria": categoria, "ultima_geracao": data}
+            ledger.adicionar_recorrente(rec)
+    ledger.salvar()
+    entry_desc.delete(0, tk.END)
+    entry_valor.delete(0, tk.END)
+    recorrente_var.set(False)
+    app_refresh()
+    checar_alerta_categoria(categoria)
+    messagebox.showinfo("Sucesso", "Gasto registrado.")
+
+def app_excluir_selecionado():
+    sel = tree.selection()
+    if not sel:
+        messagebox.showwarning("Excluir", "Selecione um gasto.")
+        return
+    removidos = ledger.remover_gastos(sel)
+    if not removidos:
+        messagebox.showerror("Erro", "Não foi possível excluir o gasto selecionado.")
+        return
+    ledger.salvar()
+    app_refresh()
+    if len(removidos) == 1:
+        messagebox.showinfo("Excluir", f"Gasto '{removidos[0][1]['descricao']}' excluído.")
+    else:
+        messagebox.showinfo("Excluir", f"{len(removidos)} gastos excluídos.")
+
+def app_undo():
+    descricao = ledger.desfazer()
+    if descricao is None:
+        messagebox.showinfo("Desfazer", "Nada para desfazer.")
+        return
+    ledger.salvar()
+    app_atualizar_campos()
+    messagebox.showinfo("Desfazer", f"Desfeito: {descricao}")
+
+def app_redo():
+    descricao = ledger.refazer()
+    if descricao is None:
+        messagebox.showinfo("Refazer", "Nada para refazer.")
+        return
+    ledger.salvar()
+    app_atualizar_campos()
+    messagebox.showinfo("Refazer", f"Refeito: {descricao}")
+
+def app_definir_orc_categoria():
+    nome = entry_cat_name.get().strip()
+    val = safe_float(entry_cat_value.get())
+    if not nome or val is None:
+        messagebox.showerror("Erro", "Categoria ou valor inválido.")
+        return
+    ledger.definir_orcamento_categoria(nome, round(val,2))
+    ledger.salvar()
+    app_load()
+    messagebox.showinfo("OK", f"Orçamento para '{nome}' salvo.")
+
+def app_set_salario():
+    val = safe_float(salario_var.get())
+    if val is None:
+        messagebox.showerror("Erro", "Salário inválido.")
+        return
+    ledger.definir_orcamento_inicial(round(val,2))
+    ledger.salvar()
+    app_refresh()
+    messagebox.showinfo("OK", "Orçamento inicial atualizado.")
+
+def app_backup():
+    destino = backups.fazer()
+    messagebox.showinfo("Backup", f"Backup salvo em:\n{destino}")
+
+def app_restaurar_backup():
+    path = filedialog.askopenfilename(title="Restaurar backup", initialdir=backups.dir_manifestos, filetypes=[("Manifesto","*.json")])
+    if not path:
+        return
+    if not messagebox.askyesno("Restaurar", "Substituir os dados atuais pelo backup selecionado?"):
+        return
+    try:
+        backups.restaurar(path)
+    except (OSError, ValueError, KeyError) as e:
+        messagebox.showerror("Restaurar", f"Backup inválido: {e}")
+        return
+    app_load()
+    messagebox.showinfo("Restaurar", "Backup restaurado.")
+
+def app_importar():
+    path = filedialog.askopenfilename(title="Importar JSON", filetypes=[("JSON","*.json"),("All","*.*")])
+    if not path:
+        return
+    mesclar = messagebox.askyesnocancel("Importar", "Mesclar com os dados atuais?\n\n"
+                                       "Sim: acrescenta só os gastos, recorrentes e orçamentos que faltam.\n"
+                                       "Não: substitui todos os dados pelo conteúdo do arquivo.")
+    if mesclar is None:
+        return
+    try:
+        r = importacao.importar_json(ledger, path, mesclar=mesclar)
+    except FileNotFoundError:
+        messagebox.showerror("Importar", "Arquivo não encontrado.")
+        return
+    except ValueError as e:
+        messagebox.showerror("Importar", f"Arquivo inválido: {e}")
+        return
+    messagebox.showinfo("Importar", "Dados importados com sucesso." if r is None else importacao.texto_resultado(r))
+    app_atualizar_campos()
+
+def app_export_csv():
+    path = filedialog.asksaveasfilename(defaultextension=".csv", initialfile="gastos_export.csv",
+                                        filetypes=[("CSV","*.csv"),("JSON Lines","*.jsonl"),("CSV gzip","*.csv.gz"),("JSON Lines gzip","*.jsonl.gz")])
+    if not path:
+        return
+    por_mes = messagebox.askyesno("Exportar", "Gravar um arquivo por mês?")
+    inicio, fim = periodo_mes(mes_var.get(), ano_var.get())
+    n, arquivos = exportacao.exportar(ledger, path, por_mes=por_mes, inicio=inicio, fim=fim,
+                                      categoria=filtro_cat_var.get(), termo=search_var.get().strip())
+    if n == 0:
+        # por mês, nada é gravado; num arquivo só, ele fica apenas com o cabeçalho
+        messagebox.showinfo("Exportar", "Nenhum gasto para exportar" + (f" (arquivo vazio em {path})" if arquivos else ""))
+        return
+    destino = f"{len(arquivos)} arquivos ({arquivos[0]}, ...)" if len(arquivos) > 1 else path
+    messagebox.showinfo("Exportar", f"{n} gastos exportados para {destino}")
+
+def app_mostrar_resumo(update_only=False):
+    mes = mes_var.get(); ano = ano_var.get()
+    inicio, fim = periodo_mes(mes, ano)
+    r = resumo.resumo_periodo(ledger, inicio, fim)
+    label_resumo.config(text=resumo.texto_resumo(r))
+    grafico.definir(r["por_categoria"])
+
+def checar_alerta_categoria(categoria):
+    estouro = resumo.verificar_orcamento_categoria(ledger, categoria)
+    if estouro:
+        gasto_cat, limite = estouro
+        messagebox.showwarning("Alerta Orçamento", f"Categoria '{categoria}' estourou o orçamento:\n{gasto_cat:.2f} > {limite:.2f}")
+
+# ---------- Importar / exportar ----------
+def app_importar_csv(path=None):
+    path = path or filedialog.askopenfilename(title="Importar CSV", filetypes=[("CSV","*.csv"),("All","*.*")])
+    if not path:
+        return
+    imp = importacao.ImportacaoCSV(path)
+    janela = tk.Toplevel(root)
+    janela.title("Importar CSV")
+    janela.transient(root)
+    janela.resizable(False, False)
+    status = ttk.Label(janela, text="Lendo arquivo...", width=48)
+    status.pack(padx=12, pady=(12,6))
+    barra = ttk.Progressbar(janela, length=320, maximum=100)
+    barra.pack(padx=12, pady=6)
+    ttk.Button(janela, text="Cancelar", command=imp.cancelar).pack(pady=(6,12))
+    janela.protocol("WM_DELETE_WINDOW", imp.cancelar)
+    janela.grab_set()
+    ledger.iniciar_transacao("Importar CSV")  # a importação inteira é um só passo de desfazer
+    imp.iniciar()
+    root.after(50, _acompanhar_importacao, imp, janela, status, barra, importacao.Mesclagem(ledger, conferir_ids=False))
+
+def _acompanhar_importacao(imp, janela, status, barra, mescla):
+    fim = erro = None
+    try:
+        while True:
+            tipo, item = imp.fila.get_nowait()
+            if tipo == "lote":
+                ledger.adicionar_gastos(mescla.filtrar(item))  # linhas já lançadas são ignoradas
+                if getattr(ledger.armazenamento, "incremental", False):
+                    ledger.salvar()  # journal/sqlite: cada lote já fica gravado
+            else:
+                fim, erro = tipo, item
+                break
+    except queue.Empty:
+        pass
+    except Exception as e:
+        # falha ao aplicar um lote: parar a leitura; a transação é fechada abaixo como no fim normal
+        imp.cancelar()
+        fim, erro = "erro", f"Falha ao aplicar a importação: {e}"
+    if fim is None and not (imp.cancelado.is_set() and not imp.thread.is_alive()):
+        barra["value"] = imp.progresso * 100
+        status.config(text=f"{imp.linhas_lidas} linhas lidas, {mescla.adicionados} importadas, "
+                           f"{mescla.ignorados} já existentes, {imp.rejeitados} rejeitadas")
+        root.after(50, _acompanhar_importacao, imp, janela, status, barra, mescla)
+        return
+    try:
+        ledger.concluir_transacao()
+        ledger.salvar()
+    except Exception as e:
+        erro = erro or f"Falha ao gravar a importação: {e}"
+    finally:
+        janela.destroy()
+    if erro:
+        messagebox.showerror("Importar CSV", erro)
+    else:
+        msg = importacao.texto_resultado(dict(mescla.resultado(), rejeitados=imp.rejeitados))
+        if imp.aviso():
+            msg += "\n\n" + imp.aviso()
+        if imp.cancelado.is_set():
+            msg = "Importação cancelada.\n" + msg
+        messagebox.showinfo("Importar CSV", msg)
+    app_load()
+
+# ---------- Recorrentes ----------
+def app_aplicar_recorrentes(show_msg=True, meses=None):
+    aplicados = recorrentes.aplicar_recorrentes(ledger, meses)
+    if aplicados is None:
+        if show_msg:
+            messagebox.showinfo("Recorrentes", "Nenhuma despesa recorrente cadastrada.")
+        return
+    if aplicados:
+        app_refresh()
+    if show_msg:
+        messagebox.showinfo("Recorrentes", f"Recorrentes aplicados: {aplicados}")
+
+# ---------- Edit ----------
+def app_editar_selecionado():
+    sel = tree.selection()
+    if not sel:
+        messagebox.showwarning("Editar", "Selecione um gasto.")
+        return
+    gastos = [g for g in (ledger.obter_gasto(iid) for iid in sel) if g is not None]
+    if not gastos:
+        messagebox.showerror("Erro", "Item não encontrado.")
+        return
+    campos = _pedir_edicao(gastos[0]) if len(gastos) == 1 else _pedir_edicao_em_lote(len(gastos))
+    if not campos:
+        return
+    with ledger.transacao("Editar gasto" if len(gastos) == 1 else f"Editar {len(gastos)} gastos"):
+        for g in gastos:
+            ledger.atualizar_gasto(g["id"], **campos)
+    ledger.salvar()
+    app_refresh()
+    messagebox.showinfo("OK", "Gasto atualizado." if len(gastos) == 1 else f"{len(gastos)} gastos atualizados.")
+
+def _pedir_edicao(gasto):
+    novo_desc = simpledialog.askstring("Editar", "Descrição:", initialvalue=gasto["descricao"])
+    if novo_desc is None:
+        return None
+    novo_val = simpledialog.askstring("Editar", "Valor (R$):", initialvalue=f"{gasto['valor']:.2f}")
+    if novo_val is None:
+        return None
+    nv = safe_float(novo_val)
+    if nv is None:
+        messagebox.showerror("Erro", "Valor inválido.")
+        return None
+    nova_data_raw = simpledialog.askstring("Editar", "Data (YYYY-MM-DD ou DD/MM/YYYY):", initialvalue=gasto["data"])
+    if nova_data_raw is None:
+        return None
+    nova_data = parse_date_to_iso(nova_data_raw)
+    if not nova_data:
+        messagebox.showerror("Erro", "Data inválida.")
+        return None
+    return {"descricao": novo_desc, "valor": round(nv,2), "data": nova_data}
+
+def _pedir_edicao_em_lote(n):
+    """Campos deixados vazios são mantidos em cada gasto."""
+    campos = {}
+    novo_desc = simpledialog.askstring("Editar", f"Descrição para {n} gastos (vazio mantém):")
+    if novo_desc is None:
+        return None
+    if novo_desc.strip():
+        campos["descricao"] = novo_desc.strip()
+    novo_val = simpledialog.askstring("Editar", "Valor (R$) (vazio mantém):")
+    if novo_val is None:
+        return None
+    if novo_val.strip():
+        nv = safe_float(novo_val)
+        if nv is None:
+            messagebox.showerror("Erro", "Valor inválido.")
+            return None
+        campos["valor"] = round(nv,2)
+    nova_data_raw = simpledialog.askstring("Editar", "Data (YYYY-MM-DD ou DD/MM/YYYY) (vazio mantém):")
+    if nova_data_raw is None:
+        return None
+    if nova_data_raw.strip():
+        nova_data = parse_date_to_iso(nova_data_raw)
+        if not nova_data:
+            messagebox.showerror("Erro", "Data inválida.")
+            return None
+        campos["data"] = nova_data
+    return campos
+
+# ---------- Ordenação ----------
+def sort_treeview(col, acumular=False):
+    # clique: ordena por `col` (de novo, inverte); Shift+clique: acrescenta `col` como desempate
+    ordenacao.clicar(col, acumular)
+    view.definir(ordenacao.aplicar())
+    for c in cols:
+        tree.heading(c, text=f"{c.capitalize()} {ordenacao.indicador(c)}".rstrip())
+    adjust_column_widths()
+
+def _clique_cabecalho(event, acumular):
+    if tree.identify_region(event.x, event.y) != "heading":
+        return None
+    col = tree.identify_column(event.x)  # "#1", "#2", ...
+    sort_treeview(cols[int(col[1:]) - 1], acumular)
+    return "break"
+
+tree.bind("<Button-1>", lambda e: _clique_cabecalho(e, False))
+tree.bind("<Shift-Button-1>", lambda e: _clique_cabecalho(e, True))
+
+# ---------- Tendências ----------
+def mostrar_tendencias():
+    rel = analise.relatorio_tendencias(ledger)
+    if not rel["meses"]:
+        messagebox.showinfo("Tendências", "Sem dados para mostrar.")
+        return
+    orc = analise.texto_orcamento(analise.relatorio_orcamento(ledger))
+    janela = tk.Toplevel(root)
+    janela.title("Tendências mensais")
+    cat_var = tk.StringVar(value=analise.TOTAL)
+    combo = ttk.Combobox(janela, textvariable=cat_var, values=list(rel["categorias"]), state="readonly", width=24)
+    combo.pack(anchor="w", padx=8, pady=6)
+    texto = tk.Text(janela, width=100, height=30, font="TkFixedFont")
+    texto.pack(expand=True, fill="both", padx=8, pady=(0,8))
+    def exibir(*_):
+        texto.config(state="normal")
+        texto.delete("1.0", tk.END)
+        texto.insert("1.0", analise.texto_tendencias(rel, cat_var.get()) + "\n" + orc)
+        texto.config(state="disabled")
+    combo.bind("<<ComboboxSelected>>", exibir)
+    exibir()
+
+# ---------- Matplotlib gráfico modal ----------
+def mostrar_grafico_matplotlib():
+    try:
+        import matplotlib.pyplot as plt
+    except Exception:
+        messagebox.showerror("Matplotlib", "Matplotlib não instalado. Instale com: pip install matplotlib")
+        return
+    mes = mes_var.get(); ano = ano_var.get()
+    inicio, fim = periodo_mes(mes, ano)
+    por_cat = ledger.totais_por_categoria(inicio, fim)
+    if not por_cat:
+        messagebox.showinfo("Gráfico", "Sem dados para mostrar.")
+        return
+    labels = list(por_cat.keys())
+    sizes = list(por_cat.values())
+    fig, ax = plt.subplots()
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')
+    title = "Gastos por categoria"
+    if mes and ano:
+        title += f" - {mes}/{ano}"
+    plt.title(title)
+    plt.show()
+
+def app_sair():
+    try:
+        # grava pendências, esvazia a gravação em segundo plano e só então fecha histórico e armazenamento
+        ledger.fechar()
+    except Exception as e:
+        # nada foi fechado: recusando, o app continua como estava
+        if not messagebox.askyesno("Erro ao salvar", f"Não foi possível gravar as últimas alterações:\n{e}\n\nSair mesmo assim?"):
+            return
+        ledger.fechar(descartar=True)
+    if auto_backup:
+        auto_backup.fechar()
+    root.destroy()
+
+# ---------- Desempenho (GASTOS_PERF=1 ou menu) ----------
+medidor = perf.medidor
+ATUALIZACAO_PAINEL = 500  # ms
+
+# handlers e partes caras: envolvidos sempre; com o medidor desligado só custam um teste de flag
+for _nome, _func in list(globals().items()):
+    if callable(_func) and (_nome.startswith("app_") or _nome in ("sort_treeview", "mostrar_tendencias", "mostrar_grafico_matplotlib")):
+        globals()[_nome] = medidor.envolver(_nome, _func)
+medidor.instrumentar(ledger, ["consultar", "salvar"], "ledger")
+medidor.instrumentar(ledger.armazenamento, [m for m in ("carregar", "gravar", "carregar_anos") if hasattr(ledger.armazenamento, m)],
+                     "armazenamento", {"carregar": "carregamentos", "carregar_anos": "carregamentos"})
+medidor.instrumentar(view, ["_materializar"], "view")
+medidor.instrumentar(larguras, ["aplicar"], "larguras")
+medidor.instrumentar(grafico, ["definir", "_posicionar"], "grafico")
+
+status_perf = ttk.Label(root, text="", anchor="w", padding=(8,2), relief="sunken")
+perf_var = tk.BooleanVar(value=medidor.ativo)
+
+def _texto_contadores(contadores):
+    return "  ".join(f"{k}={v}" for k, v in sorted(contadores.items()))
+
+def ao_medir_acao(nome, dt, contadores):
+    status_perf.config(text=f"{nome}: {dt*1000:.1f} ms (p95 {medidor.p95(nome)*1000:.1f} ms)  {_texto_contadores(contadores)}")
+
+def alternar_perf():
+    medidor.ativo = perf_var.get()
+    if medidor.ativo:
+        status_perf.pack(side="bottom", fill="x", before=frame_left)
+    else:
+        status_perf.pack_forget()
+
+def mostrar_painel_perf():
+    janela = tk.Toplevel(root)
+    janela.title("Desempenho")
+    janela.geometry("760x360")
+    colunas = ("operacao", "chamadas", "ultimo", "p95", "contadores")
+    tv = ttk.Treeview(janela, columns=colunas, show="headings")
+    for c, titulo, largura in zip(colunas, ("Operação", "Chamadas", "Último (ms)", "p95 (ms)", "Contadores (última)"), (200, 70, 90, 90, 290)):
+        tv.heading(c, text=titulo)
+        tv.column(c, width=largura, anchor="w" if c in ("operacao", "contadores") else "e")
+    tv.pack(expand=True, fill="both", padx=8, pady=8)
+    botoes = ttk.Frame(janela)
+    botoes.pack(fill="x", padx=8, pady=(0,8))
+    ttk.Button(botoes, text="Zerar", command=medidor.limpar).pack(side="left")
+    ttk.Button(botoes, text="Perfilar próximas ações...", command=app_perfilar).pack(side="left", padx=6)
+    def atualizar():
+        if not janela.winfo_exists():
+            return
+        tv.delete(*tv.get_children())
+        for l in medidor.resumo():
+            tv.insert("", "end", values=(l["operacao"], l["chamadas"], f"{l['ultimo_ms']:.2f}", f"{l['p95_ms']:.2f}", _texto_contadores(l["contadores"])))
+        janela.after(ATUALIZACAO_PAINEL, atualizar)
+    atualizar()
+
+def app_perfilar():
+    n = simpledialog.askinteger("Perfil", "Capturar com cProfile quantas ações?", initialvalue=20, minvalue=1, parent=root)
+    if not n:
+        return
+    destino = filedialog.asksaveasfilename(defaultextension=".prof", filetypes=[("pstats","*.prof")], initialfile="gastos.prof")
+    if not destino:
+        return
+    if not medidor.ativo:
+        perf_var.set(True)
+        alternar_perf()
+    medidor.perfilar(n, destino)
+    status_perf.config(text=f"Perfilando as próximas {n} ações...")
+
+medidor.ao_medir.append(ao_medir_acao)
+medidor.ao_perfil.append(lambda destino: root.after_idle(messagebox.showinfo, "Perfil", f"Perfil gravado em:\n{destino}\n(resumo em {destino}.txt)"))
+
+menubar = tk.Menu(root)
+menu_perf = tk.Menu(menubar, tearoff=0)
+menu_perf.add_checkbutton(label="Instrumentação ativa", variable=perf_var, command=alternar_perf)
+menu_perf.add_command(label="Painel de desempenho", command=mostrar_painel_perf)
+menu_perf.add_command(label="Perfilar próximas ações...", command=app_perfilar)
+menubar.add_cascade(label="Desempenho", menu=menu_perf)
+root.config(menu=menubar)
+alternar_perf()
+
+# ---------- Shortcuts / Binds ----------
+def on_key(event):
+    if (event.state & 0x4) and event.keysym.lower() == 'z':  # Ctrl+Z
+        app_undo()
+    elif (event.state & 0x4) and event.keysym.lower() == 'y':  # Ctrl+Y
+        app_redo()
+
+root.bind_all("<Key>", on_key)
+search_var.trace_add("write", agendar_pesquisa)
+root.protocol("WM_DELETE_WINDOW", app_sair)
+
+# Bind buttons
+def_def_sal.config(command=app_set_salario)
+
+# ---------- Threads de fundo ----------
+# só a thread do Tk pode chamar o Tcl: avisos da gravação e do backup chegam por esta fila,
+# e as medições da gravação em segundo plano pelo medidor
+avisos = queue.Queue()
+INTERVALO_FUNDO = 200  # ms entre leituras da fila
+
+def acompanhar_fundo():
+    medidor.descarregar()
+    try:
+        while True:
+            mostrar, titulo, msg = avisos.get_nowait()
+            mostrar(titulo, msg)
+    except queue.Empty:
+        pass
+    root.after(INTERVALO_FUNDO, acompanhar_fundo)
+
+# Gravação fora da thread do Tk
+gravacao = persistencia.GravacaoEmSegundoPlano(ledger, ao_erro=lambda msg: avisos.put((messagebox.showerror, "Erro ao salvar", msg)))
+
+# Backup automático (GASTOS_BACKUP_A_CADA alterações)
+auto_backup = backup.BackupAutomatico(backups, backup.BACKUP_A_CADA, ao_erro=lambda msg: avisos.put((messagebox.showwarning, "Backup", msg))) if backup.BACKUP_A_CADA > 0 else None
+
+# ---------- Outras instâncias ----------
+INTERVALO_VIGIA = 1000  # ms entre verificações (stat) do arquivo de dados
+
+def vigiar_arquivo():
+    # só relê e redesenha quando outro processo gravou; as gravações desta janela não contam
+    if ledger.atualizar_do_disco():
+        app_atualizar_campos()
+    root.after(INTERVALO_VIGIA, vigiar_arquivo)
+
+# Inicialização
+root.after(200, app_load)
+root.after(200 + INTERVALO_VIGIA, vigiar_arquivo)
+root.after(INTERVALO_FUNDO, acompanhar_fundo)
+root.mainloop()
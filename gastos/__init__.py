@@ -0,0 +1,16 @@
+"""Núcleo do controle de gastos, sem dependência de interface gráfica.
+
+Usado pela GUI Tkinter (`gastos.app.py`) e pela linha de comando
+(`python -m gastos`).
+"""
+from .helpers import FORMATOS_DATA, centavos, parse_date_to_iso, periodo_mes, safe_float
+from .armazenamento import (ARQUIVO_GASTOS, BACKUP_DIR, MODO_ARMAZENAMENTO, carregar_gastos, salvar_gastos,
+                            criar_armazenamento, migrar_json_para_sqlite)
+from .registro import Gasto
+from .ledger import Ledger
+from .importacao import ImportacaoCSV, importar_csv, importar_json
+from .exportacao import exportar, exportar_csv
+from .recorrentes import aplicar_recorrentes, gerar_recorrentes
+from .resumo import resumo_periodo, texto_resumo, verificar_orcamento_categoria
+from .backup import Backups, BackupAutomatico, fazer_backup
+from .analise import relatorio_orcamento, relatorio_tendencias
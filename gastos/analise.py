@@ -0,0 +1,167 @@
+"""Relatórios de vários meses: tendências por categoria e orçamento x realizado.
+
+Os totais mensais em centavos que o ledger já mantém viram uma matriz
+categoria x mês (meses contíguos, sem lacunas). Com NumPy as reduções são
+feitas sobre a matriz inteira de uma vez; sem NumPy, o mesmo cálculo roda em
+Python puro. Os resultados são sempre listas simples, em reais, com None onde
+o valor não está definido (variação sobre zero, janela incompleta).
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TOTAL = "Total"  # linha que soma todas as categorias
+JANELAS_MEDIA = (3, 12)
+
+def _indice_mes(mes):
+    return int(mes[:4]) * 12 + int(mes[5:7]) - 1
+
+def _nome_mes(indice):
+    return f"{indice // 12:04d}-{indice % 12 + 1:02d}"
+
+def _meses(totais, inicio=None, fim=None):
+    usados = [m for m in totais if (not inicio or m >= inicio) and (not fim or m <= fim)]
+    if not usados and not (inicio and fim):
+        return []
+    primeiro = _indice_mes(inicio or min(usados))
+    ultimo = _indice_mes(fim or max(usados))
+    return [_nome_mes(i) for i in range(primeiro, ultimo + 1)]
+
+def matriz_mensal(ledger, inicio=None, fim=None):
+    """(meses, categorias, linhas): linhas[c][m] em centavos; a primeira linha é TOTAL."""
+    totais = ledger.totais_mensais()
+    meses = _meses(totais, inicio, fim)
+    pos = {m: j for j, m in enumerate(meses)}
+    categorias = sorted({cat for m in meses for cat in totais.get(m, {})})
+    linha_de = {cat: i + 1 for i, cat in enumerate(categorias)}
+    if np is not None:
+        linhas = np.zeros((len(categorias) + 1, len(meses)), dtype=np.int64)
+        for m, por_cat in totais.items():
+            if m in pos:
+                for cat, v in por_cat.items():
+                    linhas[linha_de[cat], pos[m]] = v
+        linhas[0] = linhas[1:].sum(axis=0)
+    else:
+        linhas = [[0] * len(meses) for _ in range(len(categorias) + 1)]
+        for m, por_cat in totais.items():
+            if m in pos:
+                j = pos[m]
+                for cat, v in por_cat.items():
+                    linhas[linha_de[cat]][j] = v
+                    linhas[0][j] += v
+    return meses, [TOTAL] + categorias, linhas
+
+# ---------- reduções (NumPy) ----------
+def _np_variacao(linhas, passo):
+    out = np.full(linhas.shape, np.nan)
+    if linhas.shape[1] > passo:
+        ant = linhas[:, :-passo].astype(float)
+        atual = linhas[:, passo:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:, passo:] = np.where(ant != 0, (atual - ant) / ant * 100, np.nan)
+    return out
+
+def _np_media_movel(linhas, janela):
+    out = np.full(linhas.shape, np.nan)
+    if linhas.shape[1] >= janela:
+        acum = np.concatenate([np.zeros((linhas.shape[0], 1), dtype=np.int64), linhas.cumsum(axis=1)], axis=1)
+        out[:, janela - 1:] = (acum[:, janela:] - acum[:, :-janela]) / janela
+    return out
+
+def _np_lista(arr, escala=1):
+    return [[None if v != v else round(v / escala, 2) for v in linha] for linha in arr.tolist()]
+
+# ---------- reduções (Python puro) ----------
+def _py_variacao(linhas, passo):
+    return [[None if j < passo or not linha[j - passo] else (linha[j] - linha[j - passo]) / linha[j - passo] * 100
+             for j in range(len(linha))] for linha in linhas]
+
+def _py_media_movel(linhas, janela):
+    saida = []
+    for linha in linhas:
+        acum, out = 0, []
+        for j, v in enumerate(linha):
+            acum += v
+            if j >= janela:
+                acum -= linha[j - janela]
+            out.append(acum / janela if j >= janela - 1 else None)
+        saida.append(out)
+    return saida
+
+def _py_lista(linhas, escala=1):
+    return [[None if v is None else round(v / escala, 2) for v in linha] for linha in linhas]
+
+def relatorio_tendencias(ledger, inicio=None, fim=None, janelas=JANELAS_MEDIA):
+    """Por categoria (e TOTAL): gasto mensal, variação % mês a mês e ano a ano, e médias móveis.
+
+    `inicio`/`fim` são meses "YYYY-MM". Retorna {"meses": [...], "categorias": {cat: {
+    "total", "mom", "yoy", "media_3", "media_12"}}}, cada um uma lista alinhada a "meses".
+    """
+    # meses anteriores a `inicio` entram no cálculo para o ano a ano e as médias já valerem no primeiro mês
+    recuo = max(12, max(janelas) - 1) if inicio else 0
+    meses, categorias, linhas = matriz_mensal(ledger, _nome_mes(_indice_mes(inicio) - recuo) if inicio else None, fim)
+    if np is not None:
+        series = {"total": _np_lista(linhas, 100), "mom": _np_lista(_np_variacao(linhas, 1)), "yoy": _np_lista(_np_variacao(linhas, 12))}
+        for k in janelas:
+            series[f"media_{k}"] = _np_lista(_np_media_movel(linhas, k), 100)
+    else:
+        series = {"total": _py_lista(linhas, 100), "mom": _py_lista(_py_variacao(linhas, 1)), "yoy": _py_lista(_py_variacao(linhas, 12))}
+        for k in janelas:
+            series[f"media_{k}"] = _py_lista(_py_media_movel(linhas, k), 100)
+    return {"meses": meses[recuo:], "categorias": {cat: {nome: s[i][recuo:] for nome, s in series.items()} for i, cat in enumerate(categorias)}}
+
+def _reais(centavos):
+    return [v / 100 for v in centavos]
+
+def relatorio_orcamento(ledger, inicio=None, fim=None):
+    """Orçamento x realizado por mês: o orçamento inicial contra o total e cada limite de categoria contra o gasto.
+
+    Retorna {"meses", "orcamento", "gasto", "saldo", "categorias": {cat: {"limite", "gasto", "saldo"}}}.
+    """
+    dados = ledger.obter()
+    orc = round(dados.get("orcamento_inicial", 0.0) * 100)
+    limites = dados.get("orcamentos_categoria", {})
+    meses, categorias, linhas = matriz_mensal(ledger, inicio, fim)
+    pos = {cat: i for i, cat in enumerate(categorias)}
+    cats = sorted(limites)
+    if np is not None:
+        zeros = np.zeros(len(meses), dtype=np.int64)
+        gastos = np.array([linhas[pos[c]] if c in pos else zeros for c in cats], dtype=np.int64).reshape(len(cats), len(meses))
+        lim = np.array([round(limites[c] * 100) for c in cats], dtype=np.int64).reshape(-1, 1)
+        saldo_cat = lim - gastos
+        total, saldo = linhas[0].tolist(), (orc - linhas[0]).tolist()
+        gastos, saldo_cat = gastos.tolist(), saldo_cat.tolist()
+    else:
+        gastos = [list(linhas[pos[c]]) if c in pos else [0] * len(meses) for c in cats]
+        saldo_cat = [[round(limites[c] * 100) - v for v in linha] for c, linha in zip(cats, gastos)]
+        total, saldo = list(linhas[0]), [orc - v for v in linhas[0]]
+    return {"meses": meses, "orcamento": orc / 100, "gasto": _reais(total), "saldo": _reais(saldo),
+            "categorias": {c: {"limite": limites[c], "gasto": _reais(g), "saldo": _reais(s)} for c, g, s in zip(cats, gastos, saldo_cat)}}
+
+def _fmt(v, sufixo=""):
+    return "-" if v is None else f"{v:.2f}{sufixo}"
+
+def texto_tendencias(rel, categoria=TOTAL):
+    """Tabela em texto de uma categoria do relatorio_tendencias."""
+    serie = rel["categorias"].get(categoria)
+    if not serie:
+        return f"Sem gastos para '{categoria}' no período.\n"
+    medias = sorted((k for k in serie if k.startswith("media_")), key=lambda k: int(k[6:]))
+    cab = ["Mês", "Total", "Mês a mês", "Ano a ano"] + [f"Média {k[6:]}m" for k in medias]
+    texto = "  ".join(f"{c:>12}" for c in cab) + "\n"
+    for j, mes in enumerate(rel["meses"]):
+        cols = [mes, _fmt(serie["total"][j]), _fmt(serie["mom"][j], "%"), _fmt(serie["yoy"][j], "%")] + [_fmt(serie[k][j]) for k in medias]
+        texto += "  ".join(f"{c:>12}" for c in cols) + "\n"
+    return texto
+
+def texto_orcamento(rel):
+    texto = f"Orçamento mensal: R$ {rel['orcamento']:.2f}\n"
+    texto += f"{'Mês':>8}  {'Gasto':>12}  {'Saldo':>12}\n"
+    for j, mes in enumerate(rel["meses"]):
+        texto += f"{mes:>8}  {rel['gasto'][j]:>12.2f}  {rel['saldo'][j]:>12.2f}\n"
+    for cat, r in rel["categorias"].items():
+        estouros = [m for m, s in zip(rel["meses"], r["saldo"]) if s < 0]
+        texto += f"\n{cat} (limite R$ {r['limite']:.2f}): {len(estouros)} mês(es) acima do limite"
+        texto += (": " + ", ".join(estouros) + "\n") if estouros else "\n"
+    return texto
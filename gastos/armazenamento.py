@@ -0,0 +1,686 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from . import perf
+from .helpers import centavos
+from .registro import Gasto, chave_id, para_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+ARQUIVO_GASTOS = "gastos_pessoais.json"
+BACKUP_DIR = "backups"
+MODO_ARMAZENAMENTO = os.environ.get("GASTOS_ARMAZENAMENTO", "json")  # "json", "journal", "sqlite" ou "particionado"
+LIMITE_JOURNAL = 1024 * 1024  # bytes; acima disso o journal é compactado em segundo plano
+
+log = logging.getLogger("gastos")
+
+# ---------- Arquivo: carregar / salvar (atômico e resiliência) ----------
+def dados_vazios():
+    return {"gastos": [], "orcamento_inicial": 0.0, "orcamentos_categoria": {}, "recorrentes": []}
+
+def carregar_gastos(caminho=None, avisar=None):
+    """Lê o JSON de dados. Um arquivo corrompido vai para BACKUP_DIR e `avisar(msg)` é chamado."""
+    caminho = caminho or ARQUIVO_GASTOS
+    if os.path.exists(caminho):
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+                perf.contar("bytes_lidos", f.buffer.tell())
+                return dados
+        except (json.JSONDecodeError, IOError):
+            os.makedirs(BACKUP_DIR, exist_ok=True)
+            bak = os.path.join(BACKUP_DIR, f"corrupt_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            try:
+                os.replace(caminho, bak)
+            except:
+                pass
+            (avisar or log.warning)(f"Arquivo de dados corrompido. Foi movido para:\n{bak}")
+    return dados_vazios()
+
+def salvar_gastos(dados, caminho=None):
+    caminho = caminho or ARQUIVO_GASTOS
+    dirpath = os.path.dirname(os.path.abspath(caminho)) or "."
+    with tempfile.NamedTemporaryFile("w", dir=dirpath, delete=False, encoding="utf-8") as tmp:
+        json.dump(dados, tmp, indent=4, ensure_ascii=False, default=para_json)
+        tmp.flush()
+        perf.contar("bytes_gravados", tmp.tell())
+        tmp_path = tmp.name
+    os.replace(tmp_path, caminho)
+
+# ---------- Várias instâncias: trava e versão do arquivo ----------
+@contextmanager
+def trava_arquivo(caminho):
+    """Trava exclusiva (flock) em `caminho` + ".lock", compartilhada por todos os processos
+    que gravam o mesmo arquivo de dados. Não é reentrante; sem fcntl não trava nada."""
+    if fcntl is None:
+        yield
+        return
+    with open(caminho + ".lock", "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _stat_arquivo(caminho):
+    """Versão do arquivo: (inode, mtime, tamanho). Muda a cada os.replace e a cada append."""
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+# ---------- Armazenamento: snapshot JSON ou journal append-only ----------
+
+def _snapshot_temporario(dados, caminho, seq):
+    """Escreve snapshot compacto (sem indent) + fsync num temporário ao lado de `caminho`."""
+    dirpath = os.path.dirname(os.path.abspath(caminho)) or "."
+    with tempfile.NamedTemporaryFile("w", dir=dirpath, delete=False, encoding="utf-8") as tmp:
+        json.dump(dict(dados, _journal_seq=seq), tmp, ensure_ascii=False, separators=(",", ":"), default=para_json)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+        perf.contar("bytes_gravados", tmp.tell())
+        return tmp.name
+
+def ler_journal(caminho, seq_min=0, limite=None):
+    """Lê operações com seq > seq_min. Retorna (ops, ultimo_seq, bytes_validos).
+
+    Uma linha sem '\n' final ou inválida (escrita interrompida) encerra a leitura.
+    """
+    ops, ultimo, validos = [], seq_min, 0
+    if not os.path.exists(caminho):
+        return ops, ultimo, validos
+    with open(caminho, "rb") as f:
+        for linha in f:
+            if limite is not None and validos + len(linha) > limite:
+                break
+            if not linha.endswith(b"\n"):
+                break
+            try:
+                op = json.loads(linha)
+            except ValueError:
+                break
+            validos += len(linha)
+            if op.get("seq", 0) > seq_min:
+                ops.append(op)
+                ultimo = op["seq"]
+    perf.contar("bytes_lidos", validos)
+    return ops, ultimo, validos
+
+def aplicar_operacoes(dados, ops):
+    """Reaplica operações do journal sobre um snapshot."""
+    if not ops:
+        return dados
+    por_id = {}
+    for i, g in enumerate(dados["gastos"]):
+        chave = g.get("id")
+        if not chave or chave in por_id:
+            chave = ("_sem_id", i)
+        por_id[chave] = g
+    for op in ops:
+        tipo = op.get("op")
+        if tipo == "add":
+            por_id[op["gasto"]["id"]] = op["gasto"]
+        elif tipo == "edit":
+            g = por_id.get(op["id"])
+            if g is not None:
+                g.update(op["campos"])
+        elif tipo == "del":
+            por_id.pop(op["id"], None)
+        elif tipo == "set":
+            dados[op["chave"]] = op["valor"]
+    dados["gastos"] = list(por_id.values())
+    return dados
+
+class ArmazenamentoJSON:
+    """Modo original: o arquivo inteiro é reescrito (indent=4) a cada gravação.
+
+    `_assinatura` é a versão do arquivo na última leitura ou gravação. Se outro
+    processo gravou depois dela, `gravar` relê o disco e aplica por cima só as
+    operações pendentes, em vez de sobrescrever o que o outro gravou; a
+    assinatura fica vazia para o ledger reler na próxima consulta.
+    """
+
+    def __init__(self, caminho, avisar=None):
+        self.caminho = caminho
+        self.avisar = avisar
+        self.journal = caminho + ".journal"
+        self._assinatura = None
+
+    def mudou_no_disco(self):
+        return _stat_arquivo(self.caminho) != self._assinatura
+
+    def _ler(self):
+        dados = carregar_gastos(self.caminho, self.avisar)
+        # journal deixado pelo modo "journal": reaplicar; a próxima gravação o absorve
+        ops, _, _ = ler_journal(self.journal, dados.pop("_journal_seq", 0))
+        return aplicar_operacoes(dados, ops)
+
+    def carregar(self):
+        with trava_arquivo(self.caminho):
+            dados = self._ler()
+            self._assinatura = _stat_arquivo(self.caminho)
+        return dados
+
+    def gravar(self, dados, ops):
+        with trava_arquivo(self.caminho):
+            outro = _stat_arquivo(self.caminho) != self._assinatura
+            if outro and any(op.get("op") == "replace" for op in ops):
+                log.warning("Outra instância alterou %s; os dados foram substituídos pelos desta.", self.caminho)
+                outro = False
+            elif outro:
+                dados = aplicar_operacoes(self._ler(), ops)
+            salvar_gastos(dados, self.caminho)
+            if os.path.exists(self.journal):
+                os.remove(self.journal)
+            self._assinatura = None if outro else _stat_arquivo(self.caminho)
+
+    def fechar(self):
+        pass
+
+class ArmazenamentoJournal:
+    """Snapshot compacto + journal de operações (JSON por linha) ao lado dele.
+
+    Cada gravação só acrescenta as operações novas ao journal (com fsync). Quando o
+    journal passa de `limite` bytes, uma thread gera um snapshot novo a partir do
+    disco e corta do journal o trecho já absorvido. O snapshot guarda o último seq
+    aplicado, então uma queda entre as duas etapas não reaplica operações.
+
+    Outro processo pode acrescentar ao mesmo journal: as gravações acontecem sob
+    `trava_arquivo` e, se a versão dos arquivos mudou desde a última leitura,
+    o seq continua do maior gravado no disco.
+    """
+
+    incremental = True
+
+    def __init__(self, caminho, limite=LIMITE_JOURNAL, avisar=None):
+        self.caminho = caminho
+        self.avisar = avisar
+        self.journal = caminho + ".journal"
+        self.limite = limite
+        self._trava = threading.Lock()
+        self._seq = 0
+        self._geracao = 0
+        self._compactacao = None
+        self._assinatura = None
+
+    def _assinatura_atual(self):
+        return (_stat_arquivo(self.caminho), _stat_arquivo(self.journal))
+
+    def mudou_no_disco(self):
+        with self._trava:
+            return self._assinatura_atual() != self._assinatura
+
+    def _cortar_cauda(self, validos):
+        if os.path.exists(self.journal) and os.path.getsize(self.journal) > validos:
+            # descartar cauda interrompida para não concatenar novas linhas a ela
+            with open(self.journal, "r+b") as f:
+                f.truncate(validos)
+
+    def carregar(self):
+        with self._trava, trava_arquivo(self.caminho):
+            dados = carregar_gastos(self.caminho, self.avisar)
+            seq_snapshot = dados.pop("_journal_seq", 0)
+            ops, ultimo, validos = ler_journal(self.journal, seq_snapshot)
+            aplicar_operacoes(dados, ops)
+            self._cortar_cauda(validos)
+            self._seq = max(seq_snapshot, ultimo)
+            self._assinatura = self._assinatura_atual()
+        return dados
+
+    def _seq_no_disco(self):
+        """Maior seq já gravado (snapshot ou journal), depois de uma gravação de outro processo."""
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                seq = json.load(f).get("_journal_seq", 0)
+        except (OSError, ValueError):
+            seq = 0
+        _, ultimo, validos = ler_journal(self.journal, seq)
+        self._cortar_cauda(validos)
+        return ultimo
+
+    def gravar(self, dados, ops):
+        if any(op.get("op") == "replace" for op in ops):
+            with self._trava, trava_arquivo(self.caminho):
+                if self._assinatura_atual() != self._assinatura:
+                    log.warning("Outra instância alterou %s; os dados foram substituídos pelos desta.", self.caminho)
+                self._geracao += 1  # invalida compactação em andamento
+                os.replace(_snapshot_temporario(dados, self.caminho, self._seq), self.caminho)
+                if os.path.exists(self.journal):
+                    os.remove(self.journal)
+                self._assinatura = self._assinatura_atual()
+            return
+        with self._trava, trava_arquivo(self.caminho):
+            outro = self._assinatura_atual() != self._assinatura
+            if outro:
+                self._seq = max(self._seq, self._seq_no_disco())
+            with open(self.journal, "ab") as f:
+                antes = f.tell()
+                for op in ops:
+                    self._seq += 1
+                    f.write((json.dumps(dict(op, seq=self._seq), ensure_ascii=False, separators=(",", ":"), default=para_json) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                perf.contar("bytes_gravados", f.tell() - antes)
+            self._assinatura = None if outro else self._assinatura_atual()
+            excedeu = os.path.getsize(self.journal) > self.limite
+        if excedeu:
+            self.compactar()
+
+    def compactar(self, esperar=False):
+        with self._trava:
+            if self._compactacao is None or not self._compactacao.is_alive():
+                tamanho = os.path.getsize(self.journal) if os.path.exists(self.journal) else 0
+                self._compactacao = threading.Thread(target=self._compactar, args=(self._geracao, tamanho), daemon=True)
+                self._compactacao.start()
+            t = self._compactacao
+        if esperar:
+            t.join()
+
+    def _compactar(self, geracao, tamanho):
+        versao = _stat_arquivo(self.caminho)
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            dados = dados_vazios()
+        except (ValueError, OSError):
+            return  # snapshot ilegível: a carga normal trata a recuperação
+        ops, ultimo, validos = ler_journal(self.journal, dados.pop("_journal_seq", 0), limite=tamanho)
+        aplicar_operacoes(dados, ops)
+        tmp_snapshot = _snapshot_temporario(dados, self.caminho, ultimo)
+        with self._trava, trava_arquivo(self.caminho):
+            # snapshot trocado por outro processo (compactação ou substituição): descartar a nossa
+            if geracao != self._geracao or _stat_arquivo(self.caminho) != versao:
+                os.remove(tmp_snapshot)
+                return
+            em_dia = self._assinatura_atual() == self._assinatura
+            os.replace(tmp_snapshot, self.caminho)
+            # manter no journal só o que foi acrescentado durante a compactação
+            with open(self.journal, "rb") as f:
+                f.seek(validos)
+                resto = f.read()
+            with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(os.path.abspath(self.journal)), delete=False) as tmp:
+                tmp.write(resto)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+                tmp_journal = tmp.name
+            os.replace(tmp_journal, self.journal)
+            # só avança a versão se não havia gravação de outro processo ainda não relida
+            self._assinatura = self._assinatura_atual() if em_dia else None
+
+    def fechar(self):
+        t = self._compactacao
+        if t is not None:
+            t.join()
+
+# ---------- Armazenamento: SQLite ----------
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS gastos (
+    id TEXT PRIMARY KEY,
+    descricao TEXT NOT NULL,
+    valor REAL NOT NULL,
+    data TEXT NOT NULL,
+    categoria TEXT NOT NULL DEFAULT 'Geral'
+);
+CREATE INDEX IF NOT EXISTS idx_gastos_data ON gastos(data);
+CREATE INDEX IF NOT EXISTS idx_gastos_categoria ON gastos(categoria COLLATE NOCASE, data);
+CREATE TABLE IF NOT EXISTS recorrentes (
+    pos INTEGER PRIMARY KEY,
+    descricao TEXT NOT NULL,
+    valor REAL NOT NULL,
+    dia INTEGER,
+    categoria TEXT,
+    ultima_geracao TEXT
+);
+CREATE TABLE IF NOT EXISTS orcamentos_categoria (categoria TEXT PRIMARY KEY, valor REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT);
+"""
+COLUNAS_GASTO = ("id", "descricao", "valor", "data", "categoria")
+COLUNAS_RECORRENTE = ("descricao", "valor", "dia", "categoria", "ultima_geracao")
+
+def _linha_gasto(g):
+    if not g.get("id"):
+        g["id"] = str(uuid.uuid4())
+    return (g["id"], g.get("descricao", ""), g.get("valor", 0.0), g["data"], g.get("categoria", "Geral"))
+
+def _sqlite_gravar_campo(con, chave, valor):
+    if chave == "gastos":
+        con.execute("DELETE FROM gastos")
+        con.executemany("INSERT OR REPLACE INTO gastos VALUES (?,?,?,?,?)", (_linha_gasto(g) for g in valor))
+    elif chave == "orcamentos_categoria":
+        con.execute("DELETE FROM orcamentos_categoria")
+        con.executemany("INSERT INTO orcamentos_categoria VALUES (?,?)", valor.items())
+    else:
+        if chave == "recorrentes":
+            # recorrentes vão como JSON em meta, com todas as chaves; a tabela fica só para ler bancos antigos
+            con.execute("DELETE FROM recorrentes")
+        con.execute("INSERT OR REPLACE INTO meta VALUES (?,?)", (chave, json.dumps(valor)))
+
+def _sqlite_gravar_tudo(con, dados):
+    for chave, valor in dados.items():
+        if chave != "_journal_seq":
+            _sqlite_gravar_campo(con, chave, valor)
+
+def migrar_json_para_sqlite(caminho_json, caminho_db):
+    """Migração única: copia o JSON (e um journal pendente) para o banco. Retorna nº de gastos."""
+    dados = ArmazenamentoJSON(caminho_json).carregar()
+    con = sqlite3.connect(caminho_db)
+    try:
+        con.executescript(ESQUEMA_SQLITE)
+        with con:
+            for tabela in ("gastos", "recorrentes", "orcamentos_categoria", "meta"):
+                con.execute(f"DELETE FROM {tabela}")
+            _sqlite_gravar_tudo(con, dados)
+    finally:
+        con.close()
+    return len(dados.get("gastos", []))
+
+class ArmazenamentoSQLite:
+    """gastos e orcamentos_categoria em tabelas SQLite; recorrentes e os demais campos, em JSON na tabela meta.
+
+    Cada gravação aplica só as operações pendentes numa transação. Filtros por
+    data/categoria e totais por categoria rodam como consultas indexadas (o id
+    é PRIMARY KEY e já tem índice próprio). Entre processos, a trava é a do
+    próprio SQLite; `PRAGMA data_version` faz o papel da versão do arquivo.
+    """
+
+    consultas_nativas = True
+    incremental = True
+
+    def __init__(self, caminho_db, caminho_json=None):
+        self.caminho = caminho_db
+        if not os.path.exists(caminho_db) and caminho_json and os.path.exists(caminho_json):
+            migrar_json_para_sqlite(caminho_json, caminho_db)
+        self.con = sqlite3.connect(caminho_db, check_same_thread=False)
+        self.con.executescript(ESQUEMA_SQLITE)
+        self._trava = threading.RLock()
+        self._versao = None
+
+    def _versao_atual(self):
+        # data_version só muda quando outra conexão faz commit
+        return self.con.execute("PRAGMA data_version").fetchone()[0]
+
+    def mudou_no_disco(self):
+        with self._trava:
+            return self._versao_atual() != self._versao
+
+    def carregar(self):
+        with self._trava:
+            con = self.con
+            dados = {"gastos": [dict(zip(COLUNAS_GASTO, r)) for r in con.execute("SELECT id, descricao, valor, data, categoria FROM gastos ORDER BY rowid")],
+                     "orcamento_inicial": 0.0,
+                     "orcamentos_categoria": dict(con.execute("SELECT categoria, valor FROM orcamentos_categoria")),
+                     "recorrentes": [{c: v for c, v in zip(COLUNAS_RECORRENTE, r) if v is not None}
+                                     for r in con.execute("SELECT descricao, valor, dia, categoria, ultima_geracao FROM recorrentes ORDER BY pos")]}
+            for chave, valor in con.execute("SELECT chave, valor FROM meta"):
+                dados[chave] = json.loads(valor)
+            self._versao = self._versao_atual()
+        perf.contar("linhas_lidas", len(dados["gastos"]))
+        return dados
+
+    def gravar(self, dados, ops):
+        perf.contar("operacoes_gravadas", len(ops))
+        with self._trava, self.con as con:
+            con.execute("BEGIN IMMEDIATE")  # trava de escrita antes de conferir a versão
+            versao = self._versao_atual()
+            outro = versao != self._versao
+            if any(op.get("op") == "replace" for op in ops):
+                outro = False
+                for tabela in ("gastos", "recorrentes", "orcamentos_categoria", "meta"):
+                    con.execute(f"DELETE FROM {tabela}")
+                _sqlite_gravar_tudo(con, dados)
+            else:
+                for op in ops:
+                    tipo = op.get("op")
+                    if tipo == "add":
+                        con.execute("INSERT OR REPLACE INTO gastos VALUES (?,?,?,?,?)", _linha_gasto(op["gasto"]))
+                    elif tipo == "edit":
+                        campos = {c: v for c, v in op["campos"].items() if c in COLUNAS_GASTO[1:]}
+                        if campos:
+                            con.execute(f"UPDATE gastos SET {', '.join(c + '=?' for c in campos)} WHERE id=?", (*campos.values(), op["id"]))
+                    elif tipo == "del":
+                        con.execute("DELETE FROM gastos WHERE id=?", (op["id"],))
+                    elif tipo == "set":
+                        _sqlite_gravar_campo(con, op["chave"], op["valor"])
+            # o commit desta conexão não muda data_version: com commit de outra no meio, reler
+            self._versao = None if outro else versao
+
+    def _filtro(self, inicio, fim, categoria):
+        conds, args = [], []
+        if inicio:
+            conds.append("data >= ?")
+            args.append(inicio)
+        if fim:
+            conds.append("data <= ?")
+            args.append(fim)
+        if categoria:
+            conds.append("categoria = ? COLLATE NOCASE")
+            args.append(categoria)
+        return (" WHERE " + " AND ".join(conds) if conds else ""), args
+
+    def consultar(self, inicio=None, fim=None, categoria=None):
+        where, args = self._filtro(inicio, fim, categoria)
+        with self._trava:
+            rows = self.con.execute(f"SELECT id, descricao, valor, data, categoria FROM gastos{where} ORDER BY data DESC, rowid", args).fetchall()
+        # mesmos registros que o ledger devolve nos outros modos
+        return [Gasto.de_dict(dict(zip(COLUNAS_GASTO, r))) for r in rows]
+
+    def totais_por_categoria(self, inicio=None, fim=None, categoria=None):
+        where, args = self._filtro(inicio, fim, categoria)
+        with self._trava:
+            # soma em centavos inteiros, como o Ledger: SUM(valor) em float acumula erro de arredondamento
+            linhas = self.con.execute(f"SELECT categoria, SUM(CAST(ROUND(valor * 100) AS INTEGER)) FROM gastos{where} "
+                                      "GROUP BY categoria", args)
+            return {cat: centavos / 100 for cat, centavos in linhas}
+
+    def fechar(self):
+        with self._trava:
+            self.con.close()
+
+# ---------- Armazenamento: um arquivo por ano ----------
+def _totais_do_ano(gastos):
+    """{"YYYY-MM": {categoria: [centavos, quantidade]}} dos gastos de um ano."""
+    meses = {}
+    for g in gastos:
+        t = meses.setdefault(g["data"][:7], {}).setdefault(g.get("categoria", "Geral"), [0, 0])
+        t[0] += centavos(g.get("valor", 0))
+        t[1] += 1
+    return meses
+
+def _gravar_json_compacto(obj, caminho):
+    dirpath = os.path.dirname(os.path.abspath(caminho)) or "."
+    with tempfile.NamedTemporaryFile("w", dir=dirpath, delete=False, encoding="utf-8") as tmp:
+        json.dump(obj, tmp, ensure_ascii=False, separators=(",", ":"), default=para_json)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+        perf.contar("bytes_gravados", tmp.tell())
+    os.replace(tmp.name, caminho)
+
+class ArmazenamentoParticionado:
+    """Um arquivo JSON de gastos por ano e um manifesto com os demais campos e os totais.
+
+        gastos_pessoais.anos/manifesto.json  {"meta": {...}, "anos": {"2024": {"n", "meses": {mês: {cat: [centavos, n]}}}}}
+        gastos_pessoais.anos/2024.json       [gastos de 2024]
+
+    `carregar` lê só o manifesto; os gastos de cada ano chegam por `carregar_anos`
+    quando o ledger precisa deles, e os totais do manifesto cobrem os demais.
+    Cada gravação reescreve só os anos tocados pelas operações, mais o manifesto.
+    Na primeira abertura o JSON único (e um journal pendente) é dividido por ano.
+
+    A versão é a do manifesto, sempre o último arquivo gravado. Se outro processo
+    o regravou desde a nossa leitura, `gravar` relê do disco o manifesto e os anos
+    afetados e aplica sobre eles só as operações pendentes.
+    """
+
+    particionado = True
+
+    def __init__(self, caminho, avisar=None):
+        self.caminho_json = caminho
+        self.avisar = avisar
+        self.diretorio = os.path.splitext(caminho)[0] + ".anos"
+        self.manifesto = os.path.join(self.diretorio, "manifesto.json")
+        self._trava = threading.Lock()
+        self._anos = {}    # ano -> {"n", "meses"}, como no manifesto
+        self._ano_de = {}  # id -> ano dos gastos já entregues ao ledger
+        self._assinatura = None
+        if not os.path.exists(self.manifesto):
+            self._migrar()
+
+    def _arquivo_ano(self, ano):
+        return os.path.join(self.diretorio, f"{ano}.json")
+
+    def _migrar(self):
+        with trava_arquivo(self.caminho_json):
+            if os.path.exists(self.manifesto):
+                return  # outra instância migrou enquanto esperávamos a trava
+            dados = ArmazenamentoJSON(self.caminho_json, self.avisar)._ler()
+            vistos = set()
+            for g in dados["gastos"]:
+                if not g.get("id") or g["id"] in vistos:
+                    g["id"] = str(uuid.uuid4())
+                vistos.add(g["id"])
+            os.makedirs(self.diretorio, exist_ok=True)
+            self._gravar_tudo(dados)
+
+    def _gravar_ano(self, ano, gastos):
+        if gastos:
+            _gravar_json_compacto(gastos, self._arquivo_ano(ano))
+            self._anos[ano] = {"n": len(gastos), "meses": _totais_do_ano(gastos)}
+        else:
+            if os.path.exists(self._arquivo_ano(ano)):
+                os.remove(self._arquivo_ano(ano))
+            self._anos.pop(ano, None)
+
+    def _ler_manifesto(self):
+        try:
+            with open(self.manifesto, "r", encoding="utf-8") as f:
+                manifesto = json.load(f)
+                perf.contar("bytes_lidos", f.buffer.tell())
+        except FileNotFoundError:
+            manifesto = {"meta": {}, "anos": {}}
+        return manifesto
+
+    def _ler_ano(self, ano):
+        try:
+            with open(self._arquivo_ano(ano), "r", encoding="utf-8") as f:
+                parte = json.load(f)
+                perf.contar("bytes_lidos", f.buffer.tell())
+        except FileNotFoundError:
+            parte = []
+        return parte
+
+    def _gravar_manifesto(self, dados):
+        meta = {k: v for k, v in dados.items() if k not in ("gastos", "_journal_seq")}
+        _gravar_json_compacto({"meta": meta, "anos": dict(sorted(self._anos.items()))}, self.manifesto)
+        self._assinatura = _stat_arquivo(self.manifesto)
+
+    def _gravar_tudo(self, dados):
+        por_ano = {}
+        for g in dados["gastos"]:
+            por_ano.setdefault(g["data"][:4], []).append(g)
+        for ano in set(self._anos) - set(por_ano):
+            self._gravar_ano(ano, [])
+        for ano, gastos in por_ano.items():
+            self._gravar_ano(ano, gastos)
+        self._gravar_manifesto(dados)
+
+    def mudou_no_disco(self):
+        return _stat_arquivo(self.manifesto) != self._assinatura
+
+    def carregar(self):
+        """Campos do manifesto e `gastos` vazio; os anos ficam em `anos()` até serem carregados."""
+        with self._trava, trava_arquivo(self.caminho_json):
+            manifesto = self._ler_manifesto()
+            self._anos = manifesto["anos"]
+            self._ano_de = {}
+            self._assinatura = _stat_arquivo(self.manifesto)
+        dados = dados_vazios()
+        dados.update(manifesto["meta"])
+        dados["gastos"] = []
+        return dados
+
+    def anos(self):
+        """{ano: {"n", "meses"}} de todos os anos gravados."""
+        with self._trava:
+            return dict(self._anos)
+
+    def carregar_anos(self, anos):
+        """Gastos dos `anos` pedidos, lidos dos arquivos de cada ano."""
+        gastos = []
+        with self._trava, trava_arquivo(self.caminho_json):
+            for ano in sorted(anos):
+                parte = self._ler_ano(ano)
+                sem_id = [g for g in parte if not g.get("id")]
+                for g in sem_id:
+                    g["id"] = str(uuid.uuid4())
+                if sem_id:
+                    self._gravar_ano(ano, parte)  # para os ids valerem nas próximas aberturas
+                for g in parte:
+                    self._ano_de[chave_id(g["id"])] = ano
+                gastos.extend(parte)
+            perf.contar("anos_carregados", len(anos))
+        return gastos
+
+    def gravar(self, dados, ops):
+        with self._trava, trava_arquivo(self.caminho_json):
+            outro = _stat_arquivo(self.manifesto) != self._assinatura
+            if any(op.get("op") == "replace" for op in ops):
+                if outro:
+                    log.warning("Outra instância alterou %s; os dados foram substituídos pelos desta.", self.diretorio)
+                self._gravar_tudo(dados)
+                self._ano_de = {chave_id(g["id"]): g["data"][:4] for g in dados["gastos"]}
+                return
+            afetados = set()
+            for op in ops:
+                tipo = op.get("op")
+                if tipo == "add":
+                    ano = self._ano_de[chave_id(op["gasto"]["id"])] = op["gasto"]["data"][:4]
+                    afetados.add(ano)
+                elif tipo == "del":
+                    afetados.add(self._ano_de.pop(chave_id(op["id"]), None))
+                elif tipo == "edit":
+                    afetados.add(self._ano_de.get(chave_id(op["id"])))
+                    if "data" in op["campos"]:
+                        ano = self._ano_de[chave_id(op["id"])] = op["campos"]["data"][:4]
+                        afetados.add(ano)
+            afetados.discard(None)
+            if outro:
+                # partir do disco: manifesto e anos afetados como o outro processo os deixou
+                manifesto = self._ler_manifesto()
+                self._anos = manifesto["anos"]
+                disco = dict(manifesto["meta"], gastos=[g for ano in sorted(afetados) for g in self._ler_ano(ano)])
+                dados = aplicar_operacoes(disco, ops)
+            por_ano = {ano: [] for ano in afetados}
+            if por_ano:
+                for g in dados["gastos"]:
+                    lista = por_ano.get(g["data"][:4])
+                    if lista is not None:
+                        lista.append(g)
+            for ano, gastos in por_ano.items():
+                self._gravar_ano(ano, gastos)
+            self._gravar_manifesto(dados)
+            if outro:
+                self._assinatura = None
+
+    def fechar(self):
+        pass
+
+def criar_armazenamento(modo, caminho, avisar=None):
+    if modo == "journal":
+        return ArmazenamentoJournal(caminho, avisar=avisar)
+    if modo == "sqlite":
+        return ArmazenamentoSQLite(os.path.splitext(caminho)[0] + ".db", caminho_json=caminho)
+    if modo == "particionado":
+        return ArmazenamentoParticionado(caminho, avisar=avisar)
+    return ArmazenamentoJSON(caminho, avisar=avisar)
@@ -0,0 +1,244 @@
+"""Backups incrementais: os gastos de cada mês viram um objeto gzip endereçado pelo conteúdo.
+
+    backups/objetos/ab/abcd....json.gz   gastos de um mês (sha256 do JSON canônico)
+    backups/manifestos/<timestamp>.json  {"criado", "meta", "meses": {"YYYY-MM": sha}}
+
+Um mês que não mudou desde o último backup aponta para o mesmo objeto e não é
+regravado. A retenção mantém o backup mais recente de cada hora, dia e mês
+dentro dos limites configurados e apaga os objetos que nenhum manifesto usa.
+"""
+import gzip
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+from datetime import datetime
+
+from .armazenamento import BACKUP_DIR, log
+
+RETENCAO_PADRAO = {"horaria": 24, "diaria": 7, "mensal": 12}
+BACKUP_A_CADA = int(os.environ.get("GASTOS_BACKUP_A_CADA", "0"))  # backup automático a cada N alterações; 0 desliga
+FORMATO_NOME = "%Y%m%d_%H%M%S_%f"
+CHAVES_META = ("orcamento_inicial", "orcamentos_categoria", "recorrentes")
+
+def _json_canonico(obj):
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def _gravar_atomico(destino, conteudo):
+    # nome temporário único: dois backups simultâneos do mesmo objeto não disputam o arquivo
+    with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(destino), delete=False) as tmp:
+        tmp.write(conteudo)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+    os.replace(tmp.name, destino)
+
+def _nome_valido(nome):
+    try:
+        datetime.strptime(nome, FORMATO_NOME)
+    except ValueError:
+        return False
+    return True
+
+class Backups:
+    """Cria, lista, restaura e poda os backups de um ledger em `diretorio`.
+
+    Registrada como observadora do ledger, guarda o hash de cada mês já salvo e
+    o esquece quando um gasto do mês entra ou sai; assim só os meses alterados
+    são serializados de novo. `capturar` copia o estado na thread do chamador e
+    `gravar` pode rodar em outra thread.
+    """
+
+    def __init__(self, ledger, diretorio=BACKUP_DIR, retencao=None):
+        self.ledger = ledger
+        self.diretorio = diretorio
+        self.retencao = dict(RETENCAO_PADRAO if retencao is None else retencao)
+        self.dir_objetos = os.path.join(diretorio, "objetos")
+        self.dir_manifestos = os.path.join(diretorio, "manifestos")
+        self._hashes = {}   # mês -> sha do objeto já gravado
+        self._versao = {}   # mês -> nº de alterações vistas
+        self._trava = threading.Lock()
+        ledger.observadores.append(self.ao_mudar)
+
+    def ao_mudar(self, evento, item):
+        if evento == "carga":
+            return  # anos lidos do disco sob demanda: nada mudou
+        with self._trava:
+            if evento == "reset":
+                self._hashes.clear()
+                self._versao.clear()
+            else:
+                mes = item["data"][:7]
+                self._hashes.pop(mes, None)
+                self._versao[mes] = self._versao.get(mes, 0) + 1
+
+    def _caminho_objeto(self, sha):
+        return os.path.join(self.dir_objetos, sha[:2], sha + ".json.gz")
+
+    def capturar(self):
+        """Estado atual: sha dos meses inalterados e os gastos dos demais como dicts."""
+        self.ledger.carregar_tudo()
+        dados = self.ledger.obter()
+        meses = {}
+        with self._trava:
+            for mes in self.ledger.totais_mensais():
+                sha = self._hashes.get(mes)
+                if sha and os.path.exists(self._caminho_objeto(sha)):
+                    meses[mes] = sha
+            versoes = dict(self._versao)
+        pendentes = {}
+        for g in dados["gastos"]:
+            mes = g["data"][:7]
+            if mes not in meses:
+                pendentes.setdefault(mes, []).append(g.para_dict())
+        meta = json.loads(_json_canonico({k: dados.get(k) for k in CHAVES_META}))
+        return {"meta": meta, "meses": meses, "pendentes": pendentes, "versoes": versoes}
+
+    def gravar(self, captura, agora=None):
+        """Grava os objetos novos e o manifesto. Retorna o caminho do manifesto."""
+        agora = agora or datetime.now()
+        meses = dict(captura["meses"])
+        for mes, gastos in captura["pendentes"].items():
+            conteudo = _json_canonico(gastos)
+            sha = hashlib.sha256(conteudo).hexdigest()
+            destino = self._caminho_objeto(sha)
+            if not os.path.exists(destino):
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                _gravar_atomico(destino, gzip.compress(conteudo, compresslevel=6))
+            meses[mes] = sha
+            with self._trava:
+                # o mês pode ter mudado depois da captura: aí o hash já não vale
+                if self._versao.get(mes, 0) == captura["versoes"].get(mes, 0):
+                    self._hashes[mes] = sha
+        os.makedirs(self.dir_manifestos, exist_ok=True)
+        destino = os.path.join(self.dir_manifestos, agora.strftime(FORMATO_NOME) + ".json")
+        manifesto = {"criado": agora.isoformat(timespec="seconds"), "meta": captura["meta"], "meses": dict(sorted(meses.items()))}
+        _gravar_atomico(destino, json.dumps(manifesto, ensure_ascii=False, indent=1).encode("utf-8"))
+        return destino
+
+    def fazer(self):
+        """Backup completo na thread atual, seguido da retenção. Retorna o caminho do manifesto."""
+        destino = self.gravar(self.capturar())
+        self.aplicar_retencao()
+        return destino
+
+    def listar(self):
+        """Nomes dos manifestos, do mais antigo para o mais recente. Arquivos `.json` com
+        outro nome (cópias, edições à mão) são ignorados, inclusive pela retenção."""
+        try:
+            nomes = os.listdir(self.dir_manifestos)
+        except FileNotFoundError:
+            return []
+        return sorted(n[:-5] for n in nomes if n.endswith(".json") and _nome_valido(n[:-5]))
+
+    def carregar(self, nome=None):
+        """Dados completos de um backup (o mais recente se `nome` for None)."""
+        if nome is None:
+            nomes = self.listar()
+            if not nomes:
+                raise FileNotFoundError("Nenhum backup encontrado.")
+            nome = nomes[-1]
+        caminho = nome if nome.endswith(".json") else os.path.join(self.dir_manifestos, nome + ".json")
+        with open(caminho, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+        dados = dict(manifesto["meta"])
+        dados["gastos"] = gastos = []
+        for _, sha in sorted(manifesto["meses"].items()):
+            with open(self._caminho_objeto(sha), "rb") as f:
+                gastos.extend(json.loads(gzip.decompress(f.read())))
+        return dados
+
+    def restaurar(self, nome=None):
+        """Substitui os dados do ledger pelos do backup e grava."""
+        self.ledger.substituir(self.carregar(nome))
+        self.ledger.salvar()
+
+    def aplicar_retencao(self):
+        """Apaga manifestos fora da política e objetos órfãos. Retorna os nomes apagados."""
+        nomes = self.listar()
+        if not nomes:
+            return []
+        manter = {nomes[-1]}
+        for periodo, formato in (("horaria", "%Y%m%d%H"), ("diaria", "%Y%m%d"), ("mensal", "%Y%m")):
+            limite = self.retencao.get(periodo, 0)
+            vistos = set()
+            for nome in reversed(nomes):
+                chave = datetime.strptime(nome, FORMATO_NOME).strftime(formato)
+                if chave in vistos:
+                    continue
+                if len(vistos) >= limite:
+                    break
+                vistos.add(chave)
+                manter.add(nome)
+        removidos = [n for n in nomes if n not in manter]
+        for nome in removidos:
+            os.remove(os.path.join(self.dir_manifestos, nome + ".json"))
+        if removidos:
+            self._coletar_objetos()
+        return removidos
+
+    def _coletar_objetos(self):
+        usados = set()
+        for nome in self.listar():
+            with open(os.path.join(self.dir_manifestos, nome + ".json"), "r", encoding="utf-8") as f:
+                usados.update(json.load(f)["meses"].values())
+        for raiz, _, arquivos in os.walk(self.dir_objetos):
+            for arq in arquivos:
+                if arq.endswith(".json.gz") and arq[:-8] not in usados:
+                    os.remove(os.path.join(raiz, arq))
+
+class BackupAutomatico:
+    """Faz um backup em segundo plano a cada `a_cada` gastos incluídos ou retirados.
+
+    A contagem vem dos observadores do ledger; a captura acontece logo após um
+    `salvar` (na thread de quem salvou) e a gravação e a retenção na thread de
+    backup. Erros vão para o log e, se informado, para `ao_erro(msg)`, chamado na
+    thread de backup.
+    """
+
+    def __init__(self, backups, a_cada, ao_erro=None):
+        self.backups = backups
+        self.a_cada = a_cada
+        self.ao_erro = ao_erro
+        self.alteracoes = 0
+        self.fila = queue.Queue()
+        self.thread = threading.Thread(target=self._executar, daemon=True)
+        backups.ledger.observadores.append(self._ao_mudar)
+        backups.ledger.ao_salvar.append(self._ao_salvar)
+        self.thread.start()
+
+    def _ao_mudar(self, evento, item):
+        if evento != "carga":
+            self.alteracoes += len(item) if evento == "reset" else 1
+
+    def _ao_salvar(self):
+        if self.alteracoes >= self.a_cada:
+            self.alteracoes = 0
+            self.fila.put(self.backups.capturar())
+
+    def _executar(self):
+        while True:
+            captura = self.fila.get()
+            if captura is None:
+                return
+            try:
+                self.backups.gravar(captura)
+                self.backups.aplicar_retencao()
+            except OSError as e:
+                log.exception("Falha no backup automático")
+                if self.ao_erro:
+                    self.ao_erro(f"Falha no backup automático: {e}")
+
+    def fechar(self):
+        """Termina os backups já capturados e encerra a thread."""
+        self.fila.put(None)
+        self.thread.join()
+
+def fazer_backup(ledger, diretorio=BACKUP_DIR):
+    """Backup incremental avulso; retorna o caminho do manifesto."""
+    backups = Backups(ledger, diretorio)
+    try:
+        return backups.fazer()
+    finally:
+        ledger.observadores.remove(backups.ao_mudar)
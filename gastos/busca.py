@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+def _texto(g):
+    # separador impede que um termo case atravessando descrição e categoria
+    return ((g.descricao or "") + "\0" + (g.categoria or "")).lower()
+
+def _trigramas(texto):
+    return {texto[i:i+3] for i in range(len(texto) - 2)}
+
+class IndiceBusca:
+    """Índice de trigramas sobre descricao/categoria para a pesquisa por substring.
+
+    Registrado como observador do ledger, acompanha cada inclusão e exclusão.
+    O texto em minúsculas de cada gasto fica em cache; a tabela de trigramas só
+    é montada na primeira busca e depois mantida incrementalmente. Termos com 3
+    ou mais caracteres cruzam os trigramas e confirmam os candidatos com `in`;
+    termos menores varrem apenas os textos em cache.
+    """
+
+    def __init__(self):
+        self._textos = {}      # Gasto.chave -> texto em minúsculas
+        self._trigramas = None  # trigrama -> {chaves}; None até a primeira busca
+
+    def ao_mudar(self, evento, item):
+        if evento == "reset":
+            self._textos = {g.chave: _texto(g) for g in item}
+            self._trigramas = None
+        elif evento == "add":
+            texto = self._textos[item.chave] = _texto(item)
+            if self._trigramas is not None:
+                for t in _trigramas(texto):
+                    self._trigramas[t].add(item.chave)
+        elif evento == "carga":
+            for g in item:
+                self.ao_mudar("add", g)
+        elif evento == "del":
+            texto = self._textos.pop(item.chave, None)
+            if texto is not None and self._trigramas is not None:
+                for t in _trigramas(texto):
+                    ids = self._trigramas[t]
+                    ids.discard(item.chave)
+                    if not ids:
+                        del self._trigramas[t]
+
+    def _construir(self):
+        self._trigramas = defaultdict(set)
+        for gid, texto in self._textos.items():
+            for t in _trigramas(texto):
+                self._trigramas[t].add(gid)
+
+    def buscar(self, termo):
+        """Chaves (`Gasto.chave`) dos gastos cuja descrição ou categoria contém `termo` (sem diferenciar maiúsculas)."""
+        termo = termo.lower()
+        if len(termo) < 3:
+            return {gid for gid, texto in self._textos.items() if termo in texto}
+        if self._trigramas is None:
+            self._construir()
+        listas = []
+        for t in _trigramas(termo):
+            ids = self._trigramas.get(t)
+            if not ids:
+                return set()
+            listas.append(ids)
+        listas.sort(key=len)
+        candidatos = listas[0].intersection(*listas[1:])
+        return {gid for gid in candidatos if termo in self._textos[gid]}
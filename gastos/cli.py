@@ -0,0 +1,140 @@
+"""Linha de comando: python -m gastos <comando> [opções]."""
+import argparse
+import logging
+import os
+
+from .armazenamento import ARQUIVO_GASTOS, MODO_ARMAZENAMENTO, migrar_json_para_sqlite
+from .helpers import parse_date_to_iso, periodo_mes
+from .ledger import Ledger
+from . import analise, backup, exportacao, importacao, recorrentes, resumo
+
+def _importar_csv(ledger, args):
+    print(importacao.texto_resultado(importacao.importar_csv(ledger, args.caminho, deduplicar=not args.manter_duplicados)))
+
+def _importar_json(ledger, args):
+    r = importacao.importar_json(ledger, args.caminho, mesclar=not args.substituir)
+    print("Dados substituídos pelo conteúdo do arquivo." if r is None else importacao.texto_resultado(r))
+
+def _exportar(ledger, args):
+    n, arquivos = exportacao.exportar(ledger, args.caminho, args.formato, args.gzip or None, args.por_mes,
+                                      inicio=args.inicio, fim=args.fim, categoria=args.categoria, termo=args.termo)
+    print(f"{n} gastos exportados para {', '.join(arquivos) if len(arquivos) <= 3 else f'{len(arquivos)} arquivos'}")
+
+def _aplicar_recorrentes(ledger, args):
+    aplicados = recorrentes.aplicar_recorrentes(ledger, args.meses)
+    print("Nenhuma despesa recorrente cadastrada." if aplicados is None else f"Recorrentes aplicados: {aplicados}")
+
+def _relatorio(ledger, args):
+    inicio, fim = periodo_mes(args.mes, args.ano)
+    print(resumo.texto_resumo(resumo.resumo_periodo(ledger, inicio, fim)), end="")
+
+def _tendencias(ledger, args):
+    rel = analise.relatorio_tendencias(ledger, args.inicio, args.fim)
+    print(analise.texto_tendencias(rel, args.categoria), end="")
+
+def _orcamento_mensal(ledger, args):
+    print(analise.texto_orcamento(analise.relatorio_orcamento(ledger, args.inicio, args.fim)), end="")
+
+def _backups(ledger, args):
+    retencao = backup.RETENCAO_PADRAO
+    if getattr(args, "retencao", None):
+        retencao = dict(zip(("horaria", "diaria", "mensal"), args.retencao))
+    return backup.Backups(ledger, args.diretorio, retencao)
+
+def _backup(ledger, args):
+    print(f"Backup salvo em: {_backups(ledger, args).fazer()}")
+
+def _listar_backups(ledger, args):
+    for nome in _backups(ledger, args).listar():
+        print(nome)
+
+def _restaurar(ledger, args):
+    _backups(ledger, args).restaurar(args.nome)
+    print(f"Backup {args.nome or 'mais recente'} restaurado.")
+
+def _retencao(texto):
+    try:
+        valores = [int(v) for v in texto.split(",")]
+    except ValueError:
+        valores = []
+    if len(valores) != 3 or min(valores) < 0:
+        raise argparse.ArgumentTypeError("use três inteiros: horas,dias,meses (ex.: 24,7,12)")
+    return valores
+
+def _data(texto):
+    iso = parse_date_to_iso(texto)
+    if not iso:
+        raise argparse.ArgumentTypeError(f"data inválida: {texto}")
+    return iso
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="gastos", description="Controle de gastos pessoais (sem interface gráfica).")
+    parser.add_argument("--arquivo", default=ARQUIVO_GASTOS, help=f"arquivo de dados (padrão: {ARQUIVO_GASTOS})")
+    parser.add_argument("--modo", choices=("json", "journal", "sqlite", "particionado"), default=MODO_ARMAZENAMENTO, help="armazenamento (padrão: $GASTOS_ARMAZENAMENTO ou json)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("importar-csv", help="importa gastos de um CSV, ignorando os que já existem")
+    p.add_argument("caminho")
+    p.add_argument("--manter-duplicados", action="store_true", help="importa todas as linhas, mesmo as já lançadas")
+    p.set_defaults(func=_importar_csv)
+    p = sub.add_parser("importar-json", help="mescla um JSON exportado: gastos, recorrentes e orçamentos que faltam")
+    p.add_argument("caminho")
+    p.add_argument("--substituir", action="store_true", help="substitui todos os dados pelo conteúdo do arquivo")
+    p.set_defaults(func=_importar_json)
+    p = sub.add_parser("exportar", help="exporta os gastos (filtrados) para CSV ou JSON Lines")
+    p.add_argument("caminho", nargs="?", default="gastos_export.csv", help="a extensão (.csv, .jsonl, .gz) define o formato")
+    p.add_argument("--formato", choices=exportacao.FORMATOS)
+    p.add_argument("--gzip", action="store_true", help="comprime com gzip")
+    p.add_argument("--por-mes", action="store_true", help="um arquivo por mês (caminho_AAAA-MM.ext)")
+    p.add_argument("--inicio", type=_data, help="primeira data (YYYY-MM-DD ou DD/MM/YYYY)")
+    p.add_argument("--fim", type=_data, help="última data")
+    p.add_argument("--categoria")
+    p.add_argument("--termo", help="texto contido na descrição ou categoria")
+    p.set_defaults(func=_exportar)
+    p = sub.add_parser("aplicar-recorrentes", help="lança as ocorrências pendentes dos recorrentes")
+    p.add_argument("--meses", type=int, help="avança no máximo N meses por recorrente")
+    p.set_defaults(func=_aplicar_recorrentes)
+    p = sub.add_parser("relatorio", help="resumo do período (mês/ano opcionais)")
+    p.add_argument("--mes", default="")
+    p.add_argument("--ano", default="")
+    p.set_defaults(func=_relatorio)
+    p = sub.add_parser("tendencias", help="gasto mensal, variação mês a mês e ano a ano e médias móveis")
+    p.add_argument("--inicio", help="primeiro mês (YYYY-MM)")
+    p.add_argument("--fim", help="último mês (YYYY-MM)")
+    p.add_argument("--categoria", default=analise.TOTAL, help=f"categoria (padrão: {analise.TOTAL}, soma de todas)")
+    p.set_defaults(func=_tendencias)
+    p = sub.add_parser("orcamento-mensal", help="orçamento x realizado mês a mês")
+    p.add_argument("--inicio", help="primeiro mês (YYYY-MM)")
+    p.add_argument("--fim", help="último mês (YYYY-MM)")
+    p.set_defaults(func=_orcamento_mensal)
+    p = sub.add_parser("backup", help="backup incremental (só os meses alterados são gravados)")
+    p.add_argument("--diretorio", default=backup.BACKUP_DIR)
+    p.add_argument("--retencao", type=_retencao, help="backups mantidos por hora, dia e mês (padrão: 24,7,12)")
+    p.set_defaults(func=_backup)
+    p = sub.add_parser("listar-backups", help="lista os backups, do mais antigo para o mais recente")
+    p.add_argument("--diretorio", default=backup.BACKUP_DIR)
+    p.set_defaults(func=_listar_backups)
+    p = sub.add_parser("restaurar", help="substitui os dados por um backup")
+    p.add_argument("nome", nargs="?", help="nome listado por listar-backups (padrão: o mais recente)")
+    p.add_argument("--diretorio", default=backup.BACKUP_DIR)
+    p.set_defaults(func=_restaurar)
+    p = sub.add_parser("migrar-sqlite", help="copia o JSON (e journal pendente) para o banco SQLite")
+    p.set_defaults(func=None)
+    return parser
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    args = criar_parser().parse_args(argv)
+    if args.comando == "migrar-sqlite":
+        destino = os.path.splitext(args.arquivo)[0] + ".db"
+        n = migrar_json_para_sqlite(args.arquivo, destino)
+        print(f"{n} gastos migrados para {destino}")
+        return 0
+    ledger = Ledger(args.arquivo, args.modo)
+    try:
+        args.func(ledger, args)
+    except (OSError, ValueError) as e:
+        logging.error("%s", e)
+        return 1
+    finally:
+        ledger.fechar()
+    return 0
@@ -0,0 +1,108 @@
+"""Conversão de datas para ISO (YYYY-MM-DD) sem strptime.
+
+Cada formato aceito é reconhecido pela forma do texto (regex) e o dia/mês são
+validados com uma tabela; `parse_date_to_iso` guarda em cache o resultado das
+strings já vistas. `FormatoDatas` detecta numa amostra de uma fonte (um CSV) o
+formato que serve para todas as linhas, converte o restante só com ele e
+registra quando a amostra serve tanto como DD/MM quanto como MM/DD.
+"""
+import re
+from functools import lru_cache
+
+FORMATOS_DATA = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y", "%Y/%m/%d"]
+TODOS_FORMATOS = FORMATOS_DATA + ["%Y%m%d"]
+NOMES_FORMATO = {"%Y-%m-%d": "AAAA-MM-DD", "%d/%m/%Y": "DD/MM/AAAA", "%d-%m-%Y": "DD-MM-AAAA",
+                 "%m/%d/%Y": "MM/DD/AAAA", "%Y/%m/%d": "AAAA/MM/DD", "%Y%m%d": "AAAAMMDD"}
+CACHE_DATAS = 8192  # strings distintas guardadas por parse_date_to_iso
+
+_ANO_PRIMEIRO = re.compile(r"([0-9]{4})([-/])([0-9]{1,2})\2([0-9]{1,2})\Z")
+_ANO_ULTIMO = re.compile(r"([0-9]{1,2})([-/])([0-9]{1,2})\2([0-9]{4})\Z")
+# formato: (regex, separador, grupos de ano, mês e dia)
+_FORMAS = {
+    "%Y-%m-%d": (_ANO_PRIMEIRO, "-", (1, 3, 4)),
+    "%Y/%m/%d": (_ANO_PRIMEIRO, "/", (1, 3, 4)),
+    "%d/%m/%Y": (_ANO_ULTIMO, "/", (4, 3, 1)),
+    "%d-%m-%Y": (_ANO_ULTIMO, "-", (4, 3, 1)),
+    "%m/%d/%Y": (_ANO_ULTIMO, "/", (4, 1, 3)),
+}
+_DIAS_MES = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+def _iso(ano, mes, dia):
+    if ano < 1 or not 1 <= mes <= 12 or not 1 <= dia <= _DIAS_MES[mes]:
+        return None
+    if mes == 2 and dia == 29 and not (ano % 4 == 0 and (ano % 100 != 0 or ano % 400 == 0)):
+        return None
+    return f"{ano:04d}-{mes:02d}-{dia:02d}"
+
+def converter(s, fmt):
+    """`s` (já sem espaços nas pontas) no formato `fmt` convertido para ISO, ou None."""
+    if fmt == "%Y%m%d":
+        if len(s) == 8 and s.isascii() and s.isdigit():
+            return _iso(int(s[:4]), int(s[4:6]), int(s[6:]))
+        return None
+    regex, sep, (ia, im, idia) = _FORMAS[fmt]
+    m = regex.match(s)
+    if m is None or m[2] != sep:
+        return None
+    return _iso(int(m[ia]), int(m[im]), int(m[idia]))
+
+@lru_cache(maxsize=CACHE_DATAS)
+def _converter_qualquer(s):
+    for fmt in TODOS_FORMATOS:
+        iso = converter(s, fmt)
+        if iso:
+            return iso
+    return None
+
+def parse_date_to_iso(s):
+    """Tenta normalizar várias entradas de data para YYYY-MM-DD ou retorna None."""
+    if not s or not str(s).strip():
+        return None
+    return _converter_qualquer(s.strip())
+
+class FormatoDatas:
+    """Formato de data de uma fonte, detectado uma vez a partir de uma amostra.
+
+    `formato` é o primeiro de TODOS_FORMATOS que converte toda a amostra (ou None).
+    `converter` usa só ele e cai em `parse_date_to_iso` para as linhas que não o
+    seguem, contando-as em `divergentes`. `aviso()` resume ambiguidade e divergências.
+    """
+
+    def __init__(self, amostra):
+        valores = [v.strip() for v in amostra if v and v.strip()]
+        self.validos = [fmt for fmt in TODOS_FORMATOS if valores and all(converter(v, fmt) for v in valores)]
+        self.formato = self.validos[0] if self.validos else None
+        # DD/MM e MM/DD convertem toda a amostra e discordam em alguma linha
+        self.ambiguo = ("%d/%m/%Y" in self.validos and "%m/%d/%Y" in self.validos
+                        and any(converter(v, "%d/%m/%Y") != converter(v, "%m/%d/%Y") for v in valores))
+        self.divergentes = 0
+        self.exemplo_divergente = None
+        self._cache = {}
+
+    def converter(self, s):
+        r = self._cache.get(s)
+        if r is None:
+            t = s.strip()
+            iso = converter(t, self.formato) if self.formato else None
+            divergente = False
+            if iso is None:
+                iso = parse_date_to_iso(t)
+                divergente = bool(iso and self.formato)
+                if divergente and self.exemplo_divergente is None:
+                    self.exemplo_divergente = t
+            if len(self._cache) >= CACHE_DATAS:
+                self._cache.clear()
+            r = self._cache[s] = (iso, divergente)
+        if r[1]:
+            self.divergentes += 1
+        return r[0]
+
+    def aviso(self):
+        """Texto para o usuário quando o formato pode ter sido mal interpretado, ou None."""
+        partes = []
+        if self.ambiguo:
+            partes.append(f"Datas ambíguas: a amostra serve como DD/MM/AAAA e como MM/DD/AAAA; foi usado {NOMES_FORMATO[self.formato]}.")
+        if self.divergentes:
+            partes.append(f"{self.divergentes} datas fora do formato detectado ({NOMES_FORMATO[self.formato]}), "
+                          f"ex.: '{self.exemplo_divergente}'.")
+        return " ".join(partes) or None
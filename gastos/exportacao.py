@@ -0,0 +1,100 @@
+"""Exportação em streaming: os gastos saem do ledger um a um, já filtrados, direto para o arquivo."""
+import csv
+import gzip
+import json
+import os
+
+FORMATOS = ("csv", "jsonl")
+CAMPOS = ["data","categoria","descricao","valor"]
+
+def gastos_filtrados(ledger, inicio=None, fim=None, categoria=None, termo=None):
+    """Gera os gastos que passam pelos filtros da tela, do mais antigo para o mais recente."""
+    gastos = ledger.iterar(inicio, fim)  # carrega antes os anos do período: a pesquisa precisa deles
+    ids = ledger.busca.buscar(termo) if termo else None
+    categoria = categoria.lower() if categoria else None
+    for g in gastos:
+        if categoria and g.get("categoria","Geral").lower() != categoria:
+            continue
+        if ids is not None and g.chave not in ids:
+            continue
+        yield g
+
+def formato_do_arquivo(path):
+    """("csv" | "jsonl", comprimido) a partir da extensão; o padrão é CSV sem compressão."""
+    base, ext = os.path.splitext(path.lower())
+    comprimido = ext == ".gz"
+    if comprimido:
+        ext = os.path.splitext(base)[1]
+    return ("jsonl" if ext in (".jsonl", ".ndjson") else "csv"), comprimido
+
+def _abrir(path, comprimido):
+    if comprimido:
+        return gzip.open(path, "wt", newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+class _EscritorCSV:
+    def __init__(self, f):
+        self._writer = csv.writer(f)
+        self._writer.writerow(CAMPOS)
+
+    def escrever(self, g):
+        self._writer.writerow([g["data"], g.get("categoria","Geral"), g["descricao"], f"{g['valor']:.2f}"])
+
+class _EscritorJSONL:
+    def __init__(self, f):
+        self._f = f
+
+    def escrever(self, g):
+        linha = {"id": g["id"], "data": g["data"], "categoria": g.get("categoria","Geral"), "descricao": g["descricao"], "valor": g["valor"]}
+        self._f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+
+ESCRITORES = {"csv": _EscritorCSV, "jsonl": _EscritorJSONL}
+
+def caminho_do_mes(path, mes):
+    """gastos.csv.gz + 2024-03 -> gastos_2024-03.csv.gz"""
+    sufixo = ".gz" if path.lower().endswith(".gz") else ""
+    raiz, ext = os.path.splitext(path[:len(path) - len(sufixo)])
+    return f"{raiz}_{mes}{ext}{sufixo}"
+
+def exportar(ledger, path, formato=None, comprimido=None, por_mes=False, **filtros):
+    """Grava os gastos filtrados (`filtros`: inicio, fim, categoria, termo) em CSV ou JSON Lines.
+
+    Formato e compressão vêm da extensão quando não informados. Com `por_mes`,
+    grava um arquivo por mês (ver caminho_do_mes) na mesma passada: os gastos
+    chegam em ordem de data, então só um arquivo fica aberto por vez.
+    Retorna (nº de gastos, [arquivos gravados]).
+    """
+    detectado, gz = formato_do_arquivo(path)
+    formato = formato or detectado
+    comprimido = gz if comprimido is None else comprimido
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    n = 0
+    arquivos = []
+    f = escritor = None
+    mes_atual = None
+    try:
+        for g in gastos_filtrados(ledger, **filtros):
+            if f is None or (por_mes and g["data"][:7] != mes_atual):
+                if f is not None:
+                    f.close()
+                mes_atual = g["data"][:7]
+                destino = caminho_do_mes(path, mes_atual) if por_mes else path
+                f = _abrir(destino, comprimido)
+                arquivos.append(destino)
+                escritor = ESCRITORES[formato](f)
+            escritor.escrever(g)
+            n += 1
+        if f is None and not por_mes:
+            # nenhum gasto: ainda assim gera o arquivo (só com cabeçalho, no CSV)
+            f = _abrir(path, comprimido)
+            arquivos.append(path)
+            ESCRITORES[formato](f)
+    finally:
+        if f is not None:
+            f.close()
+    return n, arquivos
+
+def exportar_csv(ledger, path="gastos_export.csv"):
+    """Grava todos os gastos em CSV (data, categoria, descricao, valor). Retorna o nº de linhas."""
+    return exportar(ledger, path, formato="csv", comprimido=False)[0]
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+
+from .datas import FORMATOS_DATA, parse_date_to_iso
+
+def periodo_mes(mes, ano):
+    """(inicio, fim) em ISO para o mês/ano informados; só o ano dá o ano inteiro; sem ano, (None, None)."""
+    if not ano:
+        return None, None
+    if not mes:
+        return f"{int(ano)}-01-01", f"{int(ano)}-12-31"
+    mes, ano = int(mes), int(ano)
+    fim = (datetime(ano, mes, 1) + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    return f"{ano}-{mes:02d}-01", fim.strftime("%Y-%m-%d")
+
+def centavos(valor):
+    return int(round((valor or 0) * 100))
+
+def safe_float(v):
+    try:
+        return float(str(v).replace(",", "."))
+    except:
+        return None
@@ -0,0 +1,219 @@
+"""Histórico persistente de desfazer/refazer.
+
+Cada transação do ledger vira um item {"id", "s", "descricao", "desfazer": [ops], "refazer": [ops]},
+em que "s" é a sessão dona. O arquivo é um log JSON Lines de eventos ("transacao",
+"desfazer", "refazer", "limpar", "fim"); ao abrir, os eventos são reaplicados para
+remontar as duas pilhas. Quando o log cresce muito além do conteúdo vivo, ele é
+reescrito como um único evento "estado".
+
+Transações cujas operações passam de LIMITE_LINHA bytes em JSON (importações e
+exclusões em lote) não vão inteiras para o log: as operações ficam num gzip em
+`<log sem extensão>.lotes/<id>.json.gz` e o item só leva "lote": true. A
+compactação apaga os arquivos de itens que saíram das pilhas.
+
+Várias instâncias podem usar o mesmo log. Cada `Historico` é uma sessão: lê o que as
+outras anexaram e anexa ou compacta sob `trava_arquivo`. Uma sessão só desfaz e
+refaz os itens dela e os de sessões encerradas ("fim", ao fechar o ledger); o item
+passa a ser de quem o moveu.
+"""
+import gzip
+import json
+import os
+import tempfile
+import uuid
+
+from .armazenamento import log, trava_arquivo
+
+LIMITE_HISTORICO = 50  # transações que cada sessão pode desfazer
+LIMITE_LINHA = 64 * 1024  # acima disso (bytes), as operações da transação vão para .lotes/
+
+def _linha(ev):
+    return (json.dumps(ev, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+class Historico:
+    def __init__(self, caminho, limite=LIMITE_HISTORICO):
+        self.caminho = caminho
+        self.limite = limite
+        self.lotes = os.path.splitext(caminho)[0] + ".lotes"
+        self.sessao = uuid.uuid4().hex
+        self._desfazer = None  # carregados na primeira consulta
+        self._refazer = None
+        self._encerradas = set()
+        self._eventos = 0
+        self._inode = None  # versão do log já lida: inode e bytes
+        self._lidos = 0
+        self._anexou = False
+
+    def _atualizar(self):
+        """Lê os eventos anexados desde a última leitura; relê tudo se o log foi compactado por outra sessão.
+        Chamar com a trava do log."""
+        try:
+            st = os.stat(self.caminho)
+        except FileNotFoundError:
+            st = None
+        if self._desfazer is not None and st is not None and st.st_ino == self._inode and st.st_size == self._lidos:
+            return
+        if self._desfazer is None or st is None or st.st_ino != self._inode or st.st_size < self._lidos:
+            self._desfazer, self._refazer, self._encerradas = [], [], set()
+            self._eventos = self._lidos = 0
+            self._inode = st.st_ino if st is not None else None
+            if st is None:
+                return
+        with open(self.caminho, "rb") as f:
+            f.seek(self._lidos)
+            for linha in f:
+                try:
+                    ev = json.loads(linha) if linha.endswith(b"\n") else None
+                except ValueError:
+                    ev = None
+                if ev is None:
+                    # linha cortada por uma queda: o resto do arquivo é descartado na compactação
+                    log.warning("Histórico de desfazer truncado em %s", self.caminho)
+                    self._compactar()
+                    return
+                self._reaplicar(ev)
+                self._eventos += 1
+                self._lidos += len(linha)
+
+    def _reaplicar(self, ev):
+        tipo = ev.get("ev")
+        if tipo == "transacao":
+            t = ev["t"]
+            t.setdefault("id", uuid.uuid4().hex)  # logs antigos: sem id nem dono
+            self._desfazer.append(t)
+            # o limite vale por sessão: descartar a mais antiga da mesma dona
+            mesma = [i for i, x in enumerate(self._desfazer) if x.get("s") == t.get("s")]
+            if len(mesma) > self.limite:
+                del self._desfazer[mesma[0]]
+            # uma transação nova descarta o que a mesma sessão podia refazer
+            self._refazer = [r for r in self._refazer if r.get("s") != t.get("s")]
+        elif tipo in ("desfazer", "refazer"):
+            origem, destino = (self._desfazer, self._refazer) if tipo == "desfazer" else (self._refazer, self._desfazer)
+            t = self._item(origem, ev.get("id"))
+            if t is not None:
+                origem.remove(t)
+                t["s"] = ev.get("s")
+                destino.append(t)
+        elif tipo == "limpar":
+            self._desfazer.clear()
+            self._refazer.clear()
+        elif tipo == "fim":
+            self._encerradas.add(ev.get("s"))
+        elif tipo == "estado":
+            self._desfazer, self._refazer = ev["desfazer"], ev["refazer"]
+
+    @staticmethod
+    def _item(pilha, id_):
+        if id_ is None:  # evento de log antigo: sempre o topo
+            return pilha[-1] if pilha else None
+        for t in reversed(pilha):
+            if t.get("id") == id_:
+                return t
+        return None
+
+    def _livre(self, t):
+        dono = t.get("s")
+        return dono is None or dono == self.sessao or dono in self._encerradas
+
+    def _anexar(self, ev):
+        with trava_arquivo(self.caminho):
+            self._anexar_travado(ev)
+
+    def _anexar_travado(self, ev):
+        self._atualizar()
+        self._reaplicar(ev)
+        with open(self.caminho, "ab") as f:
+            f.write(_linha(ev))
+            self._lidos = f.tell()
+            self._inode = os.fstat(f.fileno()).st_ino
+        self._eventos += 1
+        self._anexou = True
+        if self._eventos > 2 * (len(self._desfazer) + len(self._refazer)) + 32:
+            self._compactar()
+
+    # --- operações de transações grandes, fora do log ---
+    def _arquivo_lote(self, id_):
+        return os.path.join(self.lotes, f"{id_}.json.gz")
+
+    def _gravar_lote(self, id_, conteudo):
+        os.makedirs(self.lotes, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=self.lotes, suffix=".tmp", delete=False) as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode="wb") as gz:
+                gz.write(conteudo)
+        os.replace(tmp.name, self._arquivo_lote(id_))
+
+    def _ler_lote(self, id_):
+        try:
+            with gzip.open(self._arquivo_lote(id_), "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            log.warning("Operações da transação %s não encontradas em %s", id_, self.lotes)
+            return {"desfazer": [], "refazer": []}
+
+    def _podar_lotes(self):
+        """Apaga os arquivos de lote de itens que não estão mais nas pilhas. Chamar com a trava do log."""
+        if not os.path.isdir(self.lotes):
+            return
+        vivos = {t["id"] for t in self._desfazer + self._refazer if t.get("lote")}
+        for nome in os.listdir(self.lotes):
+            if nome.endswith(".json.gz") and nome[:-len(".json.gz")] not in vivos:
+                os.remove(os.path.join(self.lotes, nome))
+
+    def _compactar(self):
+        # itens de sessões encerradas ficam sem dono: qualquer sessão pode desfazê-los
+        def sem_encerradas(pilha):
+            return [dict(t, s=None) if t.get("s") in self._encerradas else t for t in pilha]
+        self._desfazer, self._refazer = sem_encerradas(self._desfazer), sem_encerradas(self._refazer)
+        self._encerradas = set()
+        tmp = self.caminho + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_linha({"ev": "estado", "desfazer": self._desfazer, "refazer": self._refazer}))
+        os.replace(tmp, self.caminho)
+        st = os.stat(self.caminho)
+        self._inode, self._lidos = st.st_ino, st.st_size
+        self._eventos = 1
+        self._podar_lotes()
+
+    def registrar(self, transacao):
+        t = dict(transacao, id=uuid.uuid4().hex, s=self.sessao)
+        with trava_arquivo(self.caminho):
+            conteudo = json.dumps({"desfazer": t["desfazer"], "refazer": t["refazer"]},
+                                  ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            if len(conteudo) > LIMITE_LINHA:
+                self._gravar_lote(t["id"], conteudo)  # antes da linha: o log nunca aponta para um lote ausente
+                t.update(desfazer=[], refazer=[], lote=True)
+            self._anexar_travado({"ev": "transacao", "t": t})
+
+    def _proxima(self, pilha):
+        with trava_arquivo(self.caminho):
+            self._atualizar()
+            t = next((t for t in reversed(pilha()) if self._livre(t)), None)
+            if t is not None and t.get("lote"):
+                t = dict(t, **self._ler_lote(t["id"]))
+            return t
+
+    def proxima_desfazer(self):
+        return self._proxima(lambda: self._desfazer)
+
+    def proxima_refazer(self):
+        return self._proxima(lambda: self._refazer)
+
+    def marcar_desfeita(self, t):
+        self._anexar({"ev": "desfazer", "id": t["id"], "s": self.sessao})
+
+    def marcar_refeita(self, t):
+        self._anexar({"ev": "refazer", "id": t["id"], "s": self.sessao})
+
+    def limpar(self):
+        with trava_arquivo(self.caminho):
+            self._atualizar()
+            if self._desfazer or self._refazer:
+                self._reaplicar({"ev": "limpar"})
+                self._anexou = True
+                self._compactar()  # reescreve o log vazio e apaga os lotes
+
+    def fechar(self):
+        """Encerra a sessão: os itens dela passam a poder ser desfeitos por outras (e na próxima abertura)."""
+        if self._anexou:
+            self._anexar({"ev": "fim", "s": self.sessao})
+            self._anexou = False
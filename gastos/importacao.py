@@ -0,0 +1,384 @@
+import csv
+import itertools
+import json
+import os
+import queue
+import re
+import threading
+import unicodedata
+import uuid
+from collections import Counter
+from functools import lru_cache
+from .armazenamento import log
+from .datas import FormatoDatas, parse_date_to_iso
+from .helpers import centavos, safe_float
+from .registro import Gasto
+
+LOTE_IMPORTACAO = 2000   # gastos por lote entregue à thread do Tk
+AMOSTRA_FORMATOS = 200   # linhas usadas para detectar formato de data e decimal
+
+def mapear_cabecalho(headers):
+    hdr_map = {}
+    for i,h in enumerate(headers):
+        key = h.strip().lower()
+        if key in ("data","date","dia"):
+            hdr_map["data"] = i
+        elif key in ("categoria","category"):
+            hdr_map["categoria"] = i
+        elif key in ("descricao","descrição","description","desc"):
+            hdr_map["descricao"] = i
+        elif key in ("valor","value","amount","amount_br"):
+            hdr_map["valor"] = i
+    return hdr_map
+
+def _campos_brutos(row, hdr_map):
+    # obter valores com fallback por posição quando não há cabeçalho óbvio
+    raw_data = row[hdr_map["data"]] if "data" in hdr_map and hdr_map["data"] < len(row) else row[0] if len(row)>0 else ""
+    raw_cat = row[hdr_map["categoria"]] if "categoria" in hdr_map and hdr_map["categoria"] < len(row) else (row[1] if len(row)>1 else "Geral")
+    raw_desc = row[hdr_map["descricao"]] if "descricao" in hdr_map and hdr_map["descricao"] < len(row) else (row[2] if len(row)>2 else "Importado")
+    raw_val = row[hdr_map["valor"]] if "valor" in hdr_map and hdr_map["valor"] < len(row) else (row[-1] if len(row)>0 else "0")
+    return raw_data, raw_cat, raw_desc, raw_val
+
+def detectar_separador_decimal(amostra):
+    """',' ou '.': o último separador de um valor com ambos decide; só vírgula indica ','."""
+    for v in amostra:
+        if "," in v and "." in v:
+            return "," if v.rfind(",") > v.rfind(".") else "."
+    return "," if any("," in v for v in amostra) else "."
+
+_MILHAR = re.compile(r"[0-9]{1,3}(?:([.,])[0-9]{3})(?:\1[0-9]{3})*\Z")                 # 1.234 / 1,234,567
+_MILHAR_DECIMAL = re.compile(r"([0-9]{1,3}(?:([.,])[0-9]{3})+)([.,])([0-9]{1,2})\Z")     # 1.234,56 / 1,234.5
+
+def converter_valor(s, decimal):
+    """(valor, divergente) de um texto de valor; `decimal` decide só o que o texto não decide sozinho.
+
+    Um único separador seguido de 1 ou 2 dígitos é sempre decimal. Separador de
+    milhar só é retirado de grupos de 3 dígitos (1.234, 1.234.567, 1.234,56).
+    `divergente` indica que o texto contradiz `decimal`; texto irreconhecível dá (None, False).
+    """
+    s = str(s).replace("R$", "").replace(" ", "")
+    sinal = -1 if s.startswith("-") else 1
+    s = s.lstrip("+-")
+    if s.isascii() and s.isdigit():
+        return sinal * float(s), False
+    virgulas, pontos = s.count(","), s.count(".")
+    if virgulas + pontos == 1:
+        sep = "," if virgulas else "."
+        inteiro, _, frac = s.partition(sep)
+        if not (inteiro.isascii() and inteiro.isdigit() and frac.isascii() and frac.isdigit()):
+            return None, False
+        if len(frac) <= 2 or sep == decimal:
+            return sinal * float(f"{inteiro}.{frac}"), sep != decimal
+        if _MILHAR.match(s):
+            return sinal * float(inteiro + frac), False
+        return None, False
+    m = _MILHAR_DECIMAL.match(s)
+    if m and m[2] != m[3]:
+        return sinal * float(f"{m[1].replace(m[2], '')}.{m[4]}"), m[3] != decimal
+    m = _MILHAR.match(s)
+    if m:
+        return sinal * float(s.replace(m[1], "")), m[1] == decimal
+    return None, False
+
+class FormatoValores:
+    """Separador decimal de uma fonte: o padrão vem da amostra, mas cada valor é conferido.
+
+    Valores que contradizem o padrão (ex.: "12,50" num arquivo de "1,234.56") são
+    convertidos pelo que o próprio texto indica e contados em `divergentes`;
+    os que não se encaixam em nenhuma forma vão para os rejeitados de quem chama.
+    """
+
+    def __init__(self, amostra):
+        self.decimal = detectar_separador_decimal(amostra)
+        self.divergentes = 0
+        self.exemplo_divergente = None
+
+    def converter(self, s):
+        valor, divergente = converter_valor(s, self.decimal)
+        if divergente:
+            self.divergentes += 1
+            if self.exemplo_divergente is None:
+                self.exemplo_divergente = str(s).strip()
+        return valor
+
+    def aviso(self):
+        if not self.divergentes:
+            return None
+        return (f"{self.divergentes} valores com separador decimal diferente do detectado ('{self.decimal}'), "
+                f"ex.: '{self.exemplo_divergente}'; foram lidos pelo próprio formato.")
+
+class ImportacaoCSV:
+    """Lê e converte um CSV em lotes de gastos, direto (`lotes`) ou numa thread (`iniciar`).
+
+    O formato de data (`datas`, um FormatoDatas) e o separador decimal (`valores`,
+    um FormatoValores) são detectados uma vez a partir das primeiras AMOSTRA_FORMATOS linhas. Linhas sem data ou valor reconhecíveis são
+    rejeitadas e contadas. Em segundo plano, a fila recebe ("lote", [gastos]) e
+    por fim ("fim", None) ou ("erro", mensagem); quem consome aplica os lotes ao ledger.
+    """
+
+    def __init__(self, path, lote=LOTE_IMPORTACAO):
+        self.path = path
+        self.lote = lote
+        self.fila = queue.Queue(maxsize=4)
+        self.cancelado = threading.Event()
+        self.total_bytes = os.path.getsize(path) or 1
+        self.bytes_lidos = 0
+        self.linhas_lidas = 0
+        self.rejeitados = 0
+        self.datas = None
+        self.valores = None
+        self.thread = threading.Thread(target=self._executar, daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+
+    def cancelar(self):
+        self.cancelado.set()
+
+    def aviso(self):
+        """Avisos de formato de data e de valor para o usuário, ou None."""
+        partes = [a for a in (self.datas and self.datas.aviso(), self.valores and self.valores.aviso()) if a]
+        return " ".join(partes) or None
+
+    @property
+    def progresso(self):
+        return min(1.0, self.bytes_lidos / self.total_bytes)
+
+    def _linhas(self, f):
+        for bruta in f:
+            self.bytes_lidos += len(bruta)
+            yield bruta.decode("utf-8")
+
+    def lotes(self):
+        """Gera listas de até `lote` gastos. ValueError se o CSV estiver vazio."""
+        with open(self.path, "rb") as f:
+            reader = csv.reader(self._linhas(f))
+            headers = next(reader, None)
+            if not headers:
+                raise ValueError("Arquivo CSV vazio.")
+            hdr_map = mapear_cabecalho(headers)
+            amostra = [r for r in itertools.islice(reader, AMOSTRA_FORMATOS) if r]
+            brutos = [_campos_brutos(r, hdr_map) for r in amostra]
+            self.datas = FormatoDatas([b[0] for b in brutos])
+            conv_data = self.datas.converter
+            self.valores = FormatoValores([b[3] for b in brutos])
+            conv_valor = self.valores.converter
+            lote = []
+            for row in itertools.chain(amostra, reader):
+                if self.cancelado.is_set():
+                    return
+                if not row:
+                    continue
+                self.linhas_lidas += 1
+                raw_data, raw_cat, raw_desc, raw_val = _campos_brutos(row, hdr_map)
+                data_iso = conv_data(raw_data)
+                val = conv_valor(raw_val)
+                if not data_iso or val is None:
+                    self.rejeitados += 1
+                    continue
+                lote.append({"id": str(uuid.uuid4()), "descricao": str(raw_desc).strip(), "valor": round(val,2), "data": data_iso, "categoria": str(raw_cat).strip() or "Geral"})
+                if len(lote) >= self.lote:
+                    yield lote
+                    lote = []
+            if lote:
+                yield lote
+
+    def _entregar(self, item):
+        while not self.cancelado.is_set():
+            try:
+                self.fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _executar(self):
+        try:
+            for lote in self.lotes():
+                if not self._entregar(("lote", lote)):
+                    return
+        except (OSError, ValueError, csv.Error) as e:
+            self._entregar(("erro", str(e)))
+            return
+        self._entregar(("fim", None))
+
+def importar_csv(ledger, path, lote=LOTE_IMPORTACAO, deduplicar=True):
+    """Importação síncrona (CLI). Retorna o resultado da Mesclagem (adicionados, ignorados, conflitos, rejeitados).
+
+    Com `deduplicar`, linhas iguais a gastos já lançados (mesma impressão) são ignoradas.
+    """
+    imp = ImportacaoCSV(path, lote)
+    mescla = Mesclagem(ledger, conferir_ids=False)
+    with ledger.transacao("Importar CSV"):
+        for gastos in imp.lotes():
+            novos = mescla.filtrar(gastos) if deduplicar else gastos
+            ledger.adicionar_gastos(novos)
+            if not deduplicar:
+                mescla.adicionados += len(novos)
+            if getattr(ledger.armazenamento, "incremental", False):
+                ledger.salvar()
+    ledger.salvar()
+    if imp.aviso():
+        log.warning("%s", imp.aviso())
+    return dict(mescla.resultado(), rejeitados=imp.rejeitados)
+
+# ---------- Mesclagem ----------
+@lru_cache(maxsize=65536)
+def normalizar_texto(texto):
+    """Minúsculas, sem acentos e com espaços simples: "  Pão  de Açúcar" -> "pao de acucar"."""
+    decomposto = unicodedata.normalize("NFKD", texto.casefold())
+    return " ".join("".join(c for c in decomposto if not unicodedata.combining(c)).split())
+
+def impressao(g):
+    """Impressão do conteúdo de um gasto (Gasto): (data, centavos, descrição e categoria normalizadas)."""
+    return (g.data, g.centavos, normalizar_texto(g.descricao or ""), normalizar_texto(g.categoria or "Geral"))
+
+class Mesclagem:
+    """Filtra gastos recebidos contra o ledger, descartando os que já existem.
+
+    A contagem de impressões do ledger é montada por ano, na primeira vez que
+    chega um gasto daquele ano (no modo particionado, só esses anos são lidos).
+    Um gasto recebido é ignorado enquanto houver no ledger mais gastos com a
+    mesma impressão do que os já recebidos: reimportar um extrato não duplica
+    nada, e duas compras iguais no mesmo dia continuam sendo duas. Com
+    `conferir_ids`, um id que já existe no ledger com outro conteúdo é um conflito
+    e o gasto local é mantido. Deve ser usada na thread que altera o ledger.
+    """
+
+    def __init__(self, ledger, conferir_ids=True):
+        self.ledger = ledger
+        self.conferir_ids = conferir_ids
+        self.adicionados = self.ignorados = self.conflitos = 0
+        self._anos = set()
+        self._existentes = Counter()
+        self._recebidos = Counter()
+        self._ids = {}  # Gasto.chave -> impressão dos gastos aceitos nesta importação
+
+    def _indexar_ano(self, ano):
+        self._anos.add(ano)
+        for g in self.ledger.iterar(f"{ano}-01-01", f"{ano}-12-31"):
+            self._existentes[impressao(g)] += 1
+
+    def filtrar(self, gastos):
+        """Os gastos (dicts ou Gasto) de `gastos` que devem ser adicionados, como Gasto."""
+        registros = [Gasto.de_dict(g) for g in gastos]
+        # gastos locais com os mesmos ids, na ordem em que aparecem em `registros`
+        locais = iter(self.ledger.obter_gastos([r["id"] for r in registros if r.chave is not None]) if self.conferir_ids else ())
+        novos = []
+        for r in registros:
+            imp = impressao(r)
+            if self.conferir_ids and r.chave is not None:
+                local = next(locais)
+                anterior = impressao(local) if local is not None else self._ids.get(r.chave)
+                if anterior is not None:
+                    if anterior == imp:
+                        self.ignorados += 1
+                    else:
+                        self.conflitos += 1
+                    continue
+            ano = imp[0][:4]
+            if ano not in self._anos:
+                self._indexar_ano(ano)
+            self._recebidos[imp] += 1
+            if self._recebidos[imp] <= self._existentes[imp]:
+                self.ignorados += 1
+                continue
+            if r.chave is None:
+                r["id"] = str(uuid.uuid4())
+            if self.conferir_ids:
+                self._ids[r.chave] = imp
+            novos.append(r)
+        self.adicionados += len(novos)
+        return novos
+
+    def resultado(self):
+        return {"adicionados": self.adicionados, "ignorados": self.ignorados, "conflitos": self.conflitos}
+
+def _recorrente(rec):
+    return (normalizar_texto(str(rec.get("descricao", ""))), centavos(safe_float(rec.get("valor")) or 0),
+            rec.get("dia"), normalizar_texto(str(rec.get("categoria", "Geral"))))
+
+def mesclar_meta(ledger, dados):
+    """Acrescenta recorrentes e orçamentos por categoria de `dados` que o ledger não tem.
+
+    Recorrentes iguais (descrição, valor, dia e categoria) não se repetem; um
+    orçamento de categoria com outro limite é conflito e fica o local.
+    Retorna (recorrentes adicionados, orçamentos adicionados, conflitos).
+    """
+    atual = ledger.obter()
+    vistos = {_recorrente(r) for r in atual.get("recorrentes", [])}
+    recs = []
+    for rec in dados.get("recorrentes") or []:
+        if not isinstance(rec, dict) or not rec.get("descricao"):
+            continue
+        chave = _recorrente(rec)
+        if chave not in vistos:
+            vistos.add(chave)
+            recs.append(dict(rec))
+    if recs:
+        atual.setdefault("recorrentes", []).extend(recs)
+        ledger.marcar_alterado("recorrentes")
+    orcamentos = atual.get("orcamentos_categoria", {})
+    novos, conflitos = {}, 0
+    for cat, limite in (dados.get("orcamentos_categoria") or {}).items():
+        if cat not in orcamentos:
+            novos[cat] = limite
+        elif centavos(safe_float(limite) or 0) != centavos(safe_float(orcamentos[cat]) or 0):
+            conflitos += 1
+    if novos:
+        atual.setdefault("orcamentos_categoria", {}).update(novos)
+        ledger.marcar_alterado("orcamentos_categoria")
+    return len(recs), len(novos), conflitos
+
+def _gasto_json(g):
+    """Gasto de um JSON importado com data e valor válidos, ou None."""
+    if not isinstance(g, dict):
+        return None
+    data = parse_date_to_iso(str(g.get("data", "")))
+    valor = g.get("valor")
+    valor = valor if isinstance(valor, (int, float)) and not isinstance(valor, bool) else safe_float(valor)
+    if not data or valor is None:
+        return None
+    return dict(g, data=data, valor=round(valor, 2), descricao=str(g.get("descricao", "")).strip(),
+                categoria=str(g.get("categoria", "")).strip() or "Geral")
+
+def texto_resultado(r):
+    """Resumo de uma importação para mensagens da CLI e da interface."""
+    partes = [f"{r['adicionados']} itens importados", f"{r['ignorados']} já existentes ignorados"]
+    if r.get("conflitos"):
+        partes.append(f"{r['conflitos']} conflitos (mantida a versão atual)")
+    if r.get("rejeitados"):
+        partes.append(f"{r['rejeitados']} rejeitados (data ou valor inválidos)")
+    if r.get("recorrentes"):
+        partes.append(f"{r['recorrentes']} recorrentes")
+    if r.get("orcamentos"):
+        partes.append(f"{r['orcamentos']} orçamentos de categoria")
+    return ", ".join(partes) + "."
+
+# ---------- JSON import ----------
+def importar_json(ledger, caminho, mesclar=False):
+    """Importa o JSON em `caminho`.
+
+    Sem `mesclar`, substitui todos os dados do ledger e retorna None. Com
+    `mesclar`, acrescenta só os gastos, recorrentes e orçamentos que faltam
+    (ver Mesclagem) e retorna o resultado (adicionados, ignorados, conflitos,
+    rejeitados, recorrentes, orcamentos).
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    if not mesclar:
+        ledger.substituir(dados)
+        ledger.salvar()
+        return None
+    if not isinstance(dados, dict):
+        raise ValueError("JSON inválido: esperado um objeto com a lista \"gastos\".")
+    gastos = [_gasto_json(g) for g in dados.get("gastos") or []]
+    validos = [g for g in gastos if g is not None]
+    mescla = Mesclagem(ledger)
+    with ledger.transacao("Mesclar JSON"):
+        ledger.adicionar_gastos(mescla.filtrar(validos))  # um lote só: o arquivo já está todo em memória
+        recorrentes, orcamentos, conflitos = mesclar_meta(ledger, dados)
+    ledger.salvar()
+    r = mescla.resultado()
+    r["conflitos"] += conflitos
+    return dict(r, rejeitados=len(gastos) - len(validos), recorrentes=recorrentes, orcamentos=orcamentos)
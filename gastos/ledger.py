@@ -0,0 +1,591 @@
+import copy
+import os
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+
+from .armazenamento import ARQUIVO_GASTOS, MODO_ARMAZENAMENTO, criar_armazenamento
+from .busca import IndiceBusca
+from .historico import Historico
+from .helpers import periodo_mes
+from .registro import Gasto, chave_id
+
+class Ledger:
+    """Dados carregados uma única vez; só relê o arquivo se mudar no disco.
+
+    Cada mutação é registrada como operação pendente; `salvar` as entrega ao
+    armazenamento (reescrita completa no modo json, append no modo journal).
+    Além da lista em `dados["gastos"]`, mantém os gastos ordenados por data
+    (`_chaves`/`_por_data`), para consultas por período via bisect, um mapa
+    id -> gasto (`_por_id`) para acesso direto, e os totais
+    em centavos por (ano-mês, categoria) em `_totais`, atualizados a cada mutação.
+    Funções em `observadores` recebem (evento, item) a cada gasto incluído
+    ("add"), retirado ("del") ou na reconstrução completa ("reset", lista);
+    o índice de pesquisa (`busca`) é o primeiro deles.
+
+    Toda mutação guarda também as operações que a desfazem e refazem; as de uma
+    mesma `transacao` formam um único passo de `desfazer`/`refazer`, persistido
+    em `historico` (ao lado do arquivo de dados). Substituir todos os dados
+    limpa o histórico. Com várias instâncias no mesmo arquivo, cada uma só desfaz
+    as próprias transações e as de instâncias já fechadas (`fechar`).
+
+    Com um `gravador` (persistencia.GravacaoEmSegundoPlano), `salvar` entrega
+    uma cópia das alterações a ele em vez de gravar na thread atual.
+
+    Os gastos em memória são registros `Gasto` (centavos, data ordinal, id em
+    bytes), convertidos na entrada: o que vem do armazenamento em `_normalizar`,
+    o que vem de quem chama em `adicionar_gasto(s)`. `_por_id` e o índice de
+    pesquisa usam `Gasto.chave`; a API pública recebe o id em texto.
+
+    Várias instâncias podem abrir o mesmo arquivo: o armazenamento grava sob uma
+    trava de arquivo e, se outro processo gravou no meio, aplica só as operações
+    pendentes sobre o disco; `atualizar_do_disco` relê quando o arquivo mudou.
+
+    Com armazenamento particionado por ano, `dados["gastos"]` tem só os anos já
+    carregados; os demais ficam em `_anos_pendentes`, com os totais do manifesto
+    somados a `_totais`, e são carregados quando uma consulta ou mutação os alcança
+    (observadores recebem ("carga", lista)). `carregar_tudo` traz todos.
+    """
+
+    def __init__(self, caminho=None, modo=None, avisar=None, historico=True):
+        self.caminho = caminho or ARQUIVO_GASTOS
+        self.armazenamento = criar_armazenamento(modo or MODO_ARMAZENAMENTO, self.caminho, avisar)
+        self.dados = None
+        self.sujo = False
+        self._pendentes = []
+        self._chaves = []     # (data, -ordem de inserção), crescente
+        self._por_data = []   # gastos na mesma ordem de _chaves
+        self._ordem = {}      # id(gasto) -> ordem de inserção
+        self._por_id = {}     # Gasto.chave -> gasto
+        self._seq = 0
+        self._totais = {}     # "YYYY-MM" -> {categoria: (centavos, quantidade)}
+        self.busca = IndiceBusca()
+        self.observadores = [self.busca.ao_mudar]
+        self.ao_salvar = []  # funções chamadas sem argumentos após cada gravação
+        self.gravador = None
+        self.historico = Historico(os.path.splitext(self.caminho)[0] + ".historico.jsonl") if historico else None
+        self._transacao = None
+        self._nivel_transacao = 0
+        self._aplicando_historico = False
+        self._meta_anterior = {}  # cópia dos campos gravados com "set", para desfazer
+        self._anos_pendentes = {}  # ano -> {"n", "meses"}: anos ainda só no disco (modo particionado)
+
+    def obter(self):
+        # com alterações pendentes o estado em memória prevalece sobre o disco
+        if self.dados is None or (not self.sujo and not self.gravando() and self.armazenamento.mudou_no_disco()):
+            self.recarregar()
+        return self.dados
+
+    def atualizar_do_disco(self):
+        """Relê se outro processo gravou o arquivo depois da última leitura ou gravação deste ledger.
+
+        Para ser chamada periodicamente (só custa um stat). Não relê com alterações
+        ainda não gravadas nem no meio de uma transação: a gravação seguinte aplica
+        as operações pendentes sobre o que o outro processo gravou. Retorna True se releu.
+        """
+        if (self.dados is None or self.sujo or self._nivel_transacao or self.gravando()
+                or not self.armazenamento.mudou_no_disco()):
+            return False
+        self.recarregar()
+        return True
+
+    def recarregar(self):
+        self.dados = self.armazenamento.carregar()
+        self._anos_pendentes = self.armazenamento.anos() if getattr(self.armazenamento, "particionado", False) else {}
+        novos_ids = self._normalizar()
+        self._pendentes = []
+        self.sujo = False
+        if novos_ids:
+            # gastos antigos sem id (ou com id repetido): gravar os ids atribuídos
+            self._registrar({"op": "replace"})
+            self.salvar()
+
+    def _normalizar(self):
+        """Completa chaves ausentes e garante ids únicos. Retorna True se atribuiu ids."""
+        for chave, padrao in (("gastos", []), ("orcamento_inicial", 0.0), ("orcamentos_categoria", {}), ("recorrentes", [])):
+            self.dados.setdefault(chave, padrao)
+        self.dados["gastos"] = [Gasto.de_dict(g) for g in self.dados["gastos"]]
+        vistos = set()
+        novos_ids = False
+        for g in self.dados["gastos"]:
+            if g.chave is None or g.chave in vistos:
+                g["id"] = str(uuid.uuid4())
+                novos_ids = True
+            vistos.add(g.chave)
+        self._meta_anterior = {k: copy.deepcopy(v) for k, v in self.dados.items() if k != "gastos"}
+        self._reindexar()
+        return novos_ids
+
+    # --- índice por data e totais agregados ---
+    # empates na data ficam em ordem de inserção quando a fatia é lida de trás para frente
+    def _reindexar(self):
+        gastos = self.dados["gastos"]
+        self._ordem = {id(g): i for i, g in enumerate(gastos)}
+        self._por_id = {g.chave: g for g in gastos}
+        self._seq = len(gastos)
+        pares = sorted(((g.data, -i), g) for i, g in enumerate(gastos))
+        self._chaves = [k for k, _ in pares]
+        self._por_data = [g for _, g in pares]
+        self._totais = {}
+        for g in gastos:
+            self._agregar(g, 1)
+        for ano in self._anos_pendentes.values():
+            self._somar_totais(ano["meses"], 1)
+        self._notificar("reset", gastos)
+
+    def _notificar(self, evento, item):
+        for cb in self.observadores:
+            cb(evento, item)
+
+    def _agregar(self, g, sinal):
+        mes = g.data[:7]
+        cat = g.categoria if g.categoria is not None else "Geral"
+        por_cat = self._totais.setdefault(mes, {})
+        total, qtd = por_cat.get(cat, (0, 0))
+        total += sinal * g.centavos
+        qtd += sinal
+        if qtd:
+            por_cat[cat] = (total, qtd)
+        else:
+            del por_cat[cat]
+            if not por_cat:
+                del self._totais[mes]
+
+    def _somar_totais(self, meses, sinal):
+        """Soma (ou subtrai) totais no formato do manifesto: {mês: {categoria: [centavos, quantidade]}}."""
+        for mes, por_cat_ano in meses.items():
+            por_cat = self._totais.setdefault(mes, {})
+            for cat, (total, qtd) in por_cat_ano.items():
+                t0, q0 = por_cat.get(cat, (0, 0))
+                if q0 + sinal * qtd:
+                    por_cat[cat] = (t0 + sinal * total, q0 + sinal * qtd)
+                else:
+                    por_cat.pop(cat, None)
+            if not por_cat:
+                del self._totais[mes]
+
+    # --- anos sob demanda (armazenamento particionado) ---
+    def _garantir(self, inicio=None, fim=None):
+        """Carrega os anos pendentes que cruzam [inicio, fim] (extremos opcionais)."""
+        if self._anos_pendentes:
+            anos = [a for a in self._anos_pendentes if (not inicio or a >= inicio[:4]) and (not fim or a <= fim[:4])]
+            if anos:
+                self._carregar_anos(anos)
+
+    def _garantir_datas(self, datas):
+        if self._anos_pendentes:
+            anos = {d[:4] for d in datas} & self._anos_pendentes.keys()
+            if anos:
+                self._carregar_anos(anos)
+
+    def _carregar_anos(self, anos):
+        novos = [Gasto.de_dict(g) for g in self.armazenamento.carregar_anos(anos)]
+        for ano in anos:
+            self._somar_totais(self._anos_pendentes.pop(ano)["meses"], -1)
+        self.dados["gastos"].extend(novos)
+        self._inserir_ordenados(novos)
+        self._notificar("carga", novos)
+
+    def carregar_tudo(self):
+        """Traz para a memória os anos ainda não carregados (backup, substituição completa)."""
+        self.obter()
+        self._garantir()
+
+    def _indexar(self, g, ordem=None):
+        if ordem is None:
+            self._seq += 1
+            ordem = self._seq
+        self._ordem[id(g)] = ordem
+        self._por_id[g.chave] = g
+        chave = (g.data, -ordem)
+        pos = bisect_left(self._chaves, chave)
+        self._chaves.insert(pos, chave)
+        self._por_data.insert(pos, g)
+        self._agregar(g, 1)
+        self._notificar("add", g)
+
+    def _desindexar(self, g):
+        ordem = self._ordem.pop(id(g))
+        del self._por_id[g.chave]
+        pos = bisect_left(self._chaves, (g.data, -ordem))
+        del self._chaves[pos]
+        del self._por_data[pos]
+        self._agregar(g, -1)
+        self._notificar("del", g)
+        return ordem
+
+    def intervalo(self, inicio=None, fim=None):
+        """Gastos com inicio <= data <= fim (extremos opcionais), da data mais recente para a mais antiga."""
+        self.obter()
+        self._garantir(inicio, fim)
+        lo = bisect_left(self._chaves, (inicio,)) if inicio else 0
+        hi = bisect_right(self._chaves, (fim, 1)) if fim else len(self._chaves)
+        return self._por_data[lo:hi][::-1]
+
+    def iterar(self, inicio=None, fim=None):
+        """Como `intervalo`, mas gera os gastos da data mais antiga para a mais recente, sem copiar a fatia.
+
+        O ledger não deve ser alterado enquanto o gerador estiver em uso. Os anos
+        do período já estão carregados quando `iterar` retorna (e não só no
+        primeiro item), então o índice de pesquisa pode ser consultado em seguida.
+        """
+        self.obter()
+        self._garantir(inicio, fim)
+        lo = bisect_left(self._chaves, (inicio,)) if inicio else 0
+        hi = bisect_right(self._chaves, (fim, 1)) if fim else len(self._chaves)
+        return map(self._por_data.__getitem__, range(lo, hi))
+
+    def salvar(self):
+        """Grava as alterações pendentes, se houver. Retorna True se gravou."""
+        if not self.sujo or self.dados is None:
+            return False
+        if self.gravador is not None:
+            self.gravador.enviar(*self._copiar_para_gravar())
+        else:
+            self.armazenamento.gravar(self.dados, self._pendentes)
+        self._pendentes = []
+        self.sujo = False
+        for cb in self.ao_salvar:
+            cb()
+        return True
+
+    def gravando(self):
+        """True enquanto o gravador em segundo plano tiver alterações ainda não gravadas."""
+        return self.gravador is not None and self.gravador.pendente()
+
+    def _copiar_para_gravar(self):
+        """(dados, ops) que outra thread pode serializar enquanto o ledger continua mudando.
+
+        Armazenamentos incrementais só precisam dos dados completos ao substituir tudo.
+        """
+        ops = [dict(op, gasto=op["gasto"].copia()) if "gasto" in op else copy.deepcopy(op) for op in self._pendentes]
+        dados = None
+        if not getattr(self.armazenamento, "incremental", False) or any(op.get("op") == "replace" for op in ops):
+            dados = {k: copy.deepcopy(v) for k, v in self.dados.items() if k != "gastos"}
+            dados["gastos"] = [g.copia() for g in self.dados["gastos"]]
+        return dados, ops
+
+    def fechar(self, descartar=False):
+        """Grava o pendente e só então fecha gravador, histórico e armazenamento.
+
+        Se a gravação falhar, o erro sobe e nada é fechado: o ledger continua
+        utilizável. Com `descartar`, fecha sem gravar o que falta.
+        """
+        if not descartar:
+            self.salvar()
+            if self.gravador is not None:
+                self.gravador.esvaziar()
+        if self.gravador is not None:
+            self.gravador.fechar(esvaziar=not descartar)
+        if self.historico:
+            self.historico.fechar()
+        self.armazenamento.fechar()
+
+    def _registrar(self, op):
+        self._pendentes.append(op)
+        self.sujo = True
+
+    def marcar_alterado(self, chave=None):
+        """Para mutações feitas direto em `dados`: `chave` regrava só esse campo; sem ela, tudo."""
+        if chave:
+            valor = copy.deepcopy(self.dados[chave])
+            self._memorizar(f"Alterar {chave}", {"op": "set", "chave": chave, "valor": self._meta_anterior.get(chave)},
+                            {"op": "set", "chave": chave, "valor": valor})
+            self._meta_anterior[chave] = valor
+            self._registrar({"op": "set", "chave": chave, "valor": self.dados[chave]})
+        else:
+            self._garantir()
+            self._reindexar()
+            self._registrar({"op": "replace"})
+            if self.historico and not self._aplicando_historico:
+                self.historico.limpar()
+
+    # --- transações e histórico ---
+    def iniciar_transacao(self, descricao=None):
+        """Abre (ou aninha) uma transação; use `transacao` quando couber num bloco `with`."""
+        if self._nivel_transacao == 0:
+            self._transacao = {"descricao": descricao, "desfazer": [], "refazer": []}
+        self._nivel_transacao += 1
+
+    def concluir_transacao(self):
+        self._nivel_transacao -= 1
+        if self._nivel_transacao:
+            return
+        t, self._transacao = self._transacao, None
+        if t["desfazer"] and self.historico:
+            t["desfazer"].reverse()
+            self.historico.registrar(t)
+
+    @contextmanager
+    def transacao(self, descricao=None):
+        self.iniciar_transacao(descricao)
+        try:
+            yield
+        finally:
+            self.concluir_transacao()
+
+    def _memorizar(self, descricao, desfazer, refazer):
+        if self._aplicando_historico or not self.historico:
+            return
+        with self.transacao(descricao):
+            t = self._transacao
+            t["descricao"] = t["descricao"] or descricao
+            t["desfazer"].append(desfazer)
+            t["refazer"].append(refazer)
+
+    def desfazer(self):
+        """Desfaz a última transação. Retorna sua descrição ou None se não havia o que desfazer."""
+        return self._passo_historico(self.historico.proxima_desfazer() if self.historico else None, "desfazer")
+
+    def refazer(self):
+        return self._passo_historico(self.historico.proxima_refazer() if self.historico else None, "refazer")
+
+    def _passo_historico(self, t, lado):
+        if t is None:
+            return None
+        self.obter()
+        self._aplicando_historico = True
+        try:
+            for op in t[lado]:
+                self._aplicar_op(op)
+        finally:
+            self._aplicando_historico = False
+        if lado == "desfazer":
+            self.historico.marcar_desfeita(t)
+        else:
+            self.historico.marcar_refeita(t)
+        return t["descricao"]
+
+    def _aplicar_op(self, op):
+        # tolerante: o arquivo pode ter mudado desde que o histórico foi gravado
+        tipo = op["op"]
+        if tipo == "add":
+            self.adicionar_gastos([dict(g) for g in op["gastos"] if chave_id(g["id"]) not in self._por_id])
+        elif tipo == "restaurar":
+            self._restaurar_gastos([(apos, dict(g)) for apos, g in op["itens"] if chave_id(g["id"]) not in self._por_id])
+        elif tipo == "del":
+            self.remover_gastos(op["ids"])
+        elif tipo == "edit":
+            self.atualizar_gasto(op["id"], **op["campos"])
+        elif tipo == "set":
+            self.dados[op["chave"]] = copy.deepcopy(op["valor"])
+            self.marcar_alterado(op["chave"])
+
+    # --- mutações ---
+    def adicionar_gasto(self, gasto):
+        """Inclui o gasto (dict ou Gasto) e retorna o registro guardado."""
+        gasto = Gasto.de_dict(gasto)
+        gastos = self.obter()["gastos"]
+        self._garantir_datas([gasto.data])
+        gastos.append(gasto)
+        self._indexar(gasto)
+        self._registrar({"op": "add", "gasto": gasto})
+        self._memorizar("Adicionar gasto", {"op": "del", "ids": [gasto["id"]]}, {"op": "add", "gastos": [gasto.para_dict()]})
+        return gasto
+
+    def adicionar_gastos(self, novos):
+        """Inclusão em lote: lotes grandes entram no índice por data com uma única ordenação."""
+        if not novos:
+            return
+        novos = [Gasto.de_dict(g) for g in novos]
+        self.obter()
+        self._garantir_datas({g.data for g in novos})
+        self.dados["gastos"].extend(novos)
+        self._indexar_lote(novos)
+        self._memorizar(f"Adicionar {len(novos)} gastos", {"op": "del", "ids": [g["id"] for g in novos]},
+                        {"op": "add", "gastos": [g.para_dict() for g in novos]})
+
+    def _indexar_lote(self, novos):
+        for g in novos:
+            self._registrar({"op": "add", "gasto": g})
+        if len(novos) < 64:
+            for g in novos:
+                self._indexar(g)
+            return
+        self._inserir_ordenados(novos)
+        for g in novos:
+            self._notificar("add", g)
+
+    def _inserir_ordenados(self, novos):
+        """Índices e totais de muitos gastos com uma única ordenação, sem notificar observadores."""
+        pares = list(zip(self._chaves, self._por_data))
+        for g in novos:
+            self._seq += 1
+            self._ordem[id(g)] = self._seq
+            self._por_id[g.chave] = g
+            pares.append(((g.data, -self._seq), g))
+            self._agregar(g, 1)
+        pares.sort(key=lambda p: p[0])
+        self._chaves = [k for k, _ in pares]
+        self._por_data = [g for _, g in pares]
+
+    def _restaurar_gastos(self, itens):
+        """Reinsere gastos excluídos: cada (id do anterior, gasto) volta logo após o gasto anterior."""
+        if not itens:
+            return
+        itens = [(apos, Gasto.de_dict(g)) for apos, g in itens]
+        self._garantir_datas({g.data for _, g in itens})
+        seguintes = defaultdict(list)
+        for apos, g in itens:
+            seguintes[chave_id(apos) if apos else None].append(g)
+        resultado = []
+        def despejar(chave):
+            pilha = seguintes.pop(chave, [])[::-1]
+            while pilha:
+                g = pilha.pop()
+                resultado.append(g)
+                pilha.extend(seguintes.pop(g.chave, [])[::-1])
+        despejar(None)
+        for g in self.dados["gastos"]:
+            resultado.append(g)
+            despejar(g.chave)
+        for chave in list(seguintes):
+            # o anterior não existe mais: vai para o fim
+            for g in seguintes.pop(chave, []):
+                resultado.append(g)
+                despejar(g.chave)
+        self.dados["gastos"][:] = resultado
+        self._indexar_lote([g for _, g in itens])
+
+    def obter_gasto(self, gasto_id):
+        self.obter()
+        chave = chave_id(gasto_id)
+        g = self._por_id.get(chave)
+        if g is None and self._anos_pendentes:
+            self._garantir()  # o id não diz o ano: só resta carregar o que falta
+            g = self._por_id.get(chave)
+        return g
+
+    def obter_gastos(self, ids):
+        """[gasto ou None] para cada id de `ids`, com uma só verificação do arquivo."""
+        self.obter()
+        chaves = [chave_id(i) for i in ids]
+        if self._anos_pendentes and any(c not in self._por_id for c in chaves):
+            self._garantir()
+        return [self._por_id.get(c) for c in chaves]
+
+    def atualizar_gasto(self, gasto_id, **campos):
+        g = self.obter_gasto(gasto_id)
+        if g is None:
+            return None
+        if "data" in campos:
+            self._garantir_datas([campos["data"]])
+        antes = {k: g.get(k) for k in campos}
+        ordem = self._desindexar(g)
+        g.update(campos)
+        self._indexar(g, ordem)
+        self._registrar({"op": "edit", "id": gasto_id, "campos": campos})
+        self._memorizar("Editar gasto", {"op": "edit", "id": gasto_id, "campos": antes}, {"op": "edit", "id": gasto_id, "campos": dict(campos)})
+        return g
+
+    def remover_gasto(self, gasto_id):
+        """Remove pelo id e retorna (indice, item) ou (None, None)."""
+        removidos = self.remover_gastos([gasto_id])
+        return removidos[0] if removidos else (None, None)
+
+    def remover_gastos(self, ids):
+        """Remove vários gastos numa só passada pela lista. Retorna [(indice, item)] em ordem de índice."""
+        alvos = {id(g): g for g in (self.obter_gasto(i) for i in ids) if g is not None}
+        if not alvos:
+            return []
+        gastos = self.dados["gastos"]
+        removidos = [(i, g) for i, g in enumerate(gastos) if id(g) in alvos]
+        itens = [(gastos[i-1]["id"] if i else None, g.para_dict()) for i, g in removidos]
+        gastos[:] = [g for g in gastos if id(g) not in alvos]
+        for _, g in removidos:
+            self._desindexar(g)
+            self._registrar({"op": "del", "id": g["id"]})
+        self._memorizar("Excluir gasto" if len(removidos) == 1 else f"Excluir {len(removidos)} gastos",
+                        {"op": "restaurar", "itens": itens}, {"op": "del", "ids": [g["id"] for _, g in removidos]})
+        return removidos
+
+    def adicionar_recorrente(self, rec):
+        self.obter().setdefault("recorrentes", []).append(rec)
+        self.marcar_alterado("recorrentes")
+
+    def definir_orcamento_categoria(self, nome, valor):
+        self.obter().setdefault("orcamentos_categoria", {})[nome] = valor
+        self.marcar_alterado("orcamentos_categoria")
+
+    def definir_orcamento_inicial(self, valor):
+        self.obter()["orcamento_inicial"] = valor
+        self.marcar_alterado("orcamento_inicial")
+
+    # --- consultas ---
+    def _consulta_nativa(self):
+        return not self.sujo and not self.gravando() and getattr(self.armazenamento, "consultas_nativas", False)
+
+    def consultar(self, inicio=None, fim=None, categoria=None, termo=None):
+        """Gastos em [inicio, fim] (datas ISO), do mais recente para o mais antigo."""
+        self.obter()
+        self._garantir(inicio, fim)
+        if termo:
+            return self._pesquisar(termo, inicio, fim, categoria)
+        if self._consulta_nativa():
+            gastos = self.armazenamento.consultar(inicio, fim, categoria)
+        else:
+            gastos = self.intervalo(inicio, fim)
+            if categoria:
+                gastos = [g for g in gastos if g.get("categoria","Geral").lower() == categoria.lower()]
+        return gastos
+
+    def _pesquisar(self, termo, inicio, fim, categoria):
+        ids = self.busca.buscar(termo)
+        lo = bisect_left(self._chaves, (inicio,)) if inicio else 0
+        hi = bisect_right(self._chaves, (fim, 1)) if fim else len(self._chaves)
+        if len(ids) * 4 < hi - lo:
+            # poucos candidatos: ordenar só eles sai mais barato que varrer o período
+            gastos = [g for g in map(self._por_id.get, ids) if (not inicio or g.data >= inicio) and (not fim or g.data <= fim)]
+            gastos.sort(key=lambda g: (g.data, -self._ordem[id(g)]), reverse=True)
+        else:
+            gastos = [g for g in reversed(self._por_data[lo:hi]) if g.chave in ids]
+        if categoria:
+            gastos = [g for g in gastos if g.get("categoria","Geral").lower() == categoria.lower()]
+        return gastos
+
+    def _meses_inteiros(self, inicio, fim):
+        """Meses com totais cobertos por [inicio, fim], ou None se o período corta algum mês."""
+        if inicio and not inicio.endswith("-01"):
+            return None
+        if fim and fim != periodo_mes(fim[5:7], fim[:4])[1]:
+            return None
+        return [m for m in self._totais if (not inicio or m >= inicio[:7]) and (not fim or m <= fim[:7])]
+
+    def totais_por_categoria(self, inicio=None, fim=None, categoria=None):
+        """Total por categoria no período; meses inteiros saem direto de `_totais`."""
+        self.obter()
+        meses = self._meses_inteiros(inicio, fim)
+        if meses is not None:
+            por_cat = defaultdict(int)
+            for m in meses:
+                for cat, (total, _) in self._totais[m].items():
+                    if not categoria or cat == categoria:
+                        por_cat[cat] += total
+            return {cat: total / 100 for cat, total in por_cat.items()}
+        if self._consulta_nativa():
+            return self.armazenamento.totais_por_categoria(inicio, fim, categoria)
+        por_cat = defaultdict(int)
+        for g in self.intervalo(inicio, fim):
+            cat = g.categoria if g.categoria is not None else "Geral"
+            if categoria and cat != categoria:
+                continue
+            por_cat[cat] += g.centavos
+        return {cat: total / 100 for cat, total in por_cat.items()}
+
+    def categorias(self):
+        """Categorias com algum gasto, inclusive nos anos ainda não carregados."""
+        self.obter()
+        return {cat for por_cat in self._totais.values() for cat in por_cat}
+
+    def totais_mensais(self):
+        """{"YYYY-MM": {categoria: centavos}} de todos os meses com gastos."""
+        self.obter()
+        return {m: {cat: total for cat, (total, _) in por_cat.items()} for m, por_cat in self._totais.items()}
+
+    def substituir(self, dados):
+        self.dados = dados
+        self._anos_pendentes = {}
+        self._normalizar()
+        self._pendentes = []
+        self.marcar_alterado()
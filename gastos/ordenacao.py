@@ -0,0 +1,67 @@
+"""Ordenação da lista de gastos da tela, fora do Treeview.
+
+As linhas são (número, gasto), com o número dado pela ordem da consulta (data
+mais recente primeiro). A chave de cada coluna vem dos campos tipados do
+registro: centavos inteiros para o valor, a data ISO, textos em casefold. A
+lista de chaves de uma coluna é montada uma vez para as linhas atuais e
+reaproveitada nos cliques seguintes. Vários critérios são aplicados do menos
+para o mais importante com sort estável, então "categoria, depois data" mantém
+a ordem de data dentro de cada categoria.
+"""
+# coluna -> chaves de todas as linhas, numa passada só
+_CHAVES = {
+    "#": lambda linhas: [n for n, _ in linhas],
+    "data": lambda linhas: [g.data for _, g in linhas],
+    "categoria": lambda linhas: [(g.categoria if g.categoria is not None else "Geral").casefold() for _, g in linhas],
+    "descricao": lambda linhas: [(g.descricao or "").casefold() for _, g in linhas],
+    "valor": lambda linhas: [g.centavos for _, g in linhas],
+}
+
+class Ordenacao:
+    """Critérios [(coluna, decrescente)], do principal para o desempate; vazia mantém a ordem da consulta."""
+
+    def __init__(self, criterios=()):
+        self.criterios = list(criterios)
+        self._linhas = []
+        self._chaves = {}  # coluna -> [chave de cada linha de _linhas]
+
+    def clicar(self, coluna, acumular=False):
+        """Clique no cabeçalho: sem `acumular`, ordena só por `coluna` (de novo inverte o sentido);
+        com `acumular` (Shift), acrescenta `coluna` como desempate ou inverte o sentido dela."""
+        atual = dict(self.criterios)
+        if acumular:
+            if coluna in atual:
+                self.criterios = [(c, not d if c == coluna else d) for c, d in self.criterios]
+            else:
+                self.criterios.append((coluna, False))
+        elif len(self.criterios) == 1 and coluna in atual:
+            self.criterios = [(coluna, not atual[coluna])]
+        else:
+            self.criterios = [(coluna, False)]
+
+    def _chaves_de(self, coluna):
+        chaves = self._chaves.get(coluna)
+        if chaves is None:
+            chaves = self._chaves[coluna] = _CHAVES[coluna](self._linhas)
+        return chaves
+
+    def aplicar(self, linhas=None):
+        """`linhas` na ordem dos critérios; sem `linhas`, reordena as da última chamada."""
+        if linhas is not None:
+            self._linhas = linhas
+            self._chaves = {}
+        if not self.criterios:
+            return list(self._linhas)
+        ordem = list(range(len(self._linhas)))
+        for coluna, decrescente in reversed(self.criterios):
+            ordem.sort(key=self._chaves_de(coluna).__getitem__, reverse=decrescente)
+        linhas = self._linhas
+        return [linhas[i] for i in ordem]
+
+    def indicador(self, coluna):
+        """Seta (e posição, com mais de um critério) para o cabeçalho da coluna, ou ""."""
+        for i, (c, decrescente) in enumerate(self.criterios):
+            if c == coluna:
+                seta = "▼" if decrescente else "▲"
+                return f"{seta}{i + 1}" if len(self.criterios) > 1 else seta
+        return ""
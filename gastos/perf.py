@@ -0,0 +1,194 @@
+"""Instrumentação opcional de desempenho (GASTOS_PERF=1 ou menu Desempenho da GUI).
+
+Funções envolvidas com `Medidor.envolver` / `Medidor.instrumentar` têm o tempo
+de cada chamada registrado por nome; a chamada mais externa é a "ação" e os
+contadores de `contar` (linhas inseridas, bytes lidos/gravados, carregamentos)
+feitos durante ela ficam associados a ela. Desligado, o custo é um teste de flag.
+Só a thread que criou o medidor é medida: threads de fundo não misturam contagens.
+Um trecho de thread de fundo envolvido por `em_segundo_plano` vira uma ação à
+parte, com os próprios contadores, registrada quando a thread principal chama
+`descarregar`.
+"""
+import cProfile
+import functools
+import os
+import pstats
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+ATIVO = os.environ.get("GASTOS_PERF", "") not in ("", "0")
+AMOSTRAS = 200  # tempos guardados por operação para o p95
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * (len(ordenados) - 1) + 0.5))]
+
+class Medidor:
+    def __init__(self, ativo=ATIVO, amostras=AMOSTRAS):
+        self.ativo = ativo
+        self.amostras = amostras
+        self.tempos = {}             # operação -> deque de segundos
+        self.chamadas = Counter()
+        self.contadores = {}         # ação -> contadores da última execução
+        self.totais = Counter()      # contadores acumulados de todas as ações
+        self.ultima = None           # (ação, segundos, contadores)
+        self.ao_medir = []           # callbacks (ação, segundos, contadores) ao fim de cada ação
+        self.ao_perfil = []          # callbacks (caminho) quando a captura do cProfile é gravada
+        self._thread = threading.get_ident()
+        self._profundidade = 0
+        self._atual = Counter()
+        self._perfil = None
+        self._perfil_restante = 0
+        self._perfil_destino = None
+        self._fundo = threading.local()  # .atual: contadores do trecho em segundo plano da thread
+        self._concluidas_fundo = deque()  # (nome, segundos, contadores) ainda não registradas
+
+    def contar(self, nome, n=1):
+        if not self.ativo:
+            return
+        if threading.get_ident() == self._thread:
+            self._atual[nome] += n
+            self.totais[nome] += n
+        else:
+            atual = getattr(self._fundo, "atual", None)
+            if atual is not None:
+                atual[nome] += n
+
+    @contextmanager
+    def em_segundo_plano(self, nome):
+        """Mede um trecho de uma thread de fundo como a ação `nome` (ver `descarregar`)."""
+        if not self.ativo:
+            yield
+            return
+        self._fundo.atual = atual = Counter()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._fundo.atual = None
+            self._concluidas_fundo.append((nome, time.perf_counter() - t0, dict(atual)))
+
+    def descarregar(self):
+        """Na thread principal: registra as ações de fundo concluídas (tempos, contadores, `ao_medir`)."""
+        while self._concluidas_fundo:
+            nome, dt, contadores = self._concluidas_fundo.popleft()
+            self._amostrar(nome, dt)
+            self.totais.update(contadores)
+            self._publicar(nome, dt, contadores)
+
+    def envolver(self, nome, func, contador=None):
+        """`func` medida como `nome`; `contador` (opcional) é incrementado a cada chamada."""
+        @functools.wraps(func)
+        def medida(*args, **kwargs):
+            if not self.ativo or threading.get_ident() != self._thread:
+                return func(*args, **kwargs)
+            return self._medir(nome, contador, func, args, kwargs)
+        return medida
+
+    def instrumentar(self, obj, metodos, prefixo, contadores=None):
+        """Troca métodos de `obj` (na instância) pelas versões medidas `prefixo.metodo`."""
+        contadores = contadores or {}
+        for m in metodos:
+            setattr(obj, m, self.envolver(f"{prefixo}.{m}", getattr(obj, m), contadores.get(m)))
+
+    def _medir(self, nome, contador, func, args, kwargs):
+        topo = self._profundidade == 0
+        if topo:
+            self._atual = Counter()
+            if self._perfil is not None:
+                self._perfil.enable()
+        if contador:
+            self.contar(contador)
+        self._profundidade += 1
+        t0 = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            dt = time.perf_counter() - t0
+            self._profundidade -= 1
+            self._amostrar(nome, dt)
+            if topo:
+                self._concluir_acao(nome, dt)
+
+    def _amostrar(self, nome, dt):
+        amostras = self.tempos.get(nome)
+        if amostras is None:
+            amostras = self.tempos[nome] = deque(maxlen=self.amostras)
+        amostras.append(dt)
+        self.chamadas[nome] += 1
+
+    def _concluir_acao(self, nome, dt):
+        if self._perfil is not None:
+            self._perfil.disable()
+            self._perfil_restante -= 1
+            if self._perfil_restante <= 0:
+                self._gravar_perfil()
+        self._publicar(nome, dt, dict(self._atual))
+
+    def _publicar(self, nome, dt, contadores):
+        self.contadores[nome] = contadores
+        self.ultima = (nome, dt, contadores)
+        for cb in self.ao_medir:
+            cb(nome, dt, contadores)
+
+    # ---------- cProfile ----------
+    def perfilar(self, n, destino):
+        """Captura as próximas `n` ações com cProfile e grava em `destino` (formato pstats).
+
+        Ao lado vai `destino` + ".txt" com as funções ordenadas por tempo acumulado.
+        """
+        self._perfil = cProfile.Profile()
+        self._perfil_restante = n
+        self._perfil_destino = destino
+
+    def perfilando(self):
+        return self._perfil_restante if self._perfil is not None else 0
+
+    def _gravar_perfil(self):
+        perfil, destino = self._perfil, self._perfil_destino
+        self._perfil = None
+        self._perfil_restante = 0
+        perfil.dump_stats(destino)
+        with open(destino + ".txt", "w", encoding="utf-8") as f:
+            pstats.Stats(perfil, stream=f).sort_stats("cumulative").print_stats(40)
+        for cb in self.ao_perfil:
+            cb(destino)
+
+    # ---------- Relatório ----------
+    def p95(self, nome):
+        return percentil(self.tempos.get(nome, ()), 0.95)
+
+    def resumo(self):
+        """[{"operacao", "chamadas", "ultimo_ms", "p95_ms", "contadores"}] ordenado pelo p95."""
+        linhas = []
+        for nome, amostras in self.tempos.items():
+            linhas.append({"operacao": nome, "chamadas": self.chamadas[nome], "ultimo_ms": amostras[-1] * 1000,
+                           "p95_ms": percentil(amostras, 0.95) * 1000, "contadores": self.contadores.get(nome, {})})
+        linhas.sort(key=lambda l: l["p95_ms"], reverse=True)
+        return linhas
+
+    def texto_resumo(self):
+        linhas = [f"{'operação':<32} {'n':>6} {'último ms':>10} {'p95 ms':>10}  contadores"]
+        for l in self.resumo():
+            cont = ", ".join(f"{k}={v}" for k, v in sorted(l["contadores"].items()))
+            linhas.append(f"{l['operacao']:<32} {l['chamadas']:>6} {l['ultimo_ms']:>10.2f} {l['p95_ms']:>10.2f}  {cont}")
+        return "\n".join(linhas)
+
+    def limpar(self):
+        self._concluidas_fundo.clear()
+        self.tempos.clear()
+        self.chamadas.clear()
+        self.contadores.clear()
+        self.totais.clear()
+        self.ultima = None
+
+medidor = Medidor()
+
+def contar(nome, n=1):
+    """Contador da ação em andamento no medidor global (nada acontece se desligado)."""
+    if medidor.ativo:
+        medidor.contar(nome, n)
@@ -0,0 +1,105 @@
+"""Gravação em segundo plano (write-behind) para a interface.
+
+Com um `GravacaoEmSegundoPlano` ligado ao ledger, `Ledger.salvar` só copia as
+alterações e as entrega aqui; a serialização e o fsync acontecem numa thread.
+Gravações que chegam enquanto outra espera ou está em andamento são agrupadas
+numa só. Uma gravação que falha fica na fila e é tentada de novo no próximo
+`salvar` ou em `esvaziar`/`fechar`, que levantam o erro para quem chamou.
+`ao_erro(msg)` é chamado na thread de gravação: numa interface, deve só
+enfileirar a mensagem para a thread dela.
+"""
+import threading
+import time
+
+from . import perf
+from .armazenamento import log
+
+ATRASO_GRAVACAO = 0.3  # s; janela para juntar alterações em sequência numa só gravação
+
+class GravacaoEmSegundoPlano:
+    def __init__(self, ledger, atraso=ATRASO_GRAVACAO, ao_erro=None):
+        self.ledger = ledger
+        self.atraso = atraso
+        self.ao_erro = ao_erro
+        self.erro = None
+        self._grupos = []  # [(dados ou None, ops)] na ordem de gravação
+        self._cond = threading.Condition()
+        self._gravando = False
+        self._urgente = False
+        self._retentar = False
+        self._parar = False
+        self.thread = threading.Thread(target=self._executar, daemon=True)
+        ledger.gravador = self
+        self.thread.start()
+
+    def enviar(self, dados, ops):
+        """Chamado por `Ledger.salvar` com cópias que não mudam mais."""
+        with self._cond:
+            # `dados` completo substitui o que estava na fila (reescrita total);
+            # só operações se juntam a um grupo que também só tem operações
+            if self._grupos and (dados is not None or self._grupos[-1][0] is None):
+                dados_ant, ops_ant = self._grupos[-1]
+                self._grupos[-1] = (dados if dados is not None else dados_ant, ops_ant + ops)
+            else:
+                self._grupos.append((dados, list(ops)))
+            self._retentar = True
+            self._cond.notify_all()
+
+    def pendente(self):
+        with self._cond:
+            return bool(self._grupos) or self._gravando
+
+    def _executar(self):
+        while True:
+            with self._cond:
+                while not self._parar and not (self._grupos and (self.erro is None or self._retentar)):
+                    self._cond.wait()
+                if self._parar:
+                    return
+                limite = time.monotonic() + self.atraso
+                while not (self._urgente or self._parar):
+                    resta = limite - time.monotonic()
+                    if resta <= 0:
+                        break
+                    self._cond.wait(resta)
+                dados, ops = self._grupos.pop(0)
+                self._gravando = True
+                self._retentar = False
+            try:
+                with perf.medidor.em_segundo_plano("gravacao.segundo_plano"):
+                    self.ledger.armazenamento.gravar(dados, ops)
+                erro = None
+            except Exception as e:  # qualquer erro: a thread continua e quem espera é acordado
+                erro = e
+                log.exception("Falha ao gravar os dados")
+            with self._cond:
+                self._gravando = False
+                self.erro = erro
+                if erro is not None:
+                    self._grupos.insert(0, (dados, ops))
+                self._cond.notify_all()
+            if erro is not None and self.ao_erro:
+                self.ao_erro(f"Falha ao gravar os dados: {erro}")
+
+    def esvaziar(self):
+        """Grava já o que estiver na fila e espera. Levanta o erro se a gravação falhar."""
+        with self._cond:
+            self._urgente = True
+            self._retentar = bool(self._grupos)
+            self._cond.notify_all()
+            while self._gravando or (self._grupos and (self.erro is None or self._retentar)):
+                self._cond.wait()
+            self._urgente = False
+            if self._grupos:
+                raise self.erro
+
+    def fechar(self, esvaziar=True):
+        """Esvazia a fila e encerra a thread; se a gravação falhar, o erro sobe e a thread continua.
+        Com `esvaziar=False`, encerra descartando o que estiver na fila."""
+        if esvaziar:
+            self.esvaziar()
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+        self.thread.join()
+        self.ledger.gravador = None
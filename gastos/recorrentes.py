@@ -0,0 +1,71 @@
+import uuid
+from datetime import datetime, timedelta
+
+from .helpers import centavos, parse_date_to_iso
+
+def chave_ocorrencia(descricao, data, valor):
+    return (descricao, data, centavos(valor))
+
+def gerar_recorrentes(recs, existentes, hoje, meses=None):
+    """Gera as ocorrências mensais pendentes de cada recorrente até `hoje`.
+
+    `existentes` é um conjunto de chave_ocorrencia() dos gastos já lançados; as
+    ocorrências geradas entram nele. Com `meses`, cada recorrente avança no máximo
+    esse número de meses. Atualiza rec["ultima_geracao"] e retorna (novos, alterou).
+    """
+    novos = []
+    alterou = False
+    for rec in recs:
+        try:
+            ultima = datetime.strptime(rec.get("ultima_geracao"), "%Y-%m-%d")
+        except:
+            ultima = hoje
+        gerados = 0
+        # gerar ocorrências mensais desde ultima até mês atual (simples)
+        while meses is None or gerados < meses:
+            proxima = (ultima.replace(day=1) + timedelta(days=32))
+            # ajustar dia
+            dia = min(rec.get("dia", ultima.day), 28)
+            proxima = proxima.replace(day=dia)
+            if proxima.date() > hoje.date():
+                break
+            data = proxima.strftime("%Y-%m-%d")
+            # adicionar gasto somente se ainda não existir ocorrência com mesma marca
+            chave = chave_ocorrencia(rec["descricao"], data, rec["valor"])
+            if chave not in existentes:
+                existentes.add(chave)
+                novos.append({
+                    "id": str(uuid.uuid4()),
+                    "descricao": rec["descricao"],
+                    "valor": rec["valor"],
+                    "data": data,
+                    "categoria": rec.get("categoria","Geral")
+                })
+            ultima = proxima
+            gerados += 1
+        if gerados:
+            rec["ultima_geracao"] = ultima.strftime("%Y-%m-%d")
+            alterou = True
+    return novos, alterou
+
+def aplicar_recorrentes(ledger, meses=None, hoje=None):
+    """Lança as ocorrências pendentes numa única gravação.
+
+    Retorna quantas foram geradas, ou None se não há recorrentes cadastrados.
+    """
+    dados = ledger.obter()
+    recs = dados.get("recorrentes", [])
+    if not recs:
+        return None
+    hoje = hoje or datetime.now()
+    # só gastos a partir da geração mais antiga podem colidir com uma ocorrência nova
+    ultimas = [u for u in (r.get("ultima_geracao") for r in recs) if u and parse_date_to_iso(u) == u]
+    existentes = {(g.descricao, g.data, g.centavos) for g in ledger.intervalo(inicio=min(ultimas))} if ultimas else set()
+    novos, alterou = gerar_recorrentes(recs, existentes, hoje, meses)
+    with ledger.transacao("Aplicar recorrentes"):
+        if novos:
+            ledger.adicionar_gastos(novos)
+        if alterou:
+            ledger.marcar_alterado("recorrentes")
+    ledger.salvar()
+    return len(novos)
@@ -0,0 +1,173 @@
+"""Registro compacto de um gasto em memória.
+
+`Gasto` guarda o valor em centavos (int), a data como ordinal (int), descrição e
+categoria internadas e o id em 16 bytes quando é um uuid. Para o resto do código
+continua sendo um mapeamento com as chaves do arquivo: `g["valor"]` devolve reais,
+`g["data"]` a data ISO, `g["id"]` o texto do uuid e `dict(g)` (ou `para_dict`) o
+dict que vai para JSON/CSV. Chaves desconhecidas ficam em `extras` e voltam na
+gravação; datas fora do formato ISO ficam como texto.
+"""
+import sys
+from datetime import date
+from functools import lru_cache
+
+from .helpers import centavos as _centavos
+
+CHAVES = ("id", "descricao", "valor", "data", "categoria")
+_CHAVES = frozenset(CHAVES)
+
+def chave_id(texto):
+    """Forma interna de um id: 16 bytes se for um uuid canônico, senão o próprio texto."""
+    if type(texto) is str and len(texto) == 36 and texto[8] == texto[13] == texto[18] == texto[23] == "-":
+        h = texto.replace("-", "")
+        try:
+            b = bytes.fromhex(h)
+        except ValueError:
+            return texto
+        if len(b) == 16 and b.hex() == h:  # só minúsculas, sem espaços: volta ao mesmo texto
+            return b
+    return texto
+
+def texto_id(chave):
+    if type(chave) is bytes:
+        h = chave.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return chave
+
+@lru_cache(maxsize=65536)
+def _ordinal(texto):
+    try:
+        d = date.fromisoformat(texto)
+    except (TypeError, ValueError):
+        return texto
+    return d.toordinal() if d.isoformat() == texto else texto
+
+@lru_cache(maxsize=65536)
+def _iso(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+def _interno(texto):
+    return sys.intern(texto) if type(texto) is str else texto
+
+class Gasto:
+    __slots__ = ("chave", "descricao", "centavos", "dia", "categoria", "extras")
+
+    def __init__(self, chave, descricao, centavos, dia, categoria=None, extras=None):
+        self.chave = chave          # bytes (uuid) ou texto; None se ainda não tem id
+        self.descricao = descricao
+        self.centavos = centavos
+        self.dia = dia              # ordinal (int) ou o texto original
+        self.categoria = categoria  # None: ausente no arquivo
+        self.extras = extras
+
+    @classmethod
+    def de_dict(cls, d):
+        if type(d) is cls:
+            return d
+        extras = None if d.keys() <= _CHAVES else {k: v for k, v in d.items() if k not in _CHAVES}
+        id_ = d.get("id")
+        cat = d.get("categoria")
+        return cls(chave_id(id_) if id_ else None, _interno(d.get("descricao")), int(round((d.get("valor") or 0) * 100)),
+                   _ordinal(d["data"]), sys.intern(cat) if type(cat) is str else cat, extras)
+
+    def copia(self):
+        return Gasto(self.chave, self.descricao, self.centavos, self.dia, self.categoria,
+                     dict(self.extras) if self.extras else None)
+
+    @property
+    def data(self):
+        d = self.dia
+        return _iso(d) if type(d) is int else d
+
+    def para_dict(self):
+        d = {"id": texto_id(self.chave), "descricao": self.descricao, "valor": self.centavos / 100, "data": self.data}
+        if self.chave is None:
+            del d["id"]
+        if self.descricao is None:
+            del d["descricao"]
+        if self.categoria is not None:
+            d["categoria"] = self.categoria
+        if self.extras:
+            d.update(self.extras)
+        return d
+
+    # --- interface de mapeamento (compatível com o dict do arquivo) ---
+    def __getitem__(self, chave):
+        if chave == "data":
+            d = self.dia
+            return _iso(d) if type(d) is int else d
+        if chave == "valor":
+            return self.centavos / 100
+        if chave == "id":
+            v = texto_id(self.chave)
+        elif chave == "descricao":
+            v = self.descricao
+        elif chave == "categoria":
+            v = self.categoria
+        elif self.extras and chave in self.extras:
+            return self.extras[chave]
+        else:
+            raise KeyError(chave)
+        if v is None:
+            raise KeyError(chave)
+        return v
+
+    def __setitem__(self, chave, valor):
+        if chave == "data":
+            self.dia = _ordinal(valor)
+        elif chave == "valor":
+            self.centavos = _centavos(valor)
+        elif chave == "id":
+            self.chave = chave_id(valor)
+        elif chave == "descricao":
+            self.descricao = _interno(valor)
+        elif chave == "categoria":
+            self.categoria = _interno(valor)
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[chave] = valor
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    def update(self, campos=(), **mais):
+        for chave, valor in dict(campos, **mais).items():
+            self[chave] = valor
+
+    def keys(self):
+        return self.para_dict().keys()
+
+    def items(self):
+        return self.para_dict().items()
+
+    def values(self):
+        return self.para_dict().values()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, chave):
+        return self.get(chave) is not None
+
+    def __eq__(self, outro):
+        if isinstance(outro, Gasto):
+            outro = outro.para_dict()
+        return self.para_dict() == outro if isinstance(outro, dict) else NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Gasto({self.para_dict()!r})"
+
+def para_json(obj):
+    """`default` do json.dump: grava registros como o dict do arquivo."""
+    if isinstance(obj, Gasto):
+        return obj.para_dict()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
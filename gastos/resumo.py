@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from .helpers import periodo_mes
+
+def resumo_periodo(ledger, inicio=None, fim=None):
+    """Orçamento inicial, total gasto, saldo e totais por categoria no período."""
+    por_cat = ledger.totais_por_categoria(inicio, fim)
+    total_gasto = sum(por_cat.values())
+    orc = ledger.obter().get("orcamento_inicial",0.0)
+    return {"orcamento_inicial": orc, "total": total_gasto, "saldo": orc - total_gasto, "por_categoria": por_cat}
+
+def texto_resumo(resumo):
+    orc, total_gasto = resumo["orcamento_inicial"], resumo["total"]
+    texto = f"Orçamento Inicial: R$ {orc:.2f}\nTotal Gasto: R$ {total_gasto:.2f}\nSaldo: R$ {resumo['saldo']:.2f}\n"
+    texto += "\nGastos por categoria:\n"
+    for c,v in sorted(resumo["por_categoria"].items(), key=lambda x: x[1], reverse=True):
+        texto += f" - {c}: R$ {v:.2f}\n"
+    return texto
+
+def verificar_orcamento_categoria(ledger, categoria, hoje=None):
+    """(gasto no mês, orçamento) se a categoria estourou o orçamento no mês corrente, senão None."""
+    orc_cat = ledger.obter().get("orcamentos_categoria", {})
+    if categoria not in orc_cat:
+        return None
+    hoje = hoje or datetime.now()
+    inicio, fim = periodo_mes(hoje.month, hoje.year)
+    gasto_cat = ledger.totais_por_categoria(inicio, fim, categoria).get(categoria, 0.0)
+    if gasto_cat > orc_cat[categoria]:
+        return gasto_cat, orc_cat[categoria]
+    return None
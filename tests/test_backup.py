@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from gastos.backup import Backups
+from gastos.ledger import Ledger
+
+class RetencaoTest(unittest.TestCase):
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.ledger = Ledger(os.path.join(self._pasta.name, "gastos.json"), modo="json", historico=False)
+        self.backups = Backups(self.ledger, os.path.join(self._pasta.name, "backups"), {"horaria": 2})
+
+    def tearDown(self):
+        self.ledger.fechar()
+        self._pasta.cleanup()
+
+    def test_manifesto_com_nome_estranho_nao_interrompe_a_retencao(self):
+        inicio = datetime(2025, 1, 1, 8)
+        for h in range(4):
+            self.backups.gravar(self.backups.capturar(), inicio + timedelta(hours=h))
+        with open(os.path.join(self.backups.dir_manifestos, "copia.json"), "w", encoding="utf-8") as f:
+            f.write("{}")
+        self.assertEqual(len(self.backups.aplicar_retencao()), 2)
+        self.assertEqual(len(self.backups.listar()), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.backups.dir_manifestos, "copia.json")))
+
+    def test_gravacao_nao_deixa_temporarios(self):
+        self.ledger.adicionar_gasto({"id": str(uuid.uuid4()), "data": "2025-01-05", "categoria": "Geral", "descricao": "pão", "valor": 3.5})
+        self.backups.fazer()
+        arquivos = [a for _, _, nomes in os.walk(self.backups.diretorio) for a in nomes]
+        self.assertTrue(arquivos)
+        self.assertTrue(all(a.endswith((".json", ".json.gz")) for a in arquivos))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+import uuid
+
+from gastos.ledger import Ledger
+
+def _lote(n):
+    return [{"id": str(uuid.uuid4()), "data": f"2025-03-{i % 28 + 1:02d}", "categoria": "Geral", "descricao": f"item {i}", "valor": 1.5}
+            for i in range(n)]
+
+class LoteForaDoLogTest(unittest.TestCase):
+    def setUp(self):
+        self._pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self._pasta.name, "gastos.json")
+        self.ledger = Ledger(self.caminho, modo="json")
+        self.log = os.path.join(self._pasta.name, "gastos.historico.jsonl")
+        self.lotes = os.path.join(self._pasta.name, "gastos.historico.lotes")
+
+    def tearDown(self):
+        self.ledger.fechar()
+        self._pasta.cleanup()
+
+    def test_importacao_grande_nao_vai_para_o_log(self):
+        self.ledger.adicionar_gastos(_lote(5000))
+        self.assertLess(os.path.getsize(self.log), 4096)
+        self.assertEqual(len(os.listdir(self.lotes)), 1)
+        self.assertTrue(self.ledger.desfazer())
+        self.assertEqual(len(self.ledger.obter()["gastos"]), 0)
+        self.assertTrue(self.ledger.refazer())
+        self.assertEqual(len(self.ledger.obter()["gastos"]), 5000)
+
+    def test_lote_apagado_ao_sair_do_historico(self):
+        self.ledger.adicionar_gastos(_lote(5000))
+        self.ledger.historico.limpar()
+        self.assertEqual(os.listdir(self.lotes), [])
+
+    def test_lote_pequeno_fica_no_log(self):
+        self.ledger.adicionar_gastos(_lote(10))
+        self.assertFalse(os.path.exists(self.lotes))
+        self.assertTrue(self.ledger.desfazer())
+        self.assertEqual(len(self.ledger.obter()["gastos"]), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from gastos.importacao import AMOSTRA_FORMATOS, ImportacaoCSV
+
+def _importar(valores):
+    """Valores (texto) de um CSV com uma linha por valor -> (gastos importados, ImportacaoCSV)."""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "extrato.csv")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write("data,categoria,descricao,valor\n")
+            for i, v in enumerate(valores):
+                f.write(f'2025-01-{i % 28 + 1:02d},Geral,item {i},"{v}"\n')
+        imp = ImportacaoCSV(caminho)
+        gastos = [g for lote in imp.lotes() for g in lote]
+    return gastos, imp
+
+class SeparadorDecimalTest(unittest.TestCase):
+    def test_virgula_decimal_depois_de_amostra_sem_virgula(self):
+        gastos, imp = _importar(["100"] * (AMOSTRA_FORMATOS + 10) + ["12,50"])
+        self.assertEqual(gastos[-1]["valor"], 12.50)
+        self.assertEqual(imp.rejeitados, 0)
+        self.assertIn("12,50", imp.aviso())
+
+    def test_ponto_decimal_depois_de_amostra_brasileira(self):
+        gastos, imp = _importar(["1.234,56"] * (AMOSTRA_FORMATOS + 10) + ["12.50"])
+        self.assertEqual(gastos[0]["valor"], 1234.56)
+        self.assertEqual(gastos[-1]["valor"], 12.50)
+        self.assertIn("12.50", imp.aviso())
+
+    def test_separador_fora_de_grupos_de_milhar_e_rejeitado(self):
+        gastos, imp = _importar(["1.234,56"] * 3 + ["1234.567", "12,345,67"])
+        self.assertEqual([g["valor"] for g in gastos], [1234.56] * 3)
+        self.assertEqual(imp.rejeitados, 2)
+
+    def test_milhar_sem_decimal(self):
+        gastos, imp = _importar(["1.234,56", "1.234", "1.234.567"])
+        self.assertEqual([g["valor"] for g in gastos], [1234.56, 1234.0, 1234567.0])
+        self.assertIsNone(imp.aviso())
+
+if __name__ == "__main__":
+    unittest.main()